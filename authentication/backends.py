@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+User = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """
+    authenticate(request, email=..., password=...) with a single query
+    (email__iexact, served by the auth_user_email_upper_idx index).
+
+    Listed first in AUTHENTICATION_BACKENDS. When exactly one account has
+    the email, its answer is final: a wrong password or an inactive
+    account raises PermissionDenied, so later backends neither look the
+    user up again nor hash the password a second time. Unknown and shared
+    addresses are left to the other backends (allauth tries each account
+    of a shared address, and hashes once for an unknown one).
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        users = list(User._default_manager.filter(email__iexact=email)[:2])
+        if len(users) != 1:
+            return None
+        user = users[0]
+        # check_password() also upgrades an outdated hash
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        raise PermissionDenied
@@ -0,0 +1,126 @@
+"""
+JWT authentication without a user-table query per request.
+
+StatelessJWTAuthentication, the project default (see drf_settings), sets
+request.user to a ClaimsUser built from the access token: its id comes
+from the claims, which is all the API views need to scope their querysets.
+Any other attribute (username, email, ...) is read from the full User,
+loaded on first use.
+
+With settings.JWT_USER_CACHE_TIMEOUT > 0 the full User (minus the password
+hash) is kept in the cache that long, and every request checks is_active on
+the cached copy: a cache read instead of a query. invalidate_user(), called
+on every User save/delete (see signals), drops the copy, so a deactivated
+user is refused from their next request. With 0 nothing is cached and
+tokens are trusted until they expire.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+KEY_PREFIX = "auth:user"
+
+
+def _user_key(user_id):
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def get_cached_user(user_id):
+    """The User, from the cache when JWT_USER_CACHE_TIMEOUT allows; or None."""
+    timeout = settings.JWT_USER_CACHE_TIMEOUT
+    user = cache.get(_user_key(user_id)) if timeout else None
+    if user is None:
+        users = get_user_model().objects.defer("password")
+        user = users.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is not None and timeout:
+            cache.set(_user_key(user_id), user, timeout=timeout)
+    return user
+
+
+def invalidate_user(user_id):
+    """
+    Drop the cached User. Call it after changing users with queryset
+    update(), which sends no signals.
+    """
+    cache.delete(_user_key(user_id))
+
+
+class ClaimsUser:
+    """
+    request.user for a valid access token. id/pk come from the token;
+    other attributes are looked up on the full User, loaded (and cached, see
+    get_cached_user) the first time one is needed. Models take the id:
+    filter(user_id=request.user.id), save(user_id=request.user.id).
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    # inactive users are refused before one is built
+    is_active = True
+
+    def __init__(self, user_id, user=None):
+        self.id = self.pk = user_id
+        self._user = user
+
+    def __getattr__(self, name):
+        # only reached for attributes not set above
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._user is None:
+            self._user = get_cached_user(self.id)
+            if self._user is None:
+                raise AttributeError(name)
+        return getattr(self._user, name)
+
+    def __eq__(self, other):
+        return isinstance(other, ClaimsUser) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return f"ClaimsUser {self.id}"
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication returning a ClaimsUser, see the module docstring."""
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # compares the password hash: needs the row
+            return super().get_user(validated_token)
+        try:
+            claim = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+        # the claim is a string; views pass the id on to the ORM
+        field = get_user_model()._meta.get_field(api_settings.USER_ID_FIELD)
+        try:
+            user_id = field.to_python(claim)
+        except ValidationError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        user = None
+        if settings.JWT_USER_CACHE_TIMEOUT:
+            user = get_cached_user(user_id)
+            if user is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+                raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return ClaimsUser(user_id, user)
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    # drf-spectacular matches authentication classes exactly, not subclasses
+    target_class = "authentication.jwt.StatelessJWTAuthentication"
@@ -0,0 +1,135 @@
+import os
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.tokens import AccessToken
+
+from expense_manager.management.commands import benchmark_servers
+
+PASSWORD = "benchmark-password"
+
+
+class Command(benchmark_servers.Command):
+    help = (
+        "Burst-test POST /api/v1/auth/login/: --logins concurrent email "
+        "logins against gunicorn sync workers and uvicorn workers (async "
+        "login view), while one client keeps reading /api/v1/tags/ to show "
+        "what the burst does to API latency. Seeded users are deleted "
+        "afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=3)
+        parser.add_argument("--logins", type=int, default=100)
+        parser.add_argument("--port", type=int, default=8100)
+
+    def handle(self, *args, **options):
+        prefix = f"bench-login-{time.time_ns()}"
+        encoded = make_password(PASSWORD)
+        users = get_user_model().objects.bulk_create(
+            [
+                get_user_model()(
+                    username=f"{prefix}-{n}",
+                    email=f"{prefix}-{n}@example.com",
+                    password=encoded,
+                )
+                for n in range(options["logins"])
+            ]
+        )
+        servers = [
+            ("gunicorn (sync)", "wsgi", self.gunicorn_command),
+            ("uvicorn (async)", "asgi", self.uvicorn_command),
+        ]
+        results = []
+        try:
+            token = str(AccessToken.for_user(users[0]))
+            for n, (name, mode, command) in enumerate(servers):
+                port = options["port"] + n
+                env = {
+                    **os.environ,
+                    "SERVER_MODE": mode,
+                    "THROTTLE_ENABLED": "False",
+                }
+                server = subprocess.Popen(
+                    command(port, options["workers"]),
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                )
+                try:
+                    self.wait_until_ready(port, server)
+                    results.append((name, self.burst(port, users, token)))
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+        finally:
+            get_user_model().objects.filter(username__startswith=prefix).delete()
+
+        self.stdout.write(
+            f"{options['logins']} concurrent logins, {options['workers']} workers"
+        )
+        self.stdout.write(
+            f"  {'server':<17}{'logins/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'429s':>6}"
+            f"{'errors':>8}{'api reqs':>9}{'api p50':>9}{'api p95':>9}"
+        )
+        for name, row in results:
+            rate, p50, p95, throttled, errors, api_count, api_p50, api_p95 = row
+            self.stdout.write(
+                f"  {name:<17}{rate:9.1f}{p50:9.0f}{p95:9.0f}{throttled:6d}"
+                f"{errors:8d}{api_count:9d}{api_p50:9.1f}{api_p95:9.1f}"
+            )
+
+    def burst(self, port, users, token):
+        base = f"http://127.0.0.1:{port}"
+        done = threading.Event()
+        api_samples = []
+
+        def probe():
+            session = requests.Session()
+            headers = {"Authorization": f"Bearer {token}"}
+            while not done.is_set():
+                started = time.perf_counter()
+                session.get(f"{base}/api/v1/tags/", headers=headers)
+                api_samples.append((time.perf_counter() - started) * 1000)
+
+        def login(user):
+            started = time.perf_counter()
+            response = requests.post(
+                f"{base}/api/v1/auth/login/",
+                json={"email": user.email, "password": PASSWORD},
+            )
+            return (time.perf_counter() - started) * 1000, response.status_code
+
+        prober = threading.Thread(target=probe)
+        prober.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            samples = list(pool.map(login, users))
+        elapsed = time.perf_counter() - started
+        done.set()
+        prober.join()
+
+        ok = sorted(ms for ms, status in samples if status == 200)
+        throttled = sum(status == 429 for _, status in samples)
+        errors = len(samples) - len(ok) - throttled
+        login_q = statistics.quantiles(ok, n=100) if len(ok) > 1 else [0] * 99
+        api_q = (
+            statistics.quantiles(api_samples, n=100)
+            if len(api_samples) > 1
+            else [0] * 99
+        )
+        return (
+            len(ok) / elapsed,
+            login_q[49],
+            login_q[94],
+            throttled,
+            errors,
+            len(api_samples),
+            api_q[49],
+            api_q[94],
+        )
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Email login looks users up with email__iexact, which PostgreSQL runs as
+    # UPPER(email::text) = UPPER(%s); auth.User is not ours to add Meta
+    # indexes to, hence raw SQL
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_email_upper_idx "
+            'ON auth_user (UPPER("email"::text))',
+            "DROP INDEX CONCURRENTLY IF EXISTS auth_user_email_upper_idx",
+        ),
+    ]
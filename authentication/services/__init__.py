@@ -0,0 +1 @@
+from . import login as LOGIN_SERVICE
@@ -0,0 +1,83 @@
+"""
+Email + password login through authenticate(), which keeps
+AUTHENTICATION_BACKENDS, is_active checks, hash upgrades and
+user_login_failed as Django does them. authentication.backends.EmailBackend
+answers it with one query (email__iexact, served by the
+auth_user_email_upper_idx index).
+
+login() hashes on the calling thread: a sync (WSGI) worker is busy for the
+whole check either way, so a pool would only add a thread hop. alogin()
+runs authenticate() in PASSWORD_POOL, a small per-process thread pool, so
+an ASGI worker keeps serving other requests meanwhile; hashlib releases
+the GIL while hashing. At most settings.LOGIN_HASH_WORKERS checks run at
+once per process and LOGIN_HASH_QUEUE more may wait; further async logins
+get a 429 instead of piling onto CPU the API needs.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import connection
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework_simplejwt.tokens import RefreshToken
+
+PASSWORD_POOL = ThreadPoolExecutor(
+    max_workers=settings.LOGIN_HASH_WORKERS, thread_name_prefix="password"
+)
+_slots = threading.BoundedSemaphore(
+    settings.LOGIN_HASH_WORKERS + settings.LOGIN_HASH_QUEUE
+)
+
+
+def _authenticate(request, email, password):
+    # Backends query the database from this pool thread, on a connection
+    # of its own; connecting per login is cheap next to the hash, and no
+    # idle connection is left behind per pool thread
+    try:
+        return authenticate(request, email=email, password=password)
+    finally:
+        connection.close()
+
+
+def _submit(request, email, password):
+    if not _slots.acquire(blocking=False):
+        raise Throttled(wait=1, detail="Too many logins in progress; retry shortly.")
+    future = PASSWORD_POOL.submit(_authenticate, request, email, password)
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _finish(user):
+    # None for a wrong password and for an inactive account alike, so the
+    # response does not tell whether the account exists
+    if user is None:
+        raise AuthenticationFailed("Invalid email or password.")
+
+    refresh = RefreshToken.for_user(user)
+    return {
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+        "user": {
+            "id": user.id,
+            "username": user.get_username(),
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+        },
+    }
+
+
+def login(email, password, request=None):
+    """Tokens and profile for valid credentials; AuthenticationFailed otherwise."""
+    return _finish(authenticate(request, email=email, password=password))
+
+
+async def alogin(email, password, request=None):
+    """login() for async views: the password check does not block the loop."""
+    user = await asyncio.wrap_future(_submit(request, email, password))
+    # RefreshToken.for_user() may use the ORM (token blacklist)
+    return await sync_to_async(_finish)(user)
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from authentication.jwt import invalidate_user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # After commit, or a concurrent request could re-cache the old row
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
@@ -1,3 +1,192 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from authentication.jwt import ClaimsUser
+from authentication.services import LOGIN_SERVICE
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+LOGIN = "/api/v1/auth/login/"
+TAGS = "/api/v1/tags/"
+
+
+@override_settings(CACHES=LOCMEM_CACHE, THROTTLE_ENABLED=False)
+class EmailLoginTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "carol", "Carol@Example.com", "correct horse"
+        )
+        self.client = APIClient()
+        self.failures = []
+        user_login_failed.connect(self.record_failure)
+        self.addCleanup(user_login_failed.disconnect, self.record_failure)
+
+    def record_failure(self, sender, credentials, **kwargs):
+        self.failures.append(credentials)
+
+    def login(self, email, password):
+        return self.client.post(
+            LOGIN, {"email": email, "password": password}, format="json"
+        )
+
+    def test_login(self):
+        # the user, looked up once by email (EmailBackend)
+        with self.assertNumQueries(1):
+            response = self.login("carol@example.com", "correct horse")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["user"]["id"], self.user.pk)
+        self.assertIn("access", response.json())
+        self.assertEqual(self.failures, [])
+
+    def test_failures_look_alike(self):
+        self.user.is_active = False
+        self.user.save()
+        get_user_model().objects.create_user("dave", "dave@example.com", "pw")
+        responses = [
+            # inactive account, right password: must not tell it exists
+            self.login("carol@example.com", "correct horse"),
+            self.login("dave@example.com", "wrong"),
+            self.login("nobody@example.com", "correct horse"),
+        ]
+        self.assertEqual(responses[0].json(), {"detail": "Invalid email or password."})
+        for response in responses:
+            self.assertIn(response.status_code, (401, 403))
+            self.assertEqual(response.status_code, responses[0].status_code)
+            self.assertEqual(response.json(), responses[0].json())
+        self.assertEqual(len(self.failures), 3)
+        # authenticate() masks the password before sending the signal
+        passwords = {credentials["password"] for credentials in self.failures}
+        self.assertFalse(passwords & {"correct horse", "wrong"})
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]
+    )
+    def test_outdated_hash_is_upgraded(self):
+        self.user.password = make_password("correct horse", hasher="md5")
+        self.user.save()
+        response = self.login("carol@example.com", "correct horse")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+
+# TransactionTestCase: alogin() runs authenticate() in LOGIN_SERVICE's thread
+# pool, on a connection of its own that must see the users
+class AsyncEmailLoginTests(TransactionTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "erin", "erin@example.com", "correct horse"
+        )
+
+    def test_alogin(self):
+        alogin = async_to_sync(LOGIN_SERVICE.alogin)
+        data = alogin("erin@example.com", "correct horse")
+        self.assertEqual(data["user"]["id"], self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, "Invalid email"):
+            alogin("erin@example.com", "correct horse")
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, THROTTLE_ENABLED=False, JWT_USER_CACHE_TIMEOUT=300
+)
+class StatelessJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "frank", "frank@example.com", "correct horse"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, token=None):
+        token = token or AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(TAGS)
+        user_queries = [
+            query["sql"] for query in queries if '"auth_user"' in query["sql"]
+        ]
+        return response, user_queries
+
+    def assertRefused(self, response, code):
+        # 403, not 401: SessionAuthentication, listed first, has no challenge
+        self.assertEqual(response.status_code, 403, response.content)
+        self.assertEqual(response.json()["code"], code)
+
+    def test_requests_need_no_user_query(self):
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200, response.content)
+        # loaded once, without the password hash, then served from the cache
+        self.assertEqual(len(user_queries), 1)
+        self.assertNotIn('"password"', user_queries[0])
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(user_queries, [])
+
+    def test_deactivated_user_is_refused_on_the_next_request(self):
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.get(token)[0].status_code, 200)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        # the same, still unexpired token
+        self.assertRefused(self.get(token)[0], "user_inactive")
+
+    @override_settings(JWT_USER_CACHE_TIMEOUT=0)
+    def test_no_cache_trusts_the_token(self):
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(user_queries, [])
+        # until it expires, even once the user is deactivated
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(user_queries, [])
+        self.assertIsNone(cache.get(f"auth:user:{self.user.pk}"))
+
+    def test_malformed_user_id_claim(self):
+        for claim in ("not-a-number", None):
+            token = AccessToken.for_user(self.user)
+            if claim is None:
+                del token["user_id"]
+            else:
+                token["user_id"] = claim
+            response, user_queries = self.get(token)
+            self.assertRefused(response, "token_not_valid")
+            self.assertEqual(user_queries, [])
+
+    def test_unknown_user_is_refused(self):
+        token = AccessToken.for_user(self.user)
+        token["user_id"] = str(self.user.pk + 1000)
+        self.assertRefused(self.get(token)[0], "user_not_found")
+
+    @override_settings(JWT_USER_CACHE_TIMEOUT=0)
+    def test_claims_user_reads_other_attributes_from_the_user(self):
+        user = ClaimsUser(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.id, user.pk), (self.user.pk, self.user.pk))
+            self.assertTrue(user.is_authenticated)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "frank")
+            self.assertEqual(user.email, "frank@example.com")
+        self.assertEqual(user, ClaimsUser(self.user.pk))
+        with self.assertRaises(AttributeError):
+            user._state
+        with self.assertRaises(AttributeError):
+            ClaimsUser(self.user.pk + 1000).username
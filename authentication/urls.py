@@ -1,6 +1,12 @@
+from django.conf import settings
 from django.urls import path
-from authentication.views import EMAIL_LOGIN_VIEW
+from authentication.views import EMAIL_LOGIN_VIEW, ASYNC_LOGIN_VIEW
+from utils.async_views import asyncify_urls
 
 urlpatterns = [
     path("auth/login/", EMAIL_LOGIN_VIEW.EmailLoginView.as_view(), name="email_login"),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # ASGI deployment: password checks are awaited on the event loop
+    urlpatterns = asyncify_urls(urlpatterns, ASYNC_LOGIN_VIEW.IMPLEMENTATIONS)
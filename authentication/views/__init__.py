@@ -1 +1,2 @@
 from . import email_login as EMAIL_LOGIN_VIEW
+from . import async_login as ASYNC_LOGIN_VIEW
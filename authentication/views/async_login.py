@@ -0,0 +1,29 @@
+"""
+Async EmailLoginView.post, used when the app is served over ASGI
+(settings.ASYNC_READ_VIEWS): the password check is awaited, so the worker
+keeps serving other requests; see LOGIN_SERVICE and utils.async_views.
+"""
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from authentication.serializers import EMAIL_LOGIN_SERIALIZER
+from authentication.services import LOGIN_SERVICE
+from authentication.views import EMAIL_LOGIN_VIEW
+
+
+async def email_login_view(view, request, *args, **kwargs):
+    serializer = EMAIL_LOGIN_SERIALIZER.EmailPasswordSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = await LOGIN_SERVICE.alogin(
+        serializer.validated_data["email"].lower(),
+        serializer.validated_data["password"],
+        request,
+    )
+    return Response(data, status=status.HTTP_200_OK)
+
+
+# {view class: {action: handler}} for utils.async_views.asyncify_urls
+IMPLEMENTATIONS = {
+    EMAIL_LOGIN_VIEW.EmailLoginView: {"post": email_login_view},
+}
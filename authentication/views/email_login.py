@@ -10,10 +10,11 @@ from authentication.serializers import EMAIL_LOGIN_SERIALIZER
 
 class EmailLoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = "login"
 
     def post(self, request):
         serializer = EMAIL_LOGIN_SERIALIZER.EmailPasswordLoginSerializer(
-            data=request.data
+            data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
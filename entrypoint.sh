@@ -10,10 +10,34 @@ python manage.py collectstatic --noinput --clear
 echo "Starting nginx..."
 nginx
 
+WEB_WORKERS="${WEB_WORKERS:-3}"
+
+# Statement imports run in a single request of up to 300s. Their own small
+# gunicorn (nginx routes import_statement to it) keeps that timeout off the
+# API workers, which a hung request would otherwise hold for 5 minutes
+echo "Starting gunicorn for statement imports..."
+gunicorn pet.wsgi:application \
+    --bind 127.0.0.1:8001 \
+    --workers "${IMPORT_WORKERS:-2}" \
+    --timeout "${IMPORT_TIMEOUT:-300}" \
+    --access-logfile - \
+    --error-logfile - \
+    --log-level info &
+
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    echo "Starting uvicorn..."
+    exec uvicorn pet.asgi:application \
+        --host 0.0.0.0 \
+        --port 8000 \
+        --workers "$WEB_WORKERS" \
+        --timeout-keep-alive 60 \
+        --log-level info
+fi
+
 echo "Starting gunicorn..."
 exec gunicorn pet.wsgi:application \
     --bind 0.0.0.0:8000 \
-    --workers 3 \
+    --workers "$WEB_WORKERS" \
     --timeout 60 \
     --access-logfile - \
     --error-logfile - \
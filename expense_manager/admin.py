@@ -7,6 +7,9 @@ from expense_manager.models import (
     BankAccount,
     Item,
     ExpenseItem,
+    MonthlySpendRollup,
+    BalanceLedgerEntry,
+    BalanceCheckpoint,
 )
 
 
@@ -45,3 +48,34 @@ class ExpenseItemAdmin(ModelAdmin):
     search_fields = ["expense__transaction_info", "item__name"]
     list_filter = ["item"]
     readonly_fields = []
+
+
+@admin.register(MonthlySpendRollup)
+class MonthlySpendRollupAdmin(ModelAdmin):
+    list_display = [
+        "id",
+        "user",
+        "year",
+        "month",
+        "bank_account",
+        "tag",
+        "transaction_type",
+        "total",
+        "count",
+    ]
+    list_filter = ["year", "month", "transaction_type"]
+    search_fields = ["user__username"]
+
+
+@admin.register(BalanceLedgerEntry)
+class BalanceLedgerEntryAdmin(ModelAdmin):
+    list_display = ["id", "bank_account", "effective_at", "delta", "expense"]
+    search_fields = ["bank_account__name", "bank_account__user__username"]
+    readonly_fields = ["created_at"]
+    date_hierarchy = "effective_at"
+
+
+@admin.register(BalanceCheckpoint)
+class BalanceCheckpointAdmin(ModelAdmin):
+    list_display = ["id", "bank_account", "month", "balance"]
+    search_fields = ["bank_account__name", "bank_account__user__username"]
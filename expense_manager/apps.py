@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ExpenseManagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'expense_manager'
+
+    def ready(self):
+        from expense_manager import signals  # noqa: F401
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+from django.db.models import Exists, OuterRef
+from rest_framework.exceptions import ParseError
+
+from expense_manager.models import Expense, ExpenseItem
+
+
+def has_any_tag(tag_ids):
+    # EXISTS semi-join instead of JOIN + DISTINCT: no duplicate rows to
+    # collapse, and the (user, transaction_date_time) order survives.
+    return Exists(
+        Expense.tags.through.objects.filter(
+            expense_id=OuterRef("pk"), tag_id__in=tag_ids
+        )
+    )
+
+
+def has_any_item(item_ids):
+    return Exists(
+        ExpenseItem.objects.filter(expense_id=OuterRef("pk"), item_id__in=item_ids)
+    )
+
+
+def parse_id_list(value, name, label):
+    try:
+        ids = [int(part.strip()) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise ParseError(f"{name} must be comma-separated integers.")
+    if not ids:
+        raise ParseError(f"At least one {label} ID is required.")
+    return ids
+
+
+def filter_expenses(expenses, params, require_filter=True):
+    """
+    Apply the date range / tags / bank_account / items query parameters
+    shared by filter_by_date_range_and_tags and export.
+
+    Returns (queryset, applied) where applied holds the parsed filters in
+    response order. Invalid parameters raise ParseError (HTTP 400).
+    """
+    start_date_str = params.get("start_date")
+    end_date_str = params.get("end_date")
+    tags_param = params.get("tags")
+    bank_account_param = params.get("bank_account")
+    items_param = params.get("items")
+
+    # Check if any filter is provided
+    date_provided = bool(start_date_str or end_date_str)
+
+    # If any date is provided, both dates are required
+    if date_provided and not (start_date_str and end_date_str):
+        raise ParseError("If start_date or end_date is provided, both are required.")
+
+    # At least one filter must be provided
+    if require_filter and not (
+        date_provided or tags_param or bank_account_param or items_param
+    ):
+        raise ParseError(
+            "At least one filter is required: date range (start_date and end_date), tags, bank_account, or items."
+        )
+
+    applied = {}
+
+    # Parse and validate dates if provided
+    if date_provided:
+        try:
+            start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+        except ValueError:
+            raise ParseError("Dates must be in YYYY-MM-DD format.")
+
+        # Validate date range
+        if start_date > end_date:
+            raise ParseError("start_date must be before or equal to end_date.")
+
+        expenses = expenses.filter(date__gte=start_date, date__lte=end_date)
+        applied["start_date"] = start_date_str
+        applied["end_date"] = end_date_str
+
+    if tags_param:
+        tag_ids = parse_id_list(tags_param, "tags", "tag")
+        expenses = expenses.filter(has_any_tag(tag_ids))
+        applied["tags"] = tag_ids
+
+    if bank_account_param:
+        try:
+            bank_account_id = int(bank_account_param)
+        except ValueError:
+            raise ParseError("bank_account must be an integer.")
+        expenses = expenses.filter(bank_account_id=bank_account_id)
+        applied["bank_account"] = bank_account_id
+
+    if items_param:
+        item_ids = parse_id_list(items_param, "items", "item")
+        expenses = expenses.filter(has_any_item(item_ids))
+        applied["items"] = item_ids
+
+    return expenses, applied
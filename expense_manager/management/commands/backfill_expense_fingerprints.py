@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from expense_manager.models import Expense, expense_fingerprint
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill Expense.fingerprint for rows created before it existed. When "
+        "several expenses share a fingerprint the oldest one gets it and the "
+        "others keep NULL: they stay as they are but no longer block new "
+        "duplicates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only backfill this user id.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        expenses = Expense.objects.filter(fingerprint__isnull=True).order_by("pk")
+        if options["user"] is not None:
+            expenses = expenses.filter(user_id=options["user"])
+        rows = expenses.values_list(
+            "pk",
+            "user_id",
+            "bank_account_id",
+            "amount",
+            "transaction_date_time",
+            "transaction_info",
+            "transaction_type",
+        )
+
+        filled = duplicates = 0
+        batch = {}
+        for pk, *fields in rows.iterator(chunk_size=options["batch_size"]):
+            fingerprint = expense_fingerprint(*fields)
+            if fingerprint in batch:
+                duplicates += 1
+            else:
+                batch[fingerprint] = pk
+            if len(batch) >= options["batch_size"]:
+                written = self.fill(batch)
+                filled += written
+                duplicates += len(batch) - written
+                batch = {}
+        if batch:
+            written = self.fill(batch)
+            filled += written
+            duplicates += len(batch) - written
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fingerprinted {filled} expenses; {duplicates} duplicates "
+                "left without one."
+            )
+        )
+
+    def fill(self, batch):
+        """Store ``{fingerprint: pk}`` except fingerprints already taken."""
+        with transaction.atomic():
+            taken = set(
+                Expense.objects.filter(fingerprint__in=batch).values_list(
+                    "fingerprint", flat=True
+                )
+            )
+            updates = [
+                Expense(pk=pk, fingerprint=fingerprint)
+                for fingerprint, pk in batch.items()
+                if fingerprint not in taken
+            ]
+            Expense.objects.bulk_update(updates, ["fingerprint"])
+        return len(updates)
@@ -0,0 +1,108 @@
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from expense_manager.models import BankAccount, Expense
+from expense_manager.serializers import EXPENSE_SERIALIZER
+from expense_manager.services import BULK_SERVICE
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-row serializer.save() bulk update with the batched "
+        "BULK_SERVICE.update_expenses path. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        with transaction.atomic():
+            user, payloads = self.seed(rows)
+            results = [
+                ("per-row save", self.measure(user, payloads, self.per_row_save)),
+                ("batched", self.measure(user, payloads, self.batched)),
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"bulk update of {rows} expenses")
+        for name, (seconds, queries) in results:
+            self.stdout.write(f"  {name:<14} {seconds * 1000:9.1f} ms {queries:7d} queries")
+
+    def seed(self, rows):
+        user = get_user_model().objects.create_user(
+            username=f"bench-bulk-update-{time.time_ns()}", password=None
+        )
+        accounts = [
+            BankAccount.objects.create(user=user, name=f"Account {i}", balance=0)
+            for i in range(3)
+        ]
+        start = timezone.make_aware(datetime(2024, 1, 1))
+        _, created = BULK_SERVICE.create_expenses(
+            user.id,
+            [
+                {
+                    "amount": 10 + i % 90,
+                    "date": date(2024, 1, 1) + timedelta(days=i % 365),
+                    "time": dt_time(12),
+                    "transaction_date_time": start + timedelta(days=i % 365),
+                    "transaction_type": "Debit" if i % 4 else "Credit",
+                    "bank_account": accounts[i % 3],
+                    "write_tags": [f"tag{i % 10}"],
+                    "write_items": [{"name": f"item{i % 25}", "amount": 5}],
+                }
+                for i in range(rows)
+            ],
+        )
+        # Change amounts everywhere, tags on every other row, items on every third
+        payloads = []
+        for i, expense in enumerate(created):
+            payload = {"id": expense.id, "amount": str(expense.amount + 1)}
+            if i % 2 == 0:
+                payload["write_tags"] = [f"tag{i % 10}", f"tag{(i + 1) % 10}"]
+            if i % 3 == 0:
+                payload["write_items"] = [{"name": f"item{i % 7}", "amount": 3}]
+            payloads.append(payload)
+        return user, payloads
+
+    def measure(self, user, payloads, run):
+        with transaction.atomic():
+            context = {"request": SimpleNamespace(user=user, query_params={})}
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                run(user, payloads, context)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        return elapsed, len(ctx.captured_queries)
+
+    def load(self, user, payloads):
+        serializer_class = EXPENSE_SERIALIZER.ExpenseSerializer
+        queryset = serializer_class.setup_eager_loading(Expense.objects.filter(user=user))
+        return serializer_class, queryset.in_bulk([p["id"] for p in payloads])
+
+    def per_row_save(self, user, payloads, context):
+        serializer_class, by_id = self.load(user, payloads)
+        for payload in payloads:
+            serializer = serializer_class(
+                by_id[payload["id"]], data=payload, partial=True, context=context
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+    def batched(self, user, payloads, context):
+        serializer_class, by_id = self.load(user, payloads)
+        instances = [by_id[payload["id"]] for payload in payloads]
+        serializer = serializer_class(
+            instances, data=payloads, many=True, partial=True, context=context
+        )
+        serializer.is_valid(raise_exception=True)
+        BULK_SERVICE.update_expenses(
+            user.id, list(zip(instances, serializer.validated_data))
+        )
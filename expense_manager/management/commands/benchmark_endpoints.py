@@ -0,0 +1,284 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Rollback(Exception):
+    """Raised to undo a write request's effects after timing it."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the expense_manager endpoints in-process (full middleware, "
+        "JWT authentication) against a user seeded by seed_benchmark, and "
+        "write per-endpoint status, query count and p50/p95 latency to a "
+        "JSON report. Writes are rolled back after every request, so runs "
+        "repeat on the same data. --compare prints the change against the "
+        "report of another branch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, help="Default: the user with most expenses."
+        )
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--only", help="Comma-separated endpoint names (default: all)."
+        )
+        parser.add_argument("--label", help="Report label (default: git branch).")
+        parser.add_argument("--output", help="Default: benchmark-<label>.json")
+        parser.add_argument("--compare", help="Earlier report to compare with.")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 2:
+            raise CommandError("--repeat must be at least 2.")
+        user = self.user(options["user"])
+        endpoints = self.endpoints(user)
+        if options["only"]:
+            names = options["only"].split(",")
+            unknown = set(names) - {name for name, *_ in endpoints}
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            endpoints = [endpoint for endpoint in endpoints if endpoint[0] in names]
+
+        token = AccessToken.for_user(user)
+        client = Client(headers={"Authorization": f"Bearer {token}"})
+        results = {}
+        with override_settings(ALLOWED_HOSTS=["testserver"], THROTTLE_ENABLED=False):
+            for name, method, path, body in endpoints:
+                results[name] = self.measure(client, method, path, body, options)
+                self.stdout.write(self.line(name, results[name]))
+
+        label = options["label"] or self.git("rev-parse", "--abbrev-ref", "HEAD")
+        report = {
+            "label": label,
+            "commit": self.git("rev-parse", "--short", "HEAD"),
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "user": user.pk,
+            "expenses": user.expenses.count(),
+            "repeat": options["repeat"],
+            "endpoints": results,
+        }
+        output = options["output"] or f"benchmark-{label.replace('/', '-')}.json"
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {output}."))
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                self.compare(json.load(f), report)
+
+    # ---------- setup ----------
+    def user(self, user_id):
+        users = get_user_model().objects.all()
+        if user_id is not None:
+            return users.get(pk=user_id)
+        user = (
+            users.annotate(n=Count("expenses")).filter(n__gt=0).order_by("-n").first()
+        )
+        if user is None:
+            raise CommandError("No expenses to benchmark; run seed_benchmark first.")
+        return user
+
+    def endpoints(self, user):
+        """(name, method, path, JSON body) of every endpoint to time."""
+        expenses = user.expenses.order_by("-transaction_date_time")
+        latest = expenses.first()
+        last_day = expenses.aggregate(last=Max("date"))["last"]
+        month = f"month={last_day.month}&year={last_day.year}"
+        week_start = last_day - timedelta(days=6)
+        week = f"start_date={week_start}&end_date={last_day}"
+        tags = ",".join(
+            str(pk)
+            for pk in user.tags.annotate(n=Count("expenses"))
+            .order_by("-n")
+            .values_list("pk", flat=True)[:2]
+        )
+        account = user.bank_accounts.order_by("pk").first()
+        to_update = list(expenses.values_list("pk", flat=True)[:50])
+
+        def new_expense(n):
+            moment = timezone.now() + timedelta(microseconds=n)
+            return {
+                "amount": "123.45",
+                "date": moment.date().isoformat(),
+                "time": moment.time().isoformat(),
+                "transaction_date_time": moment.isoformat(),
+                "transaction_info": f"Benchmark {n}",
+                "transaction_type": "Debit",
+                "bank_account": account.pk,
+                "write_tags": ["food", "benchmark"],
+                "write_items": [{"name": "coffee", "amount": "123.45"}],
+            }
+
+        api = "/api/v1"
+        return [
+            ("expenses.list", "get", f"{api}/expenses/", None),
+            (
+                "expenses.list_cursor",
+                "get",
+                f"{api}/expenses/?pagination=cursor&page_size=50",
+                None,
+            ),
+            ("expenses.list_sparse", "get", f"{api}/expenses/?fields=id,amount", None),
+            ("expenses.retrieve", "get", f"{api}/expenses/{latest.pk}/", None),
+            (
+                "expenses.filter_by_month",
+                "get",
+                f"{api}/expenses/filter_by_month/?{month}",
+                None,
+            ),
+            (
+                "expenses.filter_by_date_range_and_tags",
+                "get",
+                f"{api}/expenses/filter_by_date_range_and_tags/"
+                f"?{week}&tags={tags}&bank_account={account.pk}",
+                None,
+            ),
+            (
+                "expenses.filter_by_tags",
+                "get",
+                f"{api}/expenses/filter_by_tags/?tags={tags}",
+                None,
+            ),
+            ("expenses.search", "get", f"{api}/expenses/search/?q=swiggy", None),
+            ("expenses.summary", "get", f"{api}/expenses/summary/?{month}", None),
+            ("expenses.export", "get", f"{api}/expenses/export/?{week}", None),
+            ("expenses.create", "post", f"{api}/expenses/", new_expense(0)),
+            (
+                "expenses.partial_update",
+                "patch",
+                f"{api}/expenses/{latest.pk}/",
+                {"amount": "99.99", "write_tags": ["benchmark"]},
+            ),
+            ("expenses.destroy", "delete", f"{api}/expenses/{latest.pk}/", None),
+            (
+                "expenses.bulk_create",
+                "post",
+                f"{api}/expenses/bulk_create/",
+                [new_expense(n) for n in range(50)],
+            ),
+            (
+                "expenses.bulk_update",
+                "patch",
+                f"{api}/expenses/bulk_update/",
+                [{"id": pk, "amount": "42.00"} for pk in to_update],
+            ),
+            ("tags.list", "get", f"{api}/tags/", None),
+            ("tags.autocomplete", "get", f"{api}/tags/autocomplete/?q=fo", None),
+            ("items.list", "get", f"{api}/items/", None),
+            ("items.autocomplete", "get", f"{api}/items/autocomplete/?q=co", None),
+            ("bank_accounts.list", "get", f"{api}/bank_accounts/", None),
+            (
+                "bank_accounts.balance_history",
+                "get",
+                f"{api}/bank_accounts/{account.pk}/balance_history/"
+                f"?start={week_start}&end={last_day}",
+                None,
+            ),
+        ]
+
+    # ---------- measuring ----------
+    def measure(self, client, method, path, body, options):
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        samples, counts = [], []
+        for n in range(options["warmup"] + options["repeat"]):
+            queries.clear()
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                response, size = self.request(client, method, path, body)
+                elapsed = time.perf_counter() - started
+            if n >= options["warmup"]:
+                samples.append(elapsed * 1000)
+                counts.append(len(queries))
+
+        quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+        return {
+            "method": method.upper(),
+            "path": path,
+            "status": response.status_code,
+            "bytes": size,
+            "queries": max(counts),
+            "queries_min": min(counts),
+            "p50_ms": round(quantiles[49], 3),
+            "p95_ms": round(quantiles[94], 3),
+            "mean_ms": round(statistics.fmean(samples), 3),
+            "min_ms": round(min(samples), 3),
+            "max_ms": round(max(samples), 3),
+        }
+
+    def request(self, client, method, path, body):
+        kwargs = {}
+        if body is not None:
+            kwargs = {"data": json.dumps(body), "content_type": "application/json"}
+        if method == "get":
+            response = client.get(path)
+            return response, len(self.content(response))
+        # A write runs in a transaction that is rolled back afterwards
+        try:
+            with transaction.atomic():
+                response = getattr(client, method)(path, **kwargs)
+                size = len(self.content(response))
+                raise Rollback
+        except Rollback:
+            pass
+        return response, size
+
+    def content(self, response):
+        if response.streaming:
+            return b"".join(response.streaming_content)
+        return response.content
+
+    def git(self, *args):
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return "unknown"
+
+    # ---------- output ----------
+    def line(self, name, result):
+        flag = "" if result["status"] < 400 else f"  (HTTP {result['status']})"
+        return (
+            f"  {name:<38}{result['queries']:4d} q{result['p50_ms']:9.1f} ms p50"
+            f"{result['p95_ms']:9.1f} ms p95{flag}"
+        )
+
+    def compare(self, before, after):
+        self.stdout.write(
+            f"\n{after['label']} vs {before['label']} (p50, p95, queries)"
+        )
+        for name, new in after["endpoints"].items():
+            old = before["endpoints"].get(name)
+            if old is None:
+                self.stdout.write(f"  {name:<38} new")
+                continue
+            changes = [
+                f"{old[key]:8.1f} -> {new[key]:8.1f} ms "
+                f"({(new[key] - old[key]) / old[key] * 100:+5.0f}%)"
+                for key in ("p50_ms", "p95_ms")
+            ]
+            self.stdout.write(
+                f"  {name:<38}{'  '.join(changes)}  "
+                f"{old['queries']:3d} -> {new['queries']:3d}"
+            )
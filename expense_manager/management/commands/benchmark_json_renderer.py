@@ -0,0 +1,104 @@
+import io
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from expense_manager.models import BankAccount, Expense
+from expense_manager.serializers import EXPENSE_SERIALIZER
+from expense_manager.services import BULK_SERVICE
+from pet.parsers import ORJSONParser
+from pet.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time ORJSONRenderer/ORJSONParser against DRF's JSONRenderer/JSONParser "
+        "on a serialized expense list, after checking they agree on it (edge "
+        "cases are covered by the tests). Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            expenses = self.seed(options["rows"])
+            transaction.set_rollback(True)
+
+        body = JSONRenderer().render(expenses)
+        parsed = self.parser(JSONParser)(body)
+        if (
+            ORJSONRenderer().render(expenses) != body
+            or self.parser(ORJSONParser)(body) != parsed
+        ):
+            raise CommandError("Output differs from DRF for the expense list.")
+        self.stdout.write(self.style.SUCCESS("Output matches DRF byte for byte."))
+
+        self.stdout.write(
+            f"{options['rows']} expenses ({len(body) / 1e6:.1f} MB), "
+            f"best of {options['repeat']}"
+        )
+        for action, baseline, fast in [
+            ("render", JSONRenderer().render, ORJSONRenderer().render),
+            ("parse", self.parser(JSONParser), self.parser(ORJSONParser)),
+        ]:
+            payload = expenses if action == "render" else body
+            before = self.measure(baseline, payload, options["repeat"])
+            after = self.measure(fast, payload, options["repeat"])
+            self.stdout.write(
+                f"  {action:<6} drf {before * 1000:8.1f} ms  orjson "
+                f"{after * 1000:8.1f} ms  ({before / after:.1f}x)"
+            )
+
+    def seed(self, rows):
+        user = get_user_model().objects.create_user(
+            username=f"bench-json-{time.time_ns()}", password=None
+        )
+        accounts = [
+            BankAccount.objects.create(user=user, name=f"Account {i}", balance=0)
+            for i in range(3)
+        ]
+        start = timezone.make_aware(datetime(2024, 1, 1))
+        BULK_SERVICE.create_expenses(
+            user.id,
+            [
+                {
+                    "amount": Decimal(10 + i % 90) + Decimal(i % 100) / 100,
+                    "date": date(2024, 1, 1) + timedelta(days=i % 365),
+                    "time": dt_time(i % 24, i % 60, i % 60),
+                    "transaction_date_time": start + timedelta(minutes=i),
+                    "transaction_info": f"Payment {i} – café ☕",
+                    "transaction_type": "Debit" if i % 4 else "Credit",
+                    "bank_account": accounts[i % 3],
+                    "write_tags": [f"tag{i % 10}"],
+                    "write_items": [{"name": f"item{i % 25}", "amount": 5}],
+                }
+                for i in range(rows)
+            ],
+        )
+        serializer_class = EXPENSE_SERIALIZER.ExpenseSerializer
+        queryset = serializer_class.setup_eager_loading(
+            Expense.objects.filter(user=user)
+        )
+        context = {"request": SimpleNamespace(user=user, query_params={})}
+        return serializer_class(queryset, many=True, context=context).data
+
+    def parser(self, parser_class):
+        return lambda body: parser_class().parse(io.BytesIO(body))
+
+    def measure(self, run, payload, repeat):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run(payload)
+            best = min(best, time.perf_counter() - started)
+        return best
@@ -0,0 +1,188 @@
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from expense_manager.models import BankAccount
+from expense_manager.services import BULK_SERVICE
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the expense read endpoints side by side: gunicorn sync "
+        "workers (SERVER_MODE=wsgi) vs uvicorn workers (SERVER_MODE=asgi, "
+        "async read views), same worker count, same seeded data. Point it "
+        "at a local PostgreSQL; the seeded user is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=3)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--expenses", type=int, default=5000)
+        parser.add_argument("--user", type=int, help="Use this user's data.")
+        parser.add_argument("--port", type=int, default=8100)
+
+    def handle(self, *args, **options):
+        if options["user"] is not None:
+            user, seeded = get_user_model().objects.get(pk=options["user"]), False
+        else:
+            user, seeded = self.seed(options["expenses"]), True
+        token = str(AccessToken.for_user(user))
+        paths = self.paths(user)
+
+        servers = [
+            ("gunicorn (sync)", "wsgi", self.gunicorn_command),
+            ("uvicorn (async)", "asgi", self.uvicorn_command),
+        ]
+        results = []
+        try:
+            for n, (name, mode, command) in enumerate(servers):
+                port = options["port"] + n
+                env = {
+                    **os.environ,
+                    "SERVER_MODE": mode,
+                    "THROTTLE_ENABLED": "False",
+                }
+                server = subprocess.Popen(
+                    command(port, options["workers"]),
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                )
+                try:
+                    self.wait_until_ready(port, server)
+                    results.append((name, self.load(port, token, paths, options)))
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+        finally:
+            if seeded:
+                user.delete()
+
+        self.stdout.write(
+            f"{options['requests']} requests, concurrency {options['concurrency']}, "
+            f"{options['workers']} workers, {len(paths)} endpoints"
+        )
+        columns = ("req/s", "p50 ms", "p95 ms", "p99 ms")
+        self.stdout.write(
+            f"  {'server':<17}" + "".join(f"{c:>9}" for c in columns) + f"{'errors':>8}"
+        )
+        for name, (rps, p50, p95, p99, errors) in results:
+            self.stdout.write(
+                f"  {name:<17}{rps:9.1f}{p50:9.1f}{p95:9.1f}{p99:9.1f}{errors:8d}"
+            )
+
+    # ---------- setup ----------
+    def seed(self, count):
+        user = get_user_model().objects.create_user(
+            username=f"bench-servers-{time.time_ns()}", password=None
+        )
+        accounts = [
+            BankAccount.objects.create(user=user, name=f"Account {i}", balance=0)
+            for i in range(3)
+        ]
+        start = timezone.make_aware(datetime(2024, 1, 1))
+        rows = [
+            {
+                "amount": 10 + i % 90,
+                "date": date(2024, 1, 1) + timedelta(days=i % 365),
+                "time": dt_time(12),
+                "transaction_date_time": start + timedelta(days=i % 365, minutes=i),
+                "transaction_type": "Debit" if i % 4 else "Credit",
+                "bank_account": accounts[i % 3],
+                "write_tags": [f"tag{i % 10}", f"tag{i % 7 + 10}"],
+                "write_items": [{"name": f"item{i % 25}", "amount": 5}],
+            }
+            for i in range(count)
+        ]
+        for offset in range(0, count, BULK_SERVICE.BATCH_SIZE):
+            BULK_SERVICE.create_expenses(
+                user.id, rows[offset : offset + BULK_SERVICE.BATCH_SIZE]
+            )
+        return user
+
+    def paths(self, user):
+        tag_ids = user.tags.values_list("pk", flat=True)[:3]
+        tag_ids = ",".join(str(pk) for pk in tag_ids)
+        account = user.bank_accounts.values_list("pk", flat=True).first()
+        return [
+            "/api/v1/expenses/",
+            "/api/v1/expenses/?pagination=cursor&page_size=50",
+            "/api/v1/expenses/filter_by_month/?month=3&year=2024",
+            f"/api/v1/expenses/filter_by_tags/?tags={tag_ids}&pagination=cursor",
+            "/api/v1/expenses/filter_by_date_range_and_tags/"
+            f"?start_date=2024-02-01&end_date=2024-02-29&bank_account={account}",
+            "/api/v1/tags/",
+            "/api/v1/items/",
+            "/api/v1/bank_accounts/",
+        ]
+
+    def gunicorn_command(self, port, workers):
+        return [
+            sys.executable, "-m", "gunicorn", "pet.wsgi:application",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers),
+            "--timeout", "120", "--log-level", "warning",
+        ]  # fmt: skip
+
+    def uvicorn_command(self, port, workers):
+        return [
+            sys.executable, "-m", "uvicorn", "pet.asgi:application",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--log-level", "warning",
+        ]  # fmt: skip
+
+    def wait_until_ready(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"Server on port {port} exited early.")
+            try:
+                requests.get(f"http://127.0.0.1:{port}/api/v1/", timeout=5)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f"Server on port {port} did not start.")
+
+    # ---------- load ----------
+    def load(self, port, token, paths, options):
+        local = threading.local()
+        headers = {"Authorization": f"Bearer {token}"}
+        base = f"http://127.0.0.1:{port}"
+
+        def one(n):
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+            started = time.perf_counter()
+            response = session.get(base + paths[n % len(paths)], headers=headers)
+            return time.perf_counter() - started, response.status_code != 200
+
+        # warm-up pass: connections, caches, worker imports
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            list(pool.map(one, range(len(paths) * 2)))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            samples = list(pool.map(one, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(seconds * 1000 for seconds, _ in samples)
+        errors = sum(failed for _, failed in samples)
+        quantiles = statistics.quantiles(latencies, n=100)
+        return (
+            len(samples) / elapsed,
+            quantiles[49],
+            quantiles[94],
+            quantiles[98],
+            errors,
+        )
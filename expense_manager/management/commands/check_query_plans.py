@@ -0,0 +1,207 @@
+import re
+from urllib.parse import parse_qs, urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from expense_manager.models import Expense, ExpenseItem
+from expense_manager.views import EXPENSE_VIEW
+from utils.pagination import KeysetPagination
+
+# Tables that grow with a user's history; a seq scan on any of them is a regression
+WATCHED_TABLES = [
+    Expense._meta.db_table,
+    Expense.tags.through._meta.db_table,
+    ExpenseItem._meta.db_table,
+]
+
+ROWS_REMOVED = re.compile(r"Rows Removed by (?:Filter|Index Recheck): (\d+)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Run every ExpenseViewSet read endpoint, EXPLAIN ANALYZE the SQL it "
+        "issues and fail if any expense table is read with a sequential scan, "
+        "or a plan node discards more rows than --max-rows-removed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="User id to run the endpoints as (default: user with most expenses).",
+        )
+        parser.add_argument(
+            "--max-rows-removed",
+            type=int,
+            default=1000,
+            help=(
+                "Most rows a plan node may read and discard (default 1000): an "
+                "index scan that filters away a user's history is no range."
+            ),
+        )
+        parser.add_argument(
+            "--no-seqscan",
+            action="store_true",
+            help=(
+                "Disable seq scans to prove an index path exists on small seeded "
+                "tables, where the planner rightly prefers a seq scan. Off by "
+                "default: the check is of the plans production gets."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plan checks require PostgreSQL.")
+
+        user = self.get_user(options["user"])
+        failures = []
+        for name, action, params, kwargs in self.get_endpoints(user):
+            queries = self.capture(user, action, params, kwargs)
+            for sql in queries:
+                if not any(table in sql for table in WATCHED_TABLES):
+                    continue
+                plan = self.explain(sql, options["no_seqscan"])
+                problems = [
+                    line.strip()
+                    for line in plan
+                    if "Seq Scan on" in line
+                    and any(table in line for table in WATCHED_TABLES)
+                ]
+                problems += [
+                    line.strip()
+                    for line in plan
+                    if (match := ROWS_REMOVED.search(line))
+                    and int(match[1]) > options["max_rows_removed"]
+                ]
+                if problems:
+                    failures.append((name, sql, problems))
+            self.stdout.write(f"checked {name} ({len(queries)} queries)")
+
+        for name, sql, problems in failures:
+            self.stderr.write(f"\n{name}:\n  {sql}\n  " + "\n  ".join(problems))
+        if failures:
+            raise CommandError(
+                f"{len(failures)} queries fell back to a seq scan or filtered "
+                "instead of using an index range."
+            )
+        self.stdout.write(
+            self.style.SUCCESS("Expense tables are read with index ranges only.")
+        )
+
+    def get_user(self, user_id):
+        User = get_user_model()
+        if user_id is not None:
+            try:
+                return User.objects.get(pk=user_id)
+            except User.DoesNotExist:
+                raise CommandError(f"User {user_id} does not exist.")
+        user = (
+            User.objects.annotate(n=Count("expenses"))
+            .filter(n__gt=0)
+            .order_by("-n")
+            .first()
+        )
+        if user is None:
+            raise CommandError("No expenses found; seed the database first.")
+        return user
+
+    def get_endpoints(self, user):
+        expenses = Expense.objects.filter(user=user)
+        expense = expenses.order_by("-transaction_date_time").first()
+        tag_id = (
+            Expense.tags.through.objects.filter(expense__user=user)
+            .values_list("tag_id", flat=True)
+            .first()
+        )
+        item_id = (
+            ExpenseItem.objects.filter(expense__user=user)
+            .values_list("item_id", flat=True)
+            .first()
+        )
+        day = expense.date.isoformat()
+        endpoints = [
+            ("list", "list", {}, {}),
+            ("list (cursor)", "list", {"pagination": "cursor"}, {}),
+            (
+                # the first page proves little: deep in the history is where
+                # a cursor filter that is no index range reads everything
+                "list (deep cursor)",
+                "list",
+                {"pagination": "cursor", "cursor": self.deep_cursor(expenses)},
+                {},
+            ),
+            ("retrieve", "retrieve", {}, {"pk": expense.pk}),
+            (
+                "filter_by_month",
+                "filter_by_month",
+                {"month": expense.date.month, "year": expense.date.year},
+                {},
+            ),
+            (
+                "filter_by_date_range_and_tags (dates)",
+                "filter_by_date_range_and_tags",
+                {"start_date": day, "end_date": day},
+                {},
+            ),
+            (
+                "filter_by_date_range_and_tags (bank_account)",
+                "filter_by_date_range_and_tags",
+                {"bank_account": expense.bank_account_id},
+                {},
+            ),
+        ]
+        if tag_id is not None:
+            endpoints += [
+                ("filter_by_tags", "filter_by_tags", {"tags": tag_id}, {}),
+                (
+                    "filter_by_date_range_and_tags (tags)",
+                    "filter_by_date_range_and_tags",
+                    {"tags": tag_id},
+                    {},
+                ),
+            ]
+        if item_id is not None:
+            endpoints.append(
+                (
+                    "filter_by_date_range_and_tags (items)",
+                    "filter_by_date_range_and_tags",
+                    {"items": item_id},
+                    {},
+                )
+            )
+        return endpoints
+
+    def deep_cursor(self, expenses):
+        """A next-page cursor nine tenths of the way through ``expenses``."""
+        position = expenses.order_by(
+            "-transaction_date_time", "-id"
+        ).values_list("transaction_date_time", "id")[expenses.count() * 9 // 10]
+        paginator = KeysetPagination()
+        paginator.base_url = "/"
+        link = paginator.encode_cursor(False, position)
+        return parse_qs(urlsplit(link).query)[paginator.cursor_query_param][0]
+
+    def capture(self, user, action, params, kwargs):
+        view = EXPENSE_VIEW.ExpenseViewSet.as_view({"get": action})
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = view(request, **kwargs)
+        if response.status_code != 200:
+            raise CommandError(f"{action} returned {response.status_code}.")
+        return [q["sql"] for q in ctx.captured_queries]
+
+    def explain(self, sql, no_seqscan):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if no_seqscan:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            # ANALYZE runs the query: the rows a node discards only show then
+            cursor.execute("EXPLAIN ANALYZE " + sql)
+            rows = [row[0] for row in cursor.fetchall()]
+            transaction.set_rollback(True)
+            return rows
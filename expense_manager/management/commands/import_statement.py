@@ -0,0 +1,85 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from expense_manager.models import BankAccount
+from expense_manager.serializers import STATEMENT_IMPORT_SERIALIZER
+from expense_manager.services import STATEMENT_SERVICE
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a CSV bank statement into a bank account: rows are streamed "
+        "through COPY into a staging table, then inserted as expenses with "
+        "one net balance update. Rows matching a stored expense are skipped; "
+        "rejected rows are listed by line number."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with a header row.")
+        parser.add_argument("--account", type=int, required=True)
+        for field in (
+            "amount",
+            "date",
+            "time",
+            "transaction_info",
+            "transaction_type",
+            "debit",
+            "credit",
+        ):
+            parser.add_argument(
+                f"--{field.replace('_', '-')}-column",
+                dest=f"{field}_column",
+                help=f"Header of the {field} column.",
+            )
+        for option in (
+            "date_format",
+            "time_format",
+            "delimiter",
+            "timezone",
+            "currency",
+            "encoding",
+        ):
+            parser.add_argument(f"--{option.replace('_', '-')}", dest=option)
+
+    def handle(self, *args, **options):
+        try:
+            account = BankAccount.objects.get(pk=options["account"])
+        except BankAccount.DoesNotExist:
+            raise CommandError(f"Bank account {options['account']} does not exist.")
+
+        # Same validation as the import_statement endpoint
+        fields = STATEMENT_IMPORT_SERIALIZER.StatementImportSerializer().fields
+        data = {name: options[name] for name in fields if options.get(name)}
+        serializer = STATEMENT_IMPORT_SERIALIZER.StatementImportSerializer(data=data)
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors))
+
+        started = time.perf_counter()
+        encoding = serializer.validated_data["encoding"]
+        try:
+            with open(options["path"], encoding=encoding, newline="") as lines:
+                result = STATEMENT_SERVICE.import_statement(
+                    account, lines, serializer.statement_format()
+                )
+        except (OSError, STATEMENT_SERVICE.StatementImportError) as exc:
+            raise CommandError(str(exc))
+        except UnicodeDecodeError as exc:
+            raise CommandError(f"{options['path']} is not {encoding}: {exc}")
+        elapsed = time.perf_counter() - started
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        if result.rejected > len(result.errors):
+            self.stderr.write(
+                f"... and {result.rejected - len(result.errors)} more rejected rows"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.created} of {result.rows} rows into account "
+                f"{account.pk} in {elapsed:.1f}s ({result.skipped} duplicates "
+                f"skipped, {result.rejected} rejected, balance "
+                f"{result.balance_delta:+})."
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from expense_manager.services import IDEMPOTENCY_SERVICE
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete stored Idempotency-Key responses older than "
+        "IDEMPOTENCY_KEY_TTL seconds. Run periodically (e.g. from cron)."
+    )
+
+    def handle(self, *args, **options):
+        deleted = IDEMPOTENCY_SERVICE.prune()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired keys."))
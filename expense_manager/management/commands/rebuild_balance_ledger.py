@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from expense_manager.models import (
+    BalanceCheckpoint,
+    BalanceLedgerEntry,
+    BankAccount,
+    Expense,
+)
+from expense_manager.services import BALANCE_SERVICE
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the balance ledger from the expenses table and drop its "
+        "checkpoints (they refill on demand). Whatever part of the current "
+        "balance the expenses do not explain is booked as an opening "
+        "adjustment at the account's earliest known moment."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild this user id.")
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Check that each account's ledger sums to its balance.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        accounts = BankAccount.objects.order_by("pk")
+        if options["user"] is not None:
+            accounts = accounts.filter(user_id=options["user"])
+
+        if not options["verify_only"]:
+            entries = 0
+            for account_id in accounts.values_list("pk", flat=True):
+                entries += self.rebuild(account_id, options["batch_size"])
+            self.stdout.write(f"Wrote {entries} ledger entries.")
+
+        mismatches = self.verify(accounts)
+        for account_id, balance, ledger in mismatches[:50]:
+            self.stderr.write(
+                f"account {account_id}: balance {balance}, ledger {ledger}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} accounts do not match their ledger.")
+        self.stdout.write(self.style.SUCCESS("Ledger matches balances."))
+
+    def rebuild(self, account_id, batch_size):
+        with transaction.atomic():
+            # Hold the row lock so no expense write lands half-way through
+            account = BankAccount.objects.select_for_update().get(pk=account_id)
+            BalanceLedgerEntry.objects.filter(bank_account_id=account_id).delete()
+            BalanceCheckpoint.objects.filter(bank_account_id=account_id).delete()
+
+            expenses = (
+                Expense.objects.filter(bank_account_id=account_id)
+                .order_by("transaction_date_time", "pk")
+                .values_list(
+                    "pk", "transaction_date_time", "transaction_type", "amount"
+                )
+            )
+            batch, written = [], 0
+            explained, earliest = Decimal("0"), account.created_at
+            for pk, effective_at, transaction_type, amount in expenses.iterator(
+                chunk_size=batch_size
+            ):
+                delta = BALANCE_SERVICE.transaction_delta(transaction_type, amount)
+                if not delta:
+                    continue
+                explained += delta
+                earliest = min(earliest, effective_at)
+                batch.append(
+                    BalanceLedgerEntry(
+                        bank_account_id=account_id,
+                        expense_id=pk,
+                        delta=delta,
+                        effective_at=effective_at,
+                    )
+                )
+                if len(batch) >= batch_size:
+                    written += len(BalanceLedgerEntry.objects.bulk_create(batch))
+                    batch = []
+
+            opening = (account.balance or Decimal("0")) - explained
+            if opening:
+                batch.append(
+                    BalanceLedgerEntry(
+                        bank_account_id=account_id, delta=opening, effective_at=earliest
+                    )
+                )
+            if batch:
+                written += len(BalanceLedgerEntry.objects.bulk_create(batch))
+        return written
+
+    def verify(self, accounts):
+        ledger = dict(
+            BalanceLedgerEntry.objects.filter(bank_account__in=accounts)
+            .values_list("bank_account_id")
+            .annotate(total=Sum("delta"))
+            .order_by()
+        )
+        zero = Decimal("0")
+        return [
+            (account_id, balance, ledger.get(account_id, zero))
+            for account_id, balance in accounts.values_list("pk", "balance")
+            if (balance or zero) != ledger.get(account_id, zero)
+        ]
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from expense_manager.models import Expense, MonthlySpendRollup
+from expense_manager.services import ROLLUP_SERVICE
+
+KEY_FIELDS = [
+    "user_id",
+    "year",
+    "month",
+    "bank_account_id",
+    "tag_id",
+    "transaction_type",
+]
+
+
+class Command(BaseCommand):
+    help = "Rebuild MonthlySpendRollup from the expenses table and verify it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, help="Only rebuild this user id.")
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="Compare the stored rollup with the expenses without writing.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        expenses = Expense.objects.all()
+        rollups = MonthlySpendRollup.objects.all()
+        if options["user"] is not None:
+            expenses = expenses.filter(user_id=options["user"])
+            rollups = rollups.filter(user_id=options["user"])
+
+        if not options["verify_only"]:
+            with transaction.atomic():
+                deleted, _ = rollups.delete()
+                created = self.rebuild(expenses, options["batch_size"])
+            self.stdout.write(f"Replaced {deleted} rollup rows with {created}.")
+
+        mismatches = self.verify(expenses, rollups)
+        for key, expected, stored in mismatches[:50]:
+            self.stderr.write(
+                f"{dict(zip(KEY_FIELDS, key))}: expected {expected}, stored {stored}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} rollup rows do not match.")
+        self.stdout.write(self.style.SUCCESS("Rollup matches expenses."))
+
+    def rebuild(self, expenses, batch_size):
+        batch, created = [], 0
+        for row in ROLLUP_SERVICE.aggregate_rollups(expenses):
+            batch.append(MonthlySpendRollup(**row))
+            if len(batch) >= batch_size:
+                created += len(MonthlySpendRollup.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(MonthlySpendRollup.objects.bulk_create(batch))
+        return created
+
+    def verify(self, expenses, rollups):
+        expected = {
+            tuple(row[f] for f in KEY_FIELDS): (row["total"], row["count"])
+            for row in ROLLUP_SERVICE.aggregate_rollups(expenses)
+        }
+        stored = {
+            tuple(row[f] for f in KEY_FIELDS): (row["total"], row["count"])
+            for row in rollups.values(*KEY_FIELDS, "total", "count")
+        }
+        empty = (Decimal("0"), 0)
+        return [
+            (key, expected.get(key, empty), stored.get(key, empty))
+            for key in expected.keys() | stored.keys()
+            if expected.get(key, empty) != stored.get(key, empty)
+        ]
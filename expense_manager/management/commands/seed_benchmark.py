@@ -0,0 +1,353 @@
+import io
+import math
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from expense_manager.models import (
+    BalanceLedgerEntry,
+    BankAccount,
+    Expense,
+    ExpenseItem,
+    Item,
+    Tag,
+    expense_fingerprint,
+)
+from expense_manager.services import BALANCE_SERVICE
+
+MERCHANTS = [
+    "Swiggy", "Zomato", "Amazon", "Flipkart", "BigBasket", "Uber", "Ola",
+    "Indian Oil", "HP Petrol", "Reliance Fresh", "DMart", "Airtel", "Jio",
+    "BESCOM", "Netflix", "Spotify", "Apollo Pharmacy", "Starbucks", "IRCTC",
+    "MakeMyTrip", "Myntra", "Decathlon", "Croma", "Zerodha", "LIC",
+]  # fmt: skip
+CREDITS = ["Salary", "Refund", "Interest", "Cashback", "Transfer from savings"]
+TAG_WORDS = [
+    "food", "groceries", "travel", "fuel", "rent", "utilities", "shopping",
+    "health", "entertainment", "subscriptions", "education", "gifts",
+    "insurance", "investments", "household", "personal", "work", "kids",
+]  # fmt: skip
+ITEM_WORDS = [
+    "milk", "bread", "rice", "coffee", "petrol", "taxi", "movie", "book",
+    "shirt", "medicine", "vegetables", "fruit", "snacks", "lunch", "dinner",
+    "data pack", "electricity", "water", "gym", "haircut",
+]  # fmt: skip
+
+# share of expenses with 0, 1, 2, 3 tags and with 0..4 items
+TAG_COUNTS = (0.2, 0.5, 0.2, 0.1)
+ITEM_COUNTS = (0.45, 0.3, 0.15, 0.07, 0.03)
+# busier afternoons and evenings
+HOUR_WEIGHTS = [
+    1, 1, 1, 1, 1, 2, 4, 6, 8, 9, 10, 12,
+    14, 12, 10, 10, 11, 12, 14, 15, 13, 9, 5, 2,
+]  # fmt: skip
+
+
+def zipf_weights(n, s):
+    """Cumulative weights of ranks 1..n under Zipf's law with exponent s."""
+    total, cumulative = 0.0, []
+    for rank in range(1, n + 1):
+        total += 1 / rank**s
+        cumulative.append(total)
+    return cumulative
+
+
+def copy_rows(cursor, table, columns, rows):
+    """COPY ``rows`` (tuples; None is NULL) into ``table`` in text format."""
+
+    def text(value):
+        if value is None:
+            return r"\N"
+        value = str(value)
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(map(text, row)) + "\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a production-scale synthetic data set for benchmarks: users "
+        "with bank accounts, tags, items and expenses whose tags, items, "
+        "merchants and per-user volume follow skewed (Zipf) distributions. "
+        "Rows are loaded with COPY; balances, the ledger and the spend "
+        "rollup are filled in to match. Deterministic for a given --seed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument(
+            "--expenses", type=int, default=1_000_000, help="Total, across users."
+        )
+        parser.add_argument("--accounts", type=int, default=3, help="Per user.")
+        parser.add_argument("--tags", type=int, default=150, help="Per user.")
+        parser.add_argument("--items", type=int, default=400, help="Per user.")
+        parser.add_argument("--months", type=int, default=24, help="History length.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="bench-", help="Username prefix.")
+        parser.add_argument("--batch-size", type=int, default=50_000)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete existing users with --prefix (and their data) first.",
+        )
+
+    def handle(self, *args, **options):
+        existing = get_user_model().objects.filter(
+            username__startswith=options["prefix"]
+        )
+        if existing.exists():
+            if not options["clear"]:
+                raise CommandError(
+                    f"Users named {options['prefix']}* exist; pass --clear to "
+                    "replace them or choose another --prefix."
+                )
+            self.clear(existing)
+
+        self.random = random.Random(options["seed"])
+        today = timezone.localdate()
+        self.days = [
+            today - timedelta(days=n)
+            for n in range(round(options["months"] * 30.44), 0, -1)
+        ]
+        self.start = timezone.make_aware(datetime.combine(self.days[0], dt_time()))
+
+        # a few heavy users, a long tail of light ones
+        shares = [1 / rank**0.8 for rank in range(1, options["users"] + 1)]
+        counts = [
+            math.floor(options["expenses"] * share / sum(shares)) for share in shares
+        ]
+        counts[0] += options["expenses"] - sum(counts)
+
+        started = time.perf_counter()
+        for n, count in enumerate(counts):
+            user = self.seed_user(f"{options['prefix']}{n}", count, options)
+            self.stdout.write(
+                f"  {user.username} (id {user.pk}): {count} expenses, "
+                f"{time.perf_counter() - started:.0f}s"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {options['users']} users, {options['expenses']} expenses "
+                f"in {time.perf_counter() - started:.0f}s."
+            )
+        )
+
+    def clear(self, users):
+        user_ids = list(users.values_list("pk", flat=True))
+        with transaction.atomic():
+            # Bottom-up so no cascade has to load millions of rows into memory
+            BalanceLedgerEntry.objects.filter(bank_account__user__in=user_ids).delete()
+            ExpenseItem.objects.filter(expense__user__in=user_ids).delete()
+            Expense.tags.through.objects.filter(expense__user__in=user_ids).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {Expense._meta.db_table} WHERE user_id = ANY(%s)",
+                    [user_ids],
+                )
+            users.delete()
+        self.stdout.write(f"Deleted {len(user_ids)} users.")
+
+    # ---------- one user ----------
+    def seed_user(self, username, count, options):
+        rng = self.random
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username=username, password=None
+            )
+            accounts = BankAccount.objects.bulk_create(
+                [
+                    BankAccount(
+                        user=user,
+                        name=f"Account {i}",
+                        account_number=f"{rng.randrange(10**11, 10**12)}",
+                        ifsc_code=f"BANK0{rng.randrange(10**5, 10**6)}",
+                        balance=0,
+                    )
+                    for i in range(options["accounts"])
+                ]
+            )
+            tags = Tag.objects.bulk_create(
+                [
+                    Tag(user=user, tag_name=self.name(TAG_WORDS, i))
+                    for i in range(options["tags"])
+                ]
+            )
+            # bulk_create skips Item.save(), which lowercases; these already are
+            items = Item.objects.bulk_create(
+                [
+                    Item(user=user, name=self.name(ITEM_WORDS, i))
+                    for i in range(options["items"])
+                ]
+            )
+
+        self.count = count
+        self.tag_weights = zipf_weights(len(tags), 1.1)
+        self.item_weights = zipf_weights(len(items), 1.0)
+        self.merchant_weights = zipf_weights(len(MERCHANTS), 1.2)
+        # a main account and secondary ones
+        self.account_weights = zipf_weights(len(accounts), 1.5)
+
+        deltas = {account.pk: Decimal("0") for account in accounts}
+        for offset in range(0, count, options["batch_size"]):
+            size = min(options["batch_size"], count - offset)
+            with transaction.atomic():
+                self.load_batch(user, accounts, tags, items, offset, size, deltas)
+
+        with transaction.atomic():
+            # Opening balance at the start of the history, then every expense
+            ledger = []
+            for account in accounts:
+                opening = Decimal(rng.randrange(50_000, 500_000))
+                account.balance = opening + deltas[account.pk]
+                ledger.append(
+                    BalanceLedgerEntry(
+                        bank_account=account, delta=opening, effective_at=self.start
+                    )
+                )
+            BalanceLedgerEntry.objects.bulk_create(ledger)
+            BankAccount.objects.bulk_update(accounts, ["balance"])
+            BankAccount.objects.filter(user=user).update(created_at=self.start)
+        call_command("rebuild_spend_rollup", user=user.pk, stdout=io.StringIO())
+        return user
+
+    def name(self, words, i):
+        word = words[i % len(words)]
+        return word if i < len(words) else f"{word} {i // len(words)}"
+
+    def load_batch(self, user, accounts, tags, items, offset, size, deltas):
+        rng = self.random
+        with connection.cursor() as cursor:
+            # identity values up front, so the M2M/item/ledger rows can refer
+            # to them in the same COPY round
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [Expense._meta.db_table, size],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+
+        now = timezone.now()
+        expenses, expense_tags, expense_items, ledger = [], [], [], []
+        for n, expense_id in enumerate(ids):
+            i = offset + n
+            # Days in order across the history, the hour weighted; the
+            # microsecond makes the time, hence the fingerprint, unique
+            day = self.days[i * len(self.days) // self.count]
+            moment = timezone.make_aware(
+                datetime.combine(
+                    day,
+                    dt_time(
+                        rng.choices(range(24), weights=HOUR_WEIGHTS)[0],
+                        rng.randrange(60),
+                        rng.randrange(60),
+                        i % 10**6,
+                    ),
+                )
+            )
+            account = rng.choices(accounts, cum_weights=self.account_weights)[0]
+            if rng.random() < 0.08:
+                transaction_type = "Credit"
+                info = rng.choice(CREDITS)
+                amount = round(Decimal(rng.lognormvariate(9, 1)), 2)
+            else:
+                transaction_type = "Debit"
+                merchant = rng.choices(MERCHANTS, cum_weights=self.merchant_weights)
+                info = f"UPI/{rng.randrange(10**11, 10**12)}/{merchant[0]}"
+                amount = round(Decimal(rng.lognormvariate(6, 1.2)), 2)
+            amount = max(min(amount, Decimal("9999999.99")), Decimal("1.00"))
+            notes = f"note {i}" if rng.random() < 0.1 else ""
+
+            expenses.append(
+                (
+                    expense_id,
+                    user.pk,
+                    account.pk,
+                    amount,
+                    day,
+                    moment.time(),
+                    info,
+                    moment,
+                    notes,
+                    "INR",
+                    now,
+                    now,
+                    transaction_type,
+                    expense_fingerprint(
+                        user.pk, account.pk, amount, moment, info, transaction_type
+                    ),
+                )
+            )
+            tag_count = rng.choices(range(len(TAG_COUNTS)), weights=TAG_COUNTS)[0]
+            tag_ids = {
+                tag.pk
+                for tag in rng.choices(tags, cum_weights=self.tag_weights, k=tag_count)
+            }
+            expense_tags += [(expense_id, tag_id) for tag_id in tag_ids]
+            item_count = rng.choices(range(len(ITEM_COUNTS)), weights=ITEM_COUNTS)[0]
+            item_ids = {
+                item.pk
+                for item in rng.choices(
+                    items, cum_weights=self.item_weights, k=item_count
+                )
+            }
+            # the amount split across the items
+            expense_items += [
+                (expense_id, item_id, round(amount / len(item_ids), 2))
+                for item_id in item_ids
+            ]
+            delta = BALANCE_SERVICE.transaction_delta(transaction_type, amount)
+            deltas[account.pk] += delta
+            ledger.append((account.pk, expense_id, delta, moment, now))
+
+        with connection.cursor() as cursor:
+            copy_rows(
+                cursor,
+                Expense._meta.db_table,
+                [
+                    "id", "user_id", "bank_account_id", "amount", "date", "time",
+                    "transaction_info", "transaction_date_time", "notes",
+                    "currency", "created_at", "updated_at", "transaction_type",
+                    "fingerprint",
+                ],  # fmt: skip
+                expenses,
+            )
+            copy_rows(
+                cursor,
+                Expense.tags.through._meta.db_table,
+                ["expense_id", "tag_id"],
+                expense_tags,
+            )
+            copy_rows(
+                cursor,
+                ExpenseItem._meta.db_table,
+                ["expense_id", "item_id", "amount"],
+                expense_items,
+            )
+            copy_rows(
+                cursor,
+                BalanceLedgerEntry._meta.db_table,
+                [
+                    "bank_account_id",
+                    "expense_id",
+                    "delta",
+                    "effective_at",
+                    "created_at",
+                ],
+                ledger,
+            )
@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from expense_manager.models import BankAccount, Expense
+from expense_manager.services import BALANCE_SERVICE
+from expense_manager.views import EXPENSE_VIEW
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the expense create/update/delete endpoints from parallel "
+        "writers sharing two bank accounts, then check that every balance "
+        "equals the sum of its expenses. Needs PostgreSQL; the throwaway "
+        "user and its data are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=50)
+        parser.add_argument("--operations", type=int, default=20, help="per writer")
+        parser.add_argument("--keep", action="store_true", help="keep the test data")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            raise CommandError("SQLite serialises writers; run against PostgreSQL.")
+
+        user = get_user_model().objects.create_user(
+            username=f"stress-balance-{time.time_ns()}", password=None
+        )
+        accounts = [
+            BankAccount.objects.create(user=user, name=f"Stress {i}", balance=0)
+            for i in range(2)
+        ]
+        self.errors = []
+        self.lock = threading.Lock()
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["writers"]) as pool:
+                futures = [
+                    pool.submit(self.writer, n, user, accounts, options["operations"])
+                    for n in range(options["writers"])
+                ]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - started
+            drift = self.find_drift(accounts)
+        finally:
+            if not options["keep"]:
+                user.delete()
+
+        total = options["writers"] * options["operations"]
+        self.stdout.write(
+            f"{total} operations from {options['writers']} writers in {elapsed:.1f}s, "
+            f"{len(self.errors)} failed requests"
+        )
+        for error in self.errors[:10]:
+            self.stdout.write(f"  {error}")
+        if drift:
+            for account, expected in drift:
+                self.stderr.write(
+                    f"  {account.name}: balance {account.balance}, expected {expected}"
+                )
+            raise CommandError("Balance drift detected.")
+        self.stdout.write(self.style.SUCCESS("All balances match their expenses."))
+
+    def writer(self, n, user, accounts, operations):
+        factory = APIRequestFactory()
+        rng = random.Random(n)
+        mine = []
+        try:
+            for _ in range(operations):
+                if mine and rng.random() < 0.4:
+                    expense_id = rng.choice(mine)
+                    if rng.random() < 0.25:
+                        mine.remove(expense_id)
+                        self.call(factory, user, "delete", expense_id, "destroy")
+                    else:
+                        payload = self.payload(rng, accounts)
+                        self.call(
+                            factory, user, "patch", expense_id, "partial_update", payload
+                        )
+                else:
+                    response = self.call(
+                        factory, user, "post", None, "create", self.payload(rng, accounts)
+                    )
+                    if response.status_code == 201:
+                        mine.append(response.data["id"])
+        finally:
+            connections.close_all()
+
+    def call(self, factory, user, method, pk, view_action, data=None):
+        path = "/api/v1/expenses/" + (f"{pk}/" if pk else "")
+        request = getattr(factory, method)(path, data, format="json")
+        force_authenticate(request, user=user)
+        actions = {method: view_action}
+        response = EXPENSE_VIEW.ExpenseViewSet.as_view(actions)(request, pk=pk)
+        if response.status_code >= 400:
+            with self.lock:
+                self.errors.append(f"{method.upper()} {path}: {response.status_code}")
+        return response
+
+    def payload(self, rng, accounts):
+        return {
+            "amount": str(Decimal(rng.randint(100, 99999)) / 100),
+            "date": "2024-06-01",
+            "time": "12:00:00",
+            "transaction_date_time": "2024-06-01T12:00:00Z",
+            "transaction_type": rng.choice(["Debit", "Credit"]),
+            "bank_account": rng.choice(accounts).id,
+        }
+
+    def find_drift(self, accounts):
+        drift = []
+        for account in accounts:
+            account.refresh_from_db()
+            expected = sum(
+                (
+                    BALANCE_SERVICE.transaction_delta(transaction_type, amount)
+                    for transaction_type, amount in Expense.objects.filter(
+                        bank_account=account
+                    ).values_list("transaction_type", "amount")
+                ),
+                Decimal("0"),
+            )
+            if account.balance != expected:
+                drift.append((account, expected))
+        return drift
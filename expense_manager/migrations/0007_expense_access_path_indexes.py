@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_manager', '0006_item_expenseitem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-transaction_date_time', '-id'], name='expense_user_tdt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'date'], name='expense_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'bank_account', '-transaction_date_time'], name='expense_user_bank_tdt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expenseitem',
+            index=models.Index(fields=['item', 'expense'], name='expenseitem_item_expense_idx'),
+        ),
+        # The auto-created tags through table only has (expense_id, tag_id);
+        # tag filters need the reverse direction.
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS expense_tags_tag_expense_idx ON expense_manager_expense_tags (tag_id, expense_id);',
+            reverse_sql='DROP INDEX IF EXISTS expense_tags_tag_expense_idx;',
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_manager', '0007_expense_access_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySpendRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Year')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Month')),
+                ('transaction_type', models.CharField(blank=True, max_length=10, verbose_name='Transaction Type')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('bank_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spend_rollups', to='expense_manager.bankaccount', verbose_name='Bank Account')),
+                ('tag', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='spend_rollups', to='expense_manager.tag', verbose_name='Tag')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spend_rollups', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Monthly Spend Rollup',
+                'verbose_name_plural': 'Monthly Spend Rollups',
+                'indexes': [models.Index(fields=['user', 'year', 'month'], name='rollup_user_month_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('tag__isnull', True)), fields=('user', 'year', 'month', 'bank_account', 'transaction_type'), name='rollup_unique_all_tags_key'), models.UniqueConstraint(condition=models.Q(('tag__isnull', False)), fields=('user', 'year', 'month', 'bank_account', 'tag', 'transaction_type'), name='rollup_unique_tag_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_manager', '0008_monthlyspendrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Month')),
+                ('balance', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Balance')),
+                ('bank_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='expense_manager.bankaccount', verbose_name='Bank Account')),
+            ],
+            options={
+                'verbose_name': 'Balance Checkpoint',
+                'verbose_name_plural': 'Balance Checkpoints',
+                'constraints': [models.UniqueConstraint(fields=('bank_account', 'month'), name='checkpoint_account_month_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Delta')),
+                ('effective_at', models.DateTimeField(verbose_name='Effective At')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('bank_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='expense_manager.bankaccount', verbose_name='Bank Account')),
+                ('expense', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='expense_manager.expense', verbose_name='Expense')),
+            ],
+            options={
+                'verbose_name': 'Balance Ledger Entry',
+                'verbose_name_plural': 'Balance Ledger Entries',
+                'indexes': [models.Index(fields=['bank_account', 'effective_at'], name='ledger_account_effective_idx')],
+            },
+        ),
+    ]
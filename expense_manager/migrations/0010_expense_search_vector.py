@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:11
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_manager', '0009_balance_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('transaction_info', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('notes', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='expense_search_idx'),
+        ),
+    ]
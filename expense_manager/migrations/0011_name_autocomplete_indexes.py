@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:19
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGinExtension, TrigramExtension
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_manager', '0010_expense_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # gin_trgm_ops for the names, btree_gin for user_id in the same index
+        TrigramExtension(),
+        BtreeGinExtension(),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='item_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=django.contrib.postgres.indexes.GinIndex(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='item_name_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('tag_name'), name='text_pattern_ops'), name='tag_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(models.F('user'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('tag_name'), name='gin_trgm_ops'), name='tag_name_trgm_idx'),
+        ),
+    ]
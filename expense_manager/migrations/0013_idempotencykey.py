@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:45
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_manager', '0012_expense_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('pk', models.CompositePrimaryKey('user', 'key', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=255, verbose_name='Key')),
+                ('request_hash', models.CharField(max_length=32, verbose_name='Request Hash')),
+                ('status', models.PositiveSmallIntegerField(null=True, verbose_name='Status')),
+                ('response', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Response')),
+                ('created_at', models.DateTimeField(verbose_name='Created At')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Idempotency Key',
+                'verbose_name_plural': 'Idempotency Keys',
+                'indexes': [models.Index(fields=['created_at'], name='idempotency_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_manager', '0013_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='response',
+            field=models.TextField(null=True, verbose_name='Response'),
+        ),
+    ]
@@ -1,5 +1,57 @@
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.conf import settings
+from django.utils import timezone
+
+# Text search configuration of Expense.search_vector; queries against the
+# column must use the same one for the GIN index to apply
+SEARCH_CONFIG = "english"
+
+# Unique (partial) constraint on Expense.fingerprint
+FINGERPRINT_CONSTRAINT = "expense_fingerprint_key"
+# Expense attnames expense_fingerprint() is computed from, in its order
+FINGERPRINT_FIELDS = (
+    "user_id",
+    "bank_account_id",
+    "amount",
+    "transaction_date_time",
+    "transaction_info",
+    "transaction_type",
+)
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def expense_fingerprint(
+    user_id,
+    bank_account_id,
+    amount,
+    transaction_date_time,
+    transaction_info,
+    transaction_type,
+):
+    """
+    Content hash identifying an expense for deduplication: the same
+    account, amount and type at the same instant with the same narration
+    (case and whitespace folded) is the same transaction.
+    """
+    key = "\x1f".join(
+        (
+            str(user_id),
+            str(bank_account_id),
+            f"{Decimal(amount):.2f}",
+            str((transaction_date_time - _EPOCH) // _MICROSECOND),
+            " ".join(transaction_info.split()).casefold(),
+            transaction_type,
+        )
+    )
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
 
 
 class Tag(models.Model):
@@ -16,6 +68,20 @@ class Tag(models.Model):
         verbose_name_plural = "Tags"
         ordering = ["tag_name"]
         unique_together = ["user", "tag_name"]  # Unique tag name per user
+        indexes = [
+            # autocomplete within one user's tags: prefix range scan ...
+            models.Index(
+                "user",
+                OpClass(Upper("tag_name"), name="text_pattern_ops"),
+                name="tag_name_prefix_idx",
+            ),
+            # ... and fuzzy (trigram) match
+            GinIndex(
+                "user",
+                OpClass(Upper("tag_name"), name="gin_trgm_ops"),
+                name="tag_name_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.tag_name
@@ -64,6 +130,20 @@ class Item(models.Model):
         verbose_name_plural = "Items"
         ordering = ["name"]
         unique_together = ["user", "name"]
+        indexes = [
+            # autocomplete within one user's items: prefix range scan ...
+            models.Index(
+                "user",
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="item_name_prefix_idx",
+            ),
+            # ... and fuzzy (trigram) match
+            GinIndex(
+                "user",
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="item_name_trgm_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         # Always store name in lowercase
@@ -104,11 +184,95 @@ class Expense(models.Model):
     transaction_type = models.CharField(
         max_length=10, blank=True, verbose_name="Transaction Type"
     )
+    # Kept up to date by PostgreSQL on every INSERT/UPDATE (STORED column);
+    # transaction_info ranks above notes
+    search_vector = models.GeneratedField(
+        expression=SearchVector("transaction_info", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("notes", weight="B", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        editable=False,
+    )
+    # expense_fingerprint() of the row; NULL only for rows that predate it
+    # (see backfill_expense_fingerprints) or duplicate an older expense
+    fingerprint = models.CharField(
+        max_length=32, null=True, blank=True, editable=False, verbose_name="Fingerprint"
+    )
 
     class Meta:
         ordering = ["-transaction_date_time"]
         verbose_name = "Expense"
         verbose_name_plural = "Expenses"
+        indexes = [
+            # list / keyset pagination: WHERE user ORDER BY tdt DESC, id DESC
+            models.Index(
+                fields=["user", "-transaction_date_time", "-id"],
+                name="expense_user_tdt_idx",
+            ),
+            # filter_by_month / date range filters
+            models.Index(fields=["user", "date"], name="expense_user_date_idx"),
+            # bank_account filter, already in display order
+            models.Index(
+                fields=["user", "bank_account", "-transaction_date_time"],
+                name="expense_user_bank_tdt_idx",
+            ),
+            # search action: search_vector @@ query
+            GinIndex(fields=["search_vector"], name="expense_search_idx"),
+        ]
+        constraints = [
+            # target of INSERT ... ON CONFLICT DO NOTHING on the create paths
+            models.UniqueConstraint(
+                fields=["fingerprint"],
+                condition=models.Q(fingerprint__isnull=False),
+                name=FINGERPRINT_CONSTRAINT,
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields() & set(FINGERPRINT_FIELDS):
+            # as loaded, see update_fingerprint()
+            instance._fingerprinted = instance.fingerprint_values()
+        return instance
+
+    def fingerprint_values(self):
+        """
+        The fingerprinted values as they will be stored: converted by each
+        field's to_python() (create() accepts "12.5" or an ISO string too),
+        naive datetimes taken in the default time zone, as saving does.
+        """
+        values = []
+        for attname in FINGERPRINT_FIELDS:
+            value = self._meta.get_field(attname).to_python(getattr(self, attname))
+            if isinstance(value, datetime) and timezone.is_naive(value):
+                value = timezone.make_aware(value, timezone.get_default_timezone())
+            values.append(value)
+        return tuple(values)
+
+    def compute_fingerprint(self):
+        return expense_fingerprint(*self.fingerprint_values())
+
+    def update_fingerprint(self):
+        """
+        Recompute the fingerprint of a new expense, or of a stored one whose
+        fingerprinted fields changed since it was loaded; returns whether
+        it was recomputed. Other edits keep the stored value, NULL included:
+        a duplicate that predates the constraint (see
+        backfill_expense_fingerprints) stays editable.
+        """
+        values = self.fingerprint_values()
+        if not self._state.adding and values == getattr(self, "_fingerprinted", None):
+            return False
+        # a missing value is left for the database to refuse
+        self.fingerprint = None if None in values else expense_fingerprint(*values)
+        self._fingerprinted = values
+        return True
+
+    def save(self, *args, **kwargs):
+        # Bulk paths, which skip save(), set it themselves (see BULK_SERVICE)
+        self.update_fingerprint()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} - {self.amount} {self.currency} on {self.date}"
@@ -132,6 +296,186 @@ class ExpenseItem(models.Model):
     class Meta:
         verbose_name = "Expense Item"
         verbose_name_plural = "Expense Items"
+        indexes = [
+            # items filter: item -> expenses without touching the heap
+            models.Index(fields=["item", "expense"], name="expenseitem_item_expense_idx"),
+        ]
 
     def __str__(self):
         return f"{self.expense.id} - {self.item.name} - {self.amount}"
+
+
+class MonthlySpendRollup(models.Model):
+    """
+    Running sum/count of expenses per (user, year, month, bank account,
+    tag, transaction type), maintained by the expense write paths.
+
+    The row with tag=NULL holds the total across all of the month's
+    expenses; tagged rows hold per-tag totals, so an expense with two tags
+    is counted in both of them (and once in the NULL row).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="spend_rollups",
+        verbose_name="User",
+    )
+    year = models.PositiveSmallIntegerField(verbose_name="Year")
+    month = models.PositiveSmallIntegerField(verbose_name="Month")
+    bank_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.CASCADE,
+        related_name="spend_rollups",
+        verbose_name="Bank Account",
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="spend_rollups",
+        verbose_name="Tag",
+    )
+    transaction_type = models.CharField(
+        max_length=10, blank=True, verbose_name="Transaction Type"
+    )
+    total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Total"
+    )
+    count = models.IntegerField(default=0, verbose_name="Count")
+
+    class Meta:
+        verbose_name = "Monthly Spend Rollup"
+        verbose_name_plural = "Monthly Spend Rollups"
+        indexes = [
+            models.Index(fields=["user", "year", "month"], name="rollup_user_month_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "year", "month", "bank_account", "transaction_type"],
+                condition=models.Q(tag__isnull=True),
+                name="rollup_unique_all_tags_key",
+            ),
+            models.UniqueConstraint(
+                fields=[
+                    "user",
+                    "year",
+                    "month",
+                    "bank_account",
+                    "tag",
+                    "transaction_type",
+                ],
+                condition=models.Q(tag__isnull=False),
+                name="rollup_unique_tag_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.year}-{self.month:02d} {self.transaction_type}: {self.total}"
+
+
+class BalanceLedgerEntry(models.Model):
+    """
+    One signed change to a bank account balance, dated when it takes effect:
+    an expense's transaction time, or the time of a manual balance edit.
+    The balance at any moment is the sum of the entries up to it.
+    """
+
+    bank_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.CASCADE,
+        related_name="ledger_entries",
+        verbose_name="Bank Account",
+    )
+    expense = models.ForeignKey(
+        Expense,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+        verbose_name="Expense",
+    )
+    delta = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="Delta")
+    effective_at = models.DateTimeField(verbose_name="Effective At")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    class Meta:
+        verbose_name = "Balance Ledger Entry"
+        verbose_name_plural = "Balance Ledger Entries"
+        indexes = [
+            # range sums between a checkpoint and the requested time
+            models.Index(
+                fields=["bank_account", "effective_at"],
+                name="ledger_account_effective_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.bank_account_id} {self.effective_at:%Y-%m-%d}: {self.delta}"
+
+
+class BalanceCheckpoint(models.Model):
+    """
+    Balance of an account at the start of a month (UTC), i.e. the sum of
+    every ledger entry effective before ``month``. Filled lazily by balance
+    queries and shifted in place when a backdated entry is recorded.
+    """
+
+    bank_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.CASCADE,
+        related_name="balance_checkpoints",
+        verbose_name="Bank Account",
+    )
+    month = models.DateField(verbose_name="Month")
+    balance = models.DecimalField(
+        max_digits=14, decimal_places=3, verbose_name="Balance"
+    )
+
+    class Meta:
+        verbose_name = "Balance Checkpoint"
+        verbose_name_plural = "Balance Checkpoints"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bank_account", "month"], name="checkpoint_account_month_key"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.bank_account_id} {self.month:%Y-%m}: {self.balance}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Outcome of a write sent with an Idempotency-Key header, replayed to
+    retries of the same request until it is IDEMPOTENCY_KEY_TTL old.
+    status/response are NULL only while the first request is running.
+    """
+
+    pk = models.CompositePrimaryKey("user", "key")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+        verbose_name="User",
+    )
+    key = models.CharField(max_length=255, verbose_name="Key")
+    # tells a retry apart from a different request reusing the key
+    request_hash = models.CharField(max_length=32, verbose_name="Request Hash")
+    status = models.PositiveSmallIntegerField(null=True, verbose_name="Status")
+    # JSON text, not jsonb: jsonb reorders keys, and a replay must render
+    # byte for byte as the original response did
+    response = models.TextField(null=True, verbose_name="Response")
+    created_at = models.DateTimeField(verbose_name="Created At")
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        indexes = [
+            # pruning: DELETE ... WHERE created_at < cutoff
+            models.Index(fields=["created_at"], name="idempotency_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.key}: {self.status}"
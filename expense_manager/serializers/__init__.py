@@ -2,3 +2,4 @@ from . import expense as EXPENSE_SERIALIZER
 from . import tag as TAG_SERIALIZER
 from . import bank_account as BANK_ACCOUNT_SERIALIZER
 from . import item as ITEM_SERIALIZER
+from . import statement_import as STATEMENT_IMPORT_SERIALIZER
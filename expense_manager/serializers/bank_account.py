@@ -1,4 +1,9 @@
+from decimal import Decimal
+
+from django.db import transaction
+
 from expense_manager.models import BankAccount
+from expense_manager.services import LEDGER_SERVICE
 from utils.common_serializer import DynamicFieldsModelSerializer
 
 
@@ -16,3 +21,36 @@ class BankAccountSerializer(DynamicFieldsModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "user", "created_at", "updated_at"]
+
+    @transaction.atomic
+    def create(self, validated_data):
+        account = super().create(validated_data)
+        # Opening balance goes into the ledger so history starts from it
+        if account.balance:
+            LEDGER_SERVICE.record_adjustment(
+                account.pk, account.balance, account.created_at
+            )
+        return account
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        if "balance" in validated_data:
+            # Manual correction: lock the row and book the difference from the
+            # committed balance as a ledger adjustment
+            current = (
+                BankAccount.objects.select_for_update()
+                .values_list("balance", flat=True)
+                .get(pk=instance.pk)
+            )
+            delta = (validated_data["balance"] or Decimal("0")) - (
+                current or Decimal("0")
+            )
+            LEDGER_SERVICE.record_adjustment(instance.pk, delta)
+
+        # Write only the submitted columns: a full-row save would put back the
+        # balance read at the start of the request and undo any expense
+        # adjustment committed in between
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        return instance
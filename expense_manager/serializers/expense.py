@@ -1,9 +1,61 @@
+from datetime import date, time as dt_time
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import F, Func, JSONField, OuterRef, Prefetch, TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
 from rest_framework import serializers
-from expense_manager.models import Expense, Tag, Item, ExpenseItem
+from expense_manager.models import BankAccount, Expense, ExpenseItem, Tag
+from expense_manager.services import BULK_SERVICE, EXPORT_SERVICE
 from utils.common_serializer import DynamicFieldsModelSerializer
 
 
+class UserBankAccountField(serializers.PrimaryKeyRelatedField):
+    """
+    bank_account restricted to the requesting user's accounts. The accounts
+    are loaded once per request and shared by every row of a many=True
+    payload instead of one lookup per row.
+    """
+
+    cache_key = "_user_bank_accounts"
+
+    def get_queryset(self):
+        request = self.context.get("request")
+        queryset = BankAccount.objects.all()
+        if request is not None:
+            queryset = queryset.filter(user_id=request.user.id)
+        return queryset
+
+    def to_internal_value(self, data):
+        accounts = self.context.get(self.cache_key)
+        if accounts is None:
+            accounts = {account.pk: account for account in self.get_queryset()}
+            self.context[self.cache_key] = accounts
+        try:
+            return accounts[int(data)]
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class ExpenseListSerializer(serializers.ListSerializer):
+    """
+    Validates a bulk update in one pass: the child serializer is built once
+    and bound to the matching instance (by "id") for each entry.
+    """
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            if not hasattr(self, "_instances_by_id"):
+                self._instances_by_id = {obj.id: obj for obj in self.instance}
+            self.child.instance = self._instances_by_id.get(data.get("id"))
+        return super().run_child_validation(data)
+
+
 class ExpenseSerializer(DynamicFieldsModelSerializer):
+    bank_account = UserBankAccountField()
+
     # READ: show tags as list of tag IDs
     tags = serializers.SerializerMethodField(read_only=True)
 
@@ -41,54 +93,65 @@ class ExpenseSerializer(DynamicFieldsModelSerializer):
             "bank_account",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
+        list_serializer_class = ExpenseListSerializer
+
+    # IsOwner and keyset pagination read these whatever ?fields= asks for
+    sparse_required = ("user", "transaction_date_time")
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        Prefetch tags and items (with their Item, in insertion order) for the
+        whole result set so get_tags/get_items don't query once per row.
+        With ``fields`` (see
+        sparse_fields()) only their columns and prefetches are loaded.
+        """
+        lookups = ["tags", "items"]
+        if fields is not None:
+            queryset = queryset.only(*cls.sparse_columns(fields))
+            lookups = [name for name in lookups if name in fields]
+        if "tags" in lookups:
+            queryset = queryset.prefetch_related("tags")
+        if "items" in lookups:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "expense_items",
+                    queryset=ExpenseItem.objects.select_related("item").order_by("pk"),
+                )
+            )
+        return queryset
 
     # ---------- helpers ----------
     def _get_or_create_tags(self, tag_names, user):
-        if not tag_names:
+        norm = BULK_SERVICE.clean_tag_names(tag_names)
+        if not norm:
             return []
-        norm = []
-        seen = set()
-        for name in tag_names:
-            n = name.strip()
-            if n and n not in seen:
-                seen.add(n)
-                norm.append(n)
-        existing = {
-            t.tag_name: t for t in Tag.objects.filter(tag_name__in=norm, user=user)
-        }
-        return [
-            existing.get(n) or Tag.objects.create(tag_name=n, user=user) for n in norm
-        ]
+        existing = BULK_SERVICE.resolve_tags(norm, user.id)
+        return [existing[n] for n in norm]
 
     def _get_or_create_items(self, items_data, user):
         """
         items_data: list of {name, amount} dicts
         Returns list of (Item, amount) tuples
         """
-        if not items_data:
+        pairs = BULK_SERVICE.clean_items(items_data)
+        if not pairs:
             return []
-
-        result = []
-        for item_dict in items_data:
-            name = item_dict.get("name", "").strip().lower()
-            amount = item_dict.get("amount")
-
-            if not name or amount is None:
-                continue
-
-            item, _ = Item.objects.get_or_create(user=user, name=name)
-            result.append((item, amount))
-
-        return result
+        existing = BULK_SERVICE.resolve_items([name for name, _ in pairs], user.id)
+        return [(existing[name], amount) for name, amount in pairs]
 
     # ---------- representation ----------
     def get_tags(self, obj):
-        # ensure we iterate a queryset, not the manager
-        return list(obj.tags.all().values_list("id", flat=True))
+        # .all() is served from the prefetch cache when setup_eager_loading ran
+        return [tag.id for tag in obj.tags.all()]
 
     def get_items(self, obj):
         # Return list of {item_id, name, amount} for all ExpenseItems
-        expense_items = obj.expense_items.select_related("item").all()
+        prefetched = getattr(obj, "_prefetched_objects_cache", {})
+        expense_items = prefetched.get("expense_items")
+        if expense_items is None:
+            # freshly written instance: one joined query instead of one per item
+            expense_items = obj.expense_items.select_related("item").order_by("pk")
         return [
             {"item_id": ei.item.id, "name": ei.item.name, "amount": str(ei.amount)}
             for ei in expense_items
@@ -110,8 +173,10 @@ class ExpenseSerializer(DynamicFieldsModelSerializer):
         if items_data:
             user = expense.user
             item_tuples = self._get_or_create_items(items_data, user)
-            for item, amount in item_tuples:
-                ExpenseItem.objects.create(expense=expense, item=item, amount=amount)
+            ExpenseItem.objects.bulk_create(
+                ExpenseItem(expense=expense, item=item, amount=amount)
+                for item, amount in item_tuples
+            )
 
         return expense
 
@@ -134,10 +199,111 @@ class ExpenseSerializer(DynamicFieldsModelSerializer):
             user = instance.user
             # Delete all existing ExpenseItems
             instance.expense_items.all().delete()
+            # and drop any stale prefetched copy so the response re-reads them
+            getattr(instance, "_prefetched_objects_cache", {}).pop(
+                "expense_items", None
+            )
 
             # Create new ExpenseItems
             item_tuples = self._get_or_create_items(items_data, user)
-            for item, amount in item_tuples:
-                ExpenseItem.objects.create(expense=instance, item=item, amount=amount)
+            ExpenseItem.objects.bulk_create(
+                ExpenseItem(expense=instance, item=item, amount=amount)
+                for item, amount in item_tuples
+            )
 
         return instance
+
+
+def _item_dicts(rows):
+    return [
+        {"item_id": item_id, "name": name, "amount": amount}
+        for item_id, name, amount in rows
+    ]
+
+
+class ExpenseRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only ExpenseSerializer output for list responses, built from the
+    values() rows setup_eager_loading() selects. Tags and items arrive
+    aggregated per row from SQL, so there are no model instances, prefetch
+    queries or per-field to_representation() calls. Keys, order and
+    formatting are ExpenseSerializer's, ?fields= included.
+    """
+
+    # ExpenseSerializer's readable fields in order: (values() key, formatter
+    # or the name of a method)
+    layout = {
+        "id": ("id", None),
+        "amount": ("amount", "{:f}".format),
+        "date": ("date", date.isoformat),
+        "time": ("time", dt_time.isoformat),
+        "transaction_info": ("transaction_info", None),
+        "transaction_date_time": ("transaction_date_time", "format_datetime"),
+        "notes": ("notes", None),
+        "currency": ("currency", None),
+        "tags": ("tag_ids", None),
+        "items": ("item_rows", _item_dicts),
+        "created_at": ("created_at", "format_datetime"),
+        "updated_at": ("updated_at", "format_datetime"),
+        "transaction_type": ("transaction_type", None),
+        "bank_account": ("bank_account_id", None),
+    }
+    # a row's cursor position (KeysetPagination), selected whatever ?fields= is
+    position = ("id", "transaction_date_time")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        names = list(self.layout)
+        request = self.context.get("request")
+        if request is not None and request.query_params.get("fields"):
+            # the readable fields ExpenseSerializer keeps
+            fields = ExpenseSerializer(context=self.context).fields
+            names = [name for name, field in fields.items() if not field.write_only]
+        self.representation = []
+        for name in names:
+            key, format = self.layout[name]
+            if isinstance(format, str):
+                format = getattr(self, format)
+            self.representation.append((name, key, format))
+        # looked up once: per value it costs more than the formatting
+        self.timezone = timezone.get_current_timezone()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        values() rows with the columns ``fields`` (None: all) are rendered
+        from. Tags come as ids ordered like Tag (by name), items as
+        [item_id, name, amount] arrays ordered by id, each from one
+        correlated subquery and only when asked for. Subqueries rather than
+        JOIN + GROUP BY so later filters on tags or items can't change the
+        aggregates.
+        """
+        names = [name for name in cls.layout if fields is None or name in fields]
+        columns = {*cls.position}
+        subqueries = {}
+        if "tags" in names:
+            names.remove("tags")
+            tags = Tag.objects.filter(expenses=OuterRef("pk")).order_by("tag_name")
+            subqueries["tag_ids"] = ArraySubquery(tags.values("id"))
+        if "items" in names:
+            names.remove("items")
+            items = ExpenseItem.objects.filter(expense=OuterRef("pk")).order_by("pk")
+            item = Func(
+                F("item_id"),
+                F("item__name"),
+                Cast("amount", TextField()),
+                function="JSONB_BUILD_ARRAY",
+                output_field=JSONField(),
+            )
+            subqueries["item_rows"] = ArraySubquery(items.values(row=item))
+        columns.update(cls.layout[name][0] for name in names)
+        return queryset.values(*columns, **subqueries)
+
+    def format_datetime(self, value):
+        return EXPORT_SERVICE.format_datetime(value, self.timezone)
+
+    def to_representation(self, row):
+        return {
+            name: row[key] if format is None else format(row[key])
+            for name, key, format in self.representation
+        }
@@ -0,0 +1,67 @@
+import codecs
+import zoneinfo
+
+from rest_framework import serializers
+
+from expense_manager.services import STATEMENT_SERVICE
+
+
+class StatementImportSerializer(serializers.Serializer):
+    """
+    Options of a CSV statement import; see STATEMENT_SERVICE.StatementFormat.
+    ``*_column`` values are the CSV headers of the matching fields.
+    """
+
+    file = serializers.FileField(required=False)
+    amount_column = serializers.CharField(required=False)
+    date_column = serializers.CharField(required=False)
+    time_column = serializers.CharField(required=False)
+    transaction_info_column = serializers.CharField(required=False)
+    transaction_type_column = serializers.CharField(required=False)
+    debit_column = serializers.CharField(required=False)
+    credit_column = serializers.CharField(required=False)
+    date_format = serializers.CharField(default="%Y-%m-%d")
+    time_format = serializers.CharField(default="%H:%M:%S")
+    delimiter = serializers.CharField(
+        default=",", min_length=1, max_length=1, trim_whitespace=False
+    )
+    timezone = serializers.CharField(required=False)
+    currency = serializers.CharField(default="INR", max_length=10)
+    encoding = serializers.CharField(default="utf-8-sig")
+
+    def validate_timezone(self, value):
+        try:
+            return zoneinfo.ZoneInfo(value)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError(f"Unknown time zone {value!r}.")
+
+    def validate_encoding(self, value):
+        try:
+            codecs.lookup(value)
+        except LookupError:
+            raise serializers.ValidationError(f"Unknown encoding {value!r}.")
+        return value
+
+    def validate(self, attrs):
+        if bool(attrs.get("debit_column")) != bool(attrs.get("credit_column")):
+            raise serializers.ValidationError(
+                "debit_column and credit_column go together."
+            )
+        return attrs
+
+    def statement_format(self):
+        data = self.validated_data
+        return STATEMENT_SERVICE.StatementFormat(
+            amount=data.get("amount_column"),
+            date=data.get("date_column"),
+            time=data.get("time_column"),
+            transaction_info=data.get("transaction_info_column"),
+            transaction_type=data.get("transaction_type_column"),
+            debit=data.get("debit_column"),
+            credit=data.get("credit_column"),
+            date_format=data["date_format"],
+            time_format=data["time_format"],
+            delimiter=data["delimiter"],
+            tz=data.get("timezone"),
+            currency=data["currency"],
+        )
@@ -0,0 +1,8 @@
+from . import rollup as ROLLUP_SERVICE
+from . import export as EXPORT_SERVICE
+from . import balance as BALANCE_SERVICE
+from . import bulk as BULK_SERVICE
+from . import ledger as LEDGER_SERVICE
+from . import autocomplete as AUTOCOMPLETE_SERVICE
+from . import statement as STATEMENT_SERVICE
+from . import idempotency as IDEMPOTENCY_SERVICE
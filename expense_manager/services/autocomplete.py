@@ -0,0 +1,89 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Upper
+from rest_framework.exceptions import ParseError
+
+from expense_manager.models import Expense, ExpenseItem
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# Shorter terms are too short to share trigrams with a typo: prefix only
+MIN_FUZZY_LENGTH = 3
+
+
+def parse_params(params):
+    """(term, limit) from ?q=&limit=; invalid values raise ParseError."""
+    term = params.get("q", "").strip()
+    if not term:
+        raise ParseError("q parameter is required.")
+    try:
+        limit = int(params.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ParseError("limit must be an integer.")
+    if limit <= 0:
+        raise ParseError("limit must be positive.")
+    return term, min(limit, MAX_LIMIT)
+
+
+def payload(term, rows, serializer_data):
+    """Response body: serialized rows plus their usage count and similarity."""
+    results = []
+    for row, data in zip(rows, serializer_data):
+        results.append(
+            {**data, "uses": row.uses, "similarity": round(row.similarity, 4)}
+        )
+    return {"q": term, "results": results}
+
+
+def usage_count(model, field):
+    """How many ``model`` rows reference the outer row through ``field``."""
+    counts = (
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(uses=Count("*"))
+        .values("uses")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def item_uses():
+    # served by the (item, expense) index on ExpenseItem
+    return usage_count(ExpenseItem, "item")
+
+
+def tag_uses():
+    # served by the (tag_id, expense_id) index on the tags through table
+    return usage_count(Expense.tags.through, "tag")
+
+
+def suggest(queryset, field, term, uses, limit=DEFAULT_LIMIT):
+    """
+    Top ``limit`` rows of ``queryset`` whose ``field`` starts with ``term``
+    or fuzzily matches it (pg_trgm ``<%``: word_similarity above
+    pg_trgm.word_similarity_threshold, 0.6 by default).
+
+    Prefix matches come first; within each group rows rank by similarity,
+    then by ``uses`` (see usage_count()), then by name. Both conditions run
+    on UPPER(field): prefixes as a range scan of the (user, UPPER(field))
+    btree index, fuzzy matches through the trigram GIN index. They are
+    separate branches of a UNION ALL rather than an OR, which the planner
+    tends to answer by running word_similarity() on every row of the user.
+    """
+    term = term.strip().upper()
+    rows = queryset.order_by().alias(folded=Upper(field))
+
+    def branch(matches, prefix):
+        return matches.annotate(
+            prefix=Value(prefix, output_field=IntegerField()),
+            similarity=TrigramWordSimilarity(term, "folded"),
+            uses=uses,
+        )
+
+    matches = branch(rows.filter(folded__startswith=term), 1)
+    if len(term) >= MIN_FUZZY_LENGTH:
+        fuzzy = rows.filter(folded__trigram_word_similar=term).exclude(
+            folded__startswith=term
+        )
+        matches = matches.union(branch(fuzzy, 0), all=True)
+    return matches.order_by("-prefix", "-similarity", "-uses", field)[:limit]
@@ -0,0 +1,84 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from expense_manager.models import BalanceLedgerEntry, BankAccount
+from expense_manager.services import ledger
+from utils.cache import bump
+
+
+def transaction_delta(transaction_type, amount):
+    """Signed effect of an expense on its bank account balance."""
+    if transaction_type == "Debit":
+        return -Decimal(amount)
+    if transaction_type == "Credit":
+        return Decimal(amount)
+    return Decimal("0")
+
+
+class BalanceChanges:
+    """
+    Collects balance effects of expense writes, netted per bank account.
+
+    add() applies an expense's effect, remove() reverses it; save() writes
+    one UPDATE ... SET balance = balance + delta per touched account and
+    records the dated effects in the balance ledger.
+    """
+
+    def __init__(self):
+        self._net = defaultdict(Decimal)
+        # (account, effective_at, expense) -> delta; an edit that doesn't
+        # change amount, type, account or time nets out to nothing
+        self._entries = defaultdict(Decimal)
+        self._users = set()
+
+    def _collect(self, expense, sign):
+        delta = sign * transaction_delta(expense.transaction_type, expense.amount)
+        self._net[expense.bank_account_id] += delta
+        key = (expense.bank_account_id, expense.transaction_date_time, expense.id)
+        self._entries[key] += delta
+        self._users.add(expense.user_id)
+
+    def add(self, expense):
+        self._collect(expense, 1)
+
+    def remove(self, expense):
+        self._collect(expense, -1)
+
+    def save(self):
+        entries = [
+            BalanceLedgerEntry(
+                bank_account_id=account_id,
+                effective_at=effective_at,
+                expense_id=expense_id,
+                delta=delta,
+            )
+            for (account_id, effective_at, expense_id), delta in self._entries.items()
+            if delta
+        ]
+        ledger_accounts = {entry.bank_account_id for entry in entries}
+
+        # Fixed account order so concurrent requests lock rows in the same order
+        for account_id in sorted(set(self._net) | ledger_accounts):
+            accounts = BankAccount.objects.filter(pk=account_id)
+            if self._net[account_id]:
+                accounts.update(
+                    balance=Coalesce(F("balance"), Value(Decimal("0")))
+                    + self._net[account_id],
+                    updated_at=timezone.now(),
+                )
+            elif account_id in ledger_accounts:
+                # balance unchanged (e.g. only the date moved): still take
+                # the row lock the ledger relies on
+                list(accounts.select_for_update().values_list("pk", flat=True))
+        ledger.record(entries)
+        # update() sends no signals: invalidate cached account lists here
+        if any(self._net.values()):
+            for user_id in self._users:
+                bump(user_id, "bank_accounts")
+        self._net.clear()
+        self._entries.clear()
+        self._users.clear()
@@ -0,0 +1,308 @@
+import operator
+from collections import defaultdict
+from decimal import Decimal
+from functools import reduce
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from expense_manager.models import Expense, ExpenseItem, Item, Tag
+from expense_manager.services.balance import BalanceChanges
+from expense_manager.services.rollup import RollupChanges
+from utils.cache import bump
+
+BATCH_SIZE = 1000
+
+
+def clean_tag_names(tag_names):
+    """Stripped, de-duplicated tag names in their original order."""
+    names = []
+    for name in tag_names or []:
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def clean_items(items_data):
+    """(name, amount) pairs with lowercased names; incomplete entries dropped."""
+    items = []
+    for item_dict in items_data or []:
+        name = item_dict.get("name", "").strip().lower()
+        amount = item_dict.get("amount")
+        if name and amount is not None:
+            items.append((name, amount))
+    return items
+
+
+def resolve_tags(tag_names, user_id):
+    """Map tag names to the user's Tag rows, creating missing ones in bulk."""
+    names = set(tag_names)
+    if not names:
+        return {}
+    found = {
+        tag.tag_name: tag
+        for tag in Tag.objects.filter(user_id=user_id, tag_name__in=names)
+    }
+    missing = names - found.keys()
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(user_id=user_id, tag_name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        bump(user_id, "tags")
+        found.update(
+            (tag.tag_name, tag)
+            for tag in Tag.objects.filter(user_id=user_id, tag_name__in=missing)
+        )
+    return found
+
+
+def resolve_items(item_names, user_id):
+    """Map (lowercase) item names to the user's Item rows, creating missing ones."""
+    names = set(item_names)
+    if not names:
+        return {}
+    found = {
+        item.name: item for item in Item.objects.filter(user_id=user_id, name__in=names)
+    }
+    missing = names - found.keys()
+    if missing:
+        # bulk_create skips Item.save(), so names must already be lowercase
+        Item.objects.bulk_create(
+            [Item(user_id=user_id, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        bump(user_id, "items")
+        found.update(
+            (item.name, item)
+            for item in Item.objects.filter(user_id=user_id, name__in=missing)
+        )
+    return found
+
+
+def insert_new(expenses):
+    """
+    INSERT ... ON CONFLICT (fingerprint) DO NOTHING RETURNING id, in batches:
+    duplicates of stored expenses, or of an earlier one in ``expenses``,
+    are skipped by the database. Returns the inserted expenses (pk set).
+    """
+    opts = Expense._meta
+    fields = [f for f in opts.concrete_fields if not f.generated and not f.primary_key]
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in fields)
+    placeholders = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    for expense in expenses:
+        expense.update_fingerprint()
+
+    inserted = {}
+    with connection.cursor() as cursor:
+        for start in range(0, len(expenses), BATCH_SIZE):
+            batch = expenses[start : start + BATCH_SIZE]
+            cursor.execute(
+                f"INSERT INTO {quote(opts.db_table)} ({columns}) "
+                f"VALUES {', '.join([placeholders] * len(batch))} "
+                "ON CONFLICT (fingerprint) WHERE fingerprint IS NOT NULL DO NOTHING "
+                f"RETURNING {quote(opts.pk.column)}, fingerprint",
+                [
+                    # pre_save() fills created_at/updated_at like save() does
+                    field.get_db_prep_save(field.pre_save(expense, True), connection)
+                    for expense in batch
+                    for field in fields
+                ],
+            )
+            inserted.update((fingerprint, pk) for pk, fingerprint in cursor)
+
+    created = []
+    for expense in expenses:
+        # pop: of two equal rows in the list only the first was inserted
+        pk = inserted.pop(expense.fingerprint, None)
+        if pk is not None:
+            expense.pk = pk
+            expense._state.adding = False
+            expense._state.db = connection.alias
+            created.append(expense)
+    return created
+
+
+def create_expenses(user_id, rows):
+    """
+    Create expenses from validated ExpenseSerializer data in a fixed number
+    of queries: tags and items are resolved for the whole payload, then
+    expenses (see insert_new()), tag links and expense items are each
+    inserted in bulk, and balances/rollups get one netted write per key.
+    Must run inside a transaction.
+
+    Returns (expenses, created): one expense per row, in order, either
+    newly created or the stored one it duplicates; and the created ones.
+    """
+    rows = [dict(row) for row in rows]
+    tag_names = [clean_tag_names(row.pop("write_tags", None)) for row in rows]
+    items = [clean_items(row.pop("write_items", None)) for row in rows]
+
+    expenses = [Expense(user_id=user_id, **row) for row in rows]
+    created = insert_new(expenses)
+    new = [expense.pk is not None for expense in expenses]
+    new_tag_names = [names for names, is_new in zip(tag_names, new) if is_new]
+    new_items = [pairs for pairs, is_new in zip(items, new) if is_new]
+
+    tags_by_name = resolve_tags({n for names in new_tag_names for n in names}, user_id)
+    items_by_name = resolve_items({n for pairs in new_items for n, _ in pairs}, user_id)
+
+    TagLink = Expense.tags.through
+    TagLink.objects.bulk_create(
+        [
+            TagLink(expense_id=expense.id, tag_id=tags_by_name[name].id)
+            for expense, names in zip(created, new_tag_names)
+            for name in names
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    ExpenseItem.objects.bulk_create(
+        [
+            ExpenseItem(expense=expense, item=items_by_name[name], amount=amount)
+            for expense, pairs in zip(created, new_items)
+            for name, amount in pairs
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    balances = BalanceChanges()
+    rollup = RollupChanges()
+    for expense, names in zip(created, new_tag_names):
+        balances.add(expense)
+        rollup.add(expense, [tags_by_name[name].id for name in names])
+    balances.save()
+    rollup.save()
+    if created:
+        bump(user_id, "expenses")
+
+    if len(created) < len(expenses):
+        duplicates = Expense.objects.filter(
+            user_id=user_id,
+            fingerprint__in={e.fingerprint for e in expenses if e.pk is None},
+        )
+        stored = {expense.fingerprint: expense for expense in duplicates}
+        expenses = [
+            expense if is_new else stored[expense.fingerprint]
+            for expense, is_new in zip(expenses, new)
+        ]
+    return expenses, created
+
+
+def update_expenses(user_id, updates):
+    """
+    Apply validated ExpenseSerializer data to existing expenses in bulk.
+
+    updates: list of (expense, validated_data) pairs, expenses loaded with
+    ExpenseSerializer.setup_eager_loading() so their current tags/items are
+    in memory. Changed columns are written with one bulk_update, tag and
+    item changes are diffed against the current rows and applied with one
+    DELETE and one INSERT each, and balance/rollup corrections are netted
+    per key. Must run inside a transaction.
+    """
+    balances = BalanceChanges()
+    rollup = RollupChanges()
+    now = timezone.now()
+
+    prepared = []
+    for expense, data in updates:
+        data = dict(data)
+        tag_names = data.pop("write_tags", None)
+        items_data = data.pop("write_items", None)
+        prepared.append(
+            (
+                expense,
+                data,
+                None if tag_names is None else clean_tag_names(tag_names),
+                None if items_data is None else clean_items(items_data),
+            )
+        )
+
+    tags_by_name = resolve_tags(
+        {n for _, _, names, _ in prepared for n in names or []}, user_id
+    )
+    items_by_name = resolve_items(
+        {n for _, _, _, pairs in prepared for n, _ in pairs or []}, user_id
+    )
+
+    TagLink = Expense.tags.through
+    changed_fields = set()
+    changed = []
+    links_to_delete, links_to_create = [], []
+    items_to_delete, items_to_create = [], []
+
+    for expense, data, tag_names, pairs in prepared:
+        current_tag_ids = {tag.id for tag in expense.tags.all()}
+        balances.remove(expense)
+        rollup.remove(expense, current_tag_ids)
+        dirty = False
+
+        for field, value in data.items():
+            # compare FKs by id so the related row isn't fetched
+            attname = Expense._meta.get_field(field).attname
+            new_value = value.pk if attname != field and value is not None else value
+            if getattr(expense, attname) != new_value:
+                setattr(expense, field, value)
+                changed_fields.add(field)
+                dirty = True
+
+        tag_ids = current_tag_ids
+        if tag_names is not None:
+            tag_ids = {tags_by_name[name].id for name in tag_names}
+            removed = current_tag_ids - tag_ids
+            if removed:
+                links_to_delete.append(Q(expense_id=expense.id, tag_id__in=removed))
+            links_to_create += [
+                TagLink(expense_id=expense.id, tag_id=tag_id)
+                for tag_id in tag_ids - current_tag_ids
+            ]
+            dirty = dirty or tag_ids != current_tag_ids
+
+        if pairs is not None:
+            # Multiset diff of (item, amount) so unchanged rows are kept
+            current = defaultdict(list)
+            for expense_item in expense.expense_items.all():
+                current[(expense_item.item_id, expense_item.amount)].append(
+                    expense_item.id
+                )
+            for name, amount in pairs:
+                key = (items_by_name[name].id, Decimal(str(amount)))
+                if current[key]:
+                    current[key].pop()
+                else:
+                    items_to_create.append(
+                        ExpenseItem(
+                            expense_id=expense.id, item_id=key[0], amount=key[1]
+                        )
+                    )
+                    dirty = True
+            leftover = [pk for pks in current.values() for pk in pks]
+            items_to_delete += leftover
+            dirty = dirty or bool(leftover)
+
+        if dirty:
+            if expense.update_fingerprint():
+                changed_fields.add("fingerprint")
+            expense.updated_at = now
+            changed.append(expense)
+        balances.add(expense)
+        rollup.add(expense, tag_ids)
+
+    if changed:
+        Expense.objects.bulk_update(
+            changed, sorted(changed_fields | {"updated_at"}), batch_size=BATCH_SIZE
+        )
+    if links_to_delete:
+        TagLink.objects.filter(reduce(operator.or_, links_to_delete)).delete()
+    TagLink.objects.bulk_create(links_to_create, batch_size=BATCH_SIZE)
+    if items_to_delete:
+        ExpenseItem.objects.filter(pk__in=items_to_delete).delete()
+    ExpenseItem.objects.bulk_create(items_to_create, batch_size=BATCH_SIZE)
+
+    balances.save()
+    rollup.save()
+    if changed:
+        bump(user_id, "expenses")
+    return [expense for expense, _ in updates]
@@ -0,0 +1,132 @@
+"""
+Idempotency-Key support for write endpoints.
+
+The first request with a key inserts the key's row and runs the write in
+the same transaction; the response is stored on the row before commit.
+A retry with the same key finds the row and gets the stored response back
+without running the handler. A concurrent duplicate blocks on the first
+request's uncommitted row (primary key) until it finishes, then replays
+its response; if the first request failed, its row is rolled back with
+it and the duplicate runs instead.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from expense_manager.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field("key").max_length
+
+
+def expiry_cutoff():
+    """Keys created before this are expired: pruned, or reused on conflict."""
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def request_hash(request):
+    """Hash of what makes two requests the same: method, path and data."""
+    payload = json.dumps(
+        [request.method, request.path, request.data], sort_keys=True, default=str
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def claim(user_id, key, fingerprint):
+    """
+    Take ``key`` for a new request: returns None if the caller should run
+    it (the row was inserted, or an expired one taken over), else the
+    stored IdempotencyKey. Blocks while another transaction holds the key.
+    """
+    table = connection.ops.quote_name(IdempotencyKey._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, "key", request_hash, created_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (user_id, "key") DO UPDATE
+            SET request_hash = EXCLUDED.request_hash,
+                created_at = EXCLUDED.created_at,
+                status = NULL,
+                response = NULL
+            WHERE {table}.created_at < %s
+            RETURNING 1
+            """,
+            [user_id, key, fingerprint, timezone.now(), expiry_cutoff()],
+        )
+        if cursor.fetchone():
+            return None
+    return IdempotencyKey.objects.get(user_id=user_id, key=key)
+
+
+def store(user_id, key, response):
+    IdempotencyKey.objects.filter(user_id=user_id, key=key).update(
+        status=response.status_code,
+        response=json.dumps(response.data, cls=DjangoJSONEncoder),
+    )
+
+
+def replay(record):
+    # json.loads() keeps the key order the handler's data had
+    response = Response(json.loads(record.response), status=record.status)
+    response[REPLAY_HEADER] = "true"
+    return response
+
+
+def prune(cutoff=None):
+    """Delete expired keys; returns how many."""
+    expired = IdempotencyKey.objects.filter(created_at__lt=cutoff or expiry_cutoff())
+    deleted, _ = expired.delete()
+    return deleted
+
+
+def idempotent(handler):
+    """
+    Viewset method decorator: honour an Idempotency-Key header, see the
+    module docstring. Requests without the header run as before.
+
+    Responses the handler returns are stored, errors included, except 5xx;
+    an exception rolls the key back with the write.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_hash(request)
+        with transaction.atomic():
+            record = claim(request.user.id, key, fingerprint)
+            if record is not None:
+                if record.request_hash != fingerprint:
+                    return Response(
+                        {"detail": f"{HEADER} was used for a different request."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                return replay(record)
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code >= 500:
+                # nothing worth replaying: undo, so a retry runs again
+                transaction.set_rollback(True)
+            else:
+                store(request.user.id, key, response)
+            return response
+
+    return wrapper
@@ -0,0 +1,207 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from expense_manager.models import (
+    BalanceCheckpoint,
+    BalanceLedgerEntry,
+    BankAccount,
+)
+
+BATCH_SIZE = 1000
+ZERO = Decimal("0")
+
+
+def month_start(moment):
+    """First day (UTC) of the month containing ``moment``, as a date."""
+    moment = moment.astimezone(dt_timezone.utc)
+    return moment.date().replace(day=1)
+
+
+def month_instant(month):
+    """Checkpoint month (a date) -> its first instant in UTC."""
+    return datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+
+
+def record(entries):
+    """
+    Insert ledger entries and shift the checkpoints they precede.
+
+    A checkpoint for month M sums the entries before M, so an entry dated t
+    moves every checkpoint after t by its delta; shifts are netted into one
+    UPDATE per (account, month). Callers must hold the row lock of every
+    account involved (BalanceChanges.save() does) so a concurrent
+    checkpoint() neither misses these entries nor counts them twice.
+    """
+    entries = [entry for entry in entries if entry.delta]
+    BalanceLedgerEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+    shifts = defaultdict(Decimal)
+    for entry in entries:
+        key = (entry.bank_account_id, month_start(entry.effective_at))
+        shifts[key] += entry.delta
+    shift_checkpoints(shifts)
+
+
+def shift_checkpoints(shifts):
+    """
+    Apply ``{(account_id, month): delta}`` for entries inserted in month
+    (a date, see month_start()) to the checkpoints after it. Same locking
+    requirement as record().
+    """
+    for (account_id, month), delta in sorted(shifts.items()):
+        if delta:
+            BalanceCheckpoint.objects.filter(
+                bank_account_id=account_id, month__gt=month
+            ).update(balance=F("balance") + delta)
+
+
+def record_adjustment(account_id, delta, effective_at=None):
+    """Ledger entry for a manual balance change (not tied to an expense)."""
+    record(
+        [
+            BalanceLedgerEntry(
+                bank_account_id=account_id,
+                delta=delta,
+                effective_at=effective_at or timezone.now(),
+            )
+        ]
+    )
+
+
+def _sum(entries):
+    return entries.aggregate(total=Sum("delta"))["total"] or ZERO
+
+
+def checkpoint(account_id, month):
+    """
+    Balance at the start of ``month``, from its checkpoint.
+
+    A missing checkpoint is built from the nearest earlier one plus one
+    grouped range sum, and every month in between is stored on the way, so
+    each month is summed at most once.
+    """
+    balance = (
+        BalanceCheckpoint.objects.filter(bank_account_id=account_id, month=month)
+        .values_list("balance", flat=True)
+        .first()
+    )
+    if balance is not None:
+        return balance
+
+    with transaction.atomic():
+        # Writers hold this lock while they insert entries and shift
+        # checkpoints; taking it means the sum below sees all of them
+        list(
+            BankAccount.objects.select_for_update()
+            .filter(pk=account_id)
+            .values_list("pk", flat=True)
+        )
+        base = (
+            BalanceCheckpoint.objects.filter(
+                bank_account_id=account_id, month__lte=month
+            )
+            .order_by("-month")
+            .values_list("month", "balance")
+            .first()
+        )
+        if base is not None and base[0] == month:
+            return base[1]
+
+        entries = BalanceLedgerEntry.objects.filter(
+            bank_account_id=account_id, effective_at__lt=month_instant(month)
+        )
+        if base is None:
+            # First checkpoint of the account: everything before it in one sum
+            running = _sum(entries)
+            checkpoints = [
+                BalanceCheckpoint(
+                    bank_account_id=account_id, month=month, balance=running
+                )
+            ]
+        else:
+            monthly = dict(
+                entries.filter(effective_at__gte=month_instant(base[0]))
+                .annotate(bucket=TruncMonth("effective_at", tzinfo=dt_timezone.utc))
+                .values_list("bucket")
+                .annotate(total=Sum("delta"))
+                .order_by()
+            )
+            monthly = {month_start(bucket): sum_ for bucket, sum_ in monthly.items()}
+            running, current, checkpoints = base[1], base[0], []
+            while current < month:
+                running += monthly.get(current, ZERO)
+                current = (current + timedelta(days=32)).replace(day=1)
+                checkpoints.append(
+                    BalanceCheckpoint(
+                        bank_account_id=account_id, month=current, balance=running
+                    )
+                )
+        BalanceCheckpoint.objects.bulk_create(checkpoints, batch_size=BATCH_SIZE)
+    return running
+
+
+def balance_at(account_id, moment, inclusive=True):
+    """
+    Balance after the entries effective up to ``moment`` (before it when
+    not inclusive): a checkpoint plus one bounded range sum.
+
+    The checkpoint is that of the month of the latest entry before
+    ``moment``'s month, and never later than the current month: past the
+    last entry every checkpoint would hold the same balance, and each one
+    is another row for backdated writes to shift.
+    """
+    month = min(month_start(moment), month_start(timezone.now()))
+    last = (
+        BalanceLedgerEntry.objects.filter(
+            bank_account_id=account_id, effective_at__lt=month_instant(month)
+        )
+        .order_by("-effective_at")
+        .values_list("effective_at", flat=True)
+        .first()
+    )
+    lookup = "effective_at__lte" if inclusive else "effective_at__lt"
+    entries = BalanceLedgerEntry.objects.filter(
+        bank_account_id=account_id, **{lookup: moment}
+    )
+    if last is None:
+        # nothing before the month to checkpoint
+        return _sum(entries)
+    month = month_start(last)
+    return checkpoint(account_id, month) + _sum(
+        entries.filter(effective_at__gte=month_instant(month))
+    )
+
+
+def daily_balances(account_id, first_day, last_day):
+    """
+    Closing balance of each day in [first_day, last_day] (current time zone):
+    one opening balance plus a single GROUP BY day over the range.
+    """
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(first_day, time.min), tz)
+    end = timezone.make_aware(
+        datetime.combine(last_day + timedelta(days=1), time.min), tz
+    )
+    running = balance_at(account_id, start, inclusive=False)
+    per_day = dict(
+        BalanceLedgerEntry.objects.filter(
+            bank_account_id=account_id, effective_at__gte=start, effective_at__lt=end
+        )
+        .annotate(day=TruncDate("effective_at", tzinfo=tz))
+        .values_list("day")
+        .annotate(total=Sum("delta"))
+        .order_by()
+    )
+
+    series, day = [], first_day
+    while day <= last_day:
+        running += per_day.get(day, ZERO)
+        series.append((day, running))
+        day += timedelta(days=1)
+    return series
@@ -0,0 +1,152 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from expense_manager.models import MonthlySpendRollup
+
+
+class RollupChanges:
+    """
+    Collects the rollup effect of expense writes and applies it in one go.
+
+    Call remove() with an expense's state *before* a write and add() with
+    its state after; deltas are netted per rollup key so a request touches
+    each key at most once, inside the caller's transaction.
+    """
+
+    def __init__(self):
+        self._net = defaultdict(lambda: [Decimal("0"), 0])
+
+    def add(self, expense, tag_ids):
+        self._record(expense, tag_ids, 1)
+
+    def remove(self, expense, tag_ids):
+        self._record(expense, tag_ids, -1)
+
+    def add_totals(self, user_id, year, month, bank_account_id, type_, total, count):
+        """Add pre-aggregated untagged expenses (``count`` of them, ``total``)."""
+        entry = self._net[(user_id, year, month, bank_account_id, type_, None)]
+        entry[0] += Decimal(total)
+        entry[1] += count
+
+    def _record(self, expense, tag_ids, sign):
+        base = (
+            expense.user_id,
+            expense.date.year,
+            expense.date.month,
+            expense.bank_account_id,
+            expense.transaction_type,
+        )
+        amount = Decimal(expense.amount) * sign
+        for tag_id in [None, *set(tag_ids)]:
+            entry = self._net[base + (tag_id,)]
+            entry[0] += amount
+            entry[1] += sign
+
+    def save(self):
+        """
+        Write the netted deltas: one SELECT for the touched keys, one
+        bulk UPDATE (F() increments) for existing rows, one bulk INSERT
+        for new ones.
+        """
+        changes = {key: delta for key, delta in self._net.items() if any(delta)}
+        self._net.clear()
+        if not changes:
+            return
+
+        keys = Q()
+        for key in changes:
+            keys |= Q(**_lookup(key))
+        # Lock only the touched rows, up front and in pk order: bulk_update's
+        # single UPDATE would lock them in whatever order the plan visits
+        # them. Writes to other accounts, types or tags of the month go on.
+        existing = {
+            _key(row): row
+            for row in MonthlySpendRollup.objects.filter(keys)
+            .order_by("pk")
+            .select_for_update()
+        }
+
+        to_update, to_create = [], []
+        for key, (total, count) in changes.items():
+            row = existing.get(key)
+            if row is None:
+                to_create.append(
+                    MonthlySpendRollup(total=total, count=count, **_lookup(key))
+                )
+            else:
+                row.total = F("total") + total
+                row.count = F("count") + count
+                to_update.append(row)
+
+        if to_update:
+            MonthlySpendRollup.objects.bulk_update(to_update, ["total", "count"])
+        if to_create:
+            try:
+                with transaction.atomic():
+                    MonthlySpendRollup.objects.bulk_create(to_create)
+            except IntegrityError:
+                # A concurrent request created some of these rows first
+                for row in to_create:
+                    _apply(_key(row), row.total, row.count)
+
+
+def _key(row):
+    return (
+        row.user_id,
+        row.year,
+        row.month,
+        row.bank_account_id,
+        row.transaction_type,
+        row.tag_id,
+    )
+
+
+def _lookup(key):
+    user_id, year, month, bank_account_id, transaction_type, tag_id = key
+    return dict(
+        user_id=user_id,
+        year=year,
+        month=month,
+        bank_account_id=bank_account_id,
+        transaction_type=transaction_type,
+        tag_id=tag_id,
+    )
+
+
+def _apply(key, total, count):
+    lookup = _lookup(key)
+    rows = MonthlySpendRollup.objects.filter(**lookup)
+    if rows.update(total=F("total") + total, count=F("count") + count):
+        return
+    try:
+        with transaction.atomic():
+            MonthlySpendRollup.objects.create(total=total, count=count, **lookup)
+    except IntegrityError:
+        # A concurrent request created the row first
+        rows.update(total=F("total") + total, count=F("count") + count)
+
+
+def aggregate_rollups(expenses):
+    """
+    Recompute rollup rows from scratch for an Expense queryset, as dicts
+    with the MonthlySpendRollup field names (used to rebuild and verify).
+    """
+    dated = expenses.order_by().annotate(
+        year=ExtractYear("date"), month=ExtractMonth("date")
+    )
+    key_fields = ["user_id", "year", "month", "bank_account_id", "transaction_type"]
+    all_tags = dated.values(*key_fields).annotate(
+        total=Sum("amount"), count=Count("id")
+    )
+    per_tag = (
+        dated.filter(tags__isnull=False)
+        .values(*key_fields, tag_id=F("tags"))
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+    for row in all_tags.iterator():
+        yield {**row, "tag_id": None}
+    yield from per_tag.iterator()
@@ -0,0 +1,519 @@
+"""
+Bank statement (CSV) import.
+
+Rows are parsed and validated as the file streams in and fed straight into
+PostgreSQL COPY, into a temporary staging table. From there one set-based
+statement creates the expenses and their ledger entries and returns the
+per-month totals, so a large statement costs a handful of queries. Rows
+whose fingerprint matches a stored expense (an overlapping statement
+imported before) are skipped by ON CONFLICT. The account balance gets one
+net UPDATE. Memory stays flat regardless of the file size.
+"""
+
+import csv
+import io
+import re
+from collections import defaultdict
+from datetime import datetime, time as dt_time
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from operator import itemgetter
+
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from expense_manager.models import (
+    BalanceLedgerEntry,
+    BankAccount,
+    Expense,
+    expense_fingerprint,
+)
+from expense_manager.services import ledger
+from expense_manager.services.rollup import RollupChanges
+from utils.cache import bump
+
+# Rows per chunk handed to COPY
+COPY_CHUNK_ROWS = 5000
+# Rejected rows listed in the result; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+TRANSACTION_TYPES = {
+    "debit": "Debit",
+    "dr": "Debit",
+    "d": "Debit",
+    "withdrawal": "Debit",
+    "credit": "Credit",
+    "cr": "Credit",
+    "c": "Credit",
+    "deposit": "Credit",
+}
+INFO_MAX_LENGTH = Expense._meta.get_field("transaction_info").max_length
+# Expense.amount: numeric(12, 2) -> at most 10 integer digits, 2 decimals
+_amount = Expense._meta.get_field("amount")
+AMOUNT_RE = re.compile(
+    r"([+-]?)(\d{{1,{whole}}}(?:\.\d{{0,{scale}}})?|\.\d{{1,{scale}}})".format(
+        whole=_amount.max_digits - _amount.decimal_places,
+        scale=_amount.decimal_places,
+    )
+)
+CENT = Decimal("0.01")
+# BankAccount.balance: numeric(12, 3)
+_balance = BankAccount._meta.get_field("balance")
+MAX_BALANCE = Decimal(10) ** (_balance.max_digits - _balance.decimal_places)
+
+STAGING_TABLE = "statement_import_staging"
+STAGING_COLUMNS = (
+    "line",
+    "amount",
+    "date",
+    "time",
+    "transaction_date_time",
+    "transaction_info",
+    "transaction_type",
+    "fingerprint",
+)
+
+
+class StatementImportError(ValueError):
+    """The statement cannot be imported; nothing was written."""
+
+
+class StatementFormatError(StatementImportError):
+    """The file as a whole cannot be read with the given format."""
+
+
+class StatementFormat:
+    """
+    How to read a statement: the CSV header of each expense field and the
+    formats of its values. Columns not given default to the field's own
+    name (amount, date, time, transaction_info, transaction_type) and are
+    skipped if the file has no such header, except amount and date.
+
+    Either the transaction_type column says debit/dr/withdrawal or
+    credit/cr/deposit, or ``debit`` and ``credit`` name two amount columns;
+    with neither, negative amounts are debits.
+    """
+
+    def __init__(
+        self,
+        amount=None,
+        date=None,
+        time=None,
+        transaction_info=None,
+        transaction_type=None,
+        debit=None,
+        credit=None,
+        date_format="%Y-%m-%d",
+        time_format="%H:%M:%S",
+        delimiter=",",
+        tz=None,
+        currency="INR",
+    ):
+        self.columns = {
+            "amount": amount,
+            "date": date,
+            "time": time,
+            "transaction_info": transaction_info,
+            "transaction_type": transaction_type,
+            "debit": debit,
+            "credit": credit,
+        }
+        self.date_format = date_format
+        self.time_format = time_format
+        self.delimiter = delimiter
+        self.tz = tz or timezone.get_current_timezone()
+        self.currency = currency
+
+    def split_amounts(self):
+        return bool(self.columns["debit"] or self.columns["credit"])
+
+    def required_fields(self):
+        if self.split_amounts():
+            return ["date", "debit", "credit"]
+        return ["amount", "date"]
+
+
+class RowParser:
+    """
+    CSV record -> staging row for ``account``; raises ValueError with a
+    message.
+
+    This runs once per row of statements with millions of them, so values
+    are checked with a regex and cached lookups rather than converted:
+    amounts stay strings and each distinct date and time is parsed once.
+    """
+
+    # fields whose column defaults to a header of the same name
+    implicit_columns = (
+        "amount",
+        "date",
+        "time",
+        "transaction_info",
+        "transaction_type",
+    )
+    fields = (
+        "amount",
+        "debit",
+        "credit",
+        "transaction_type",
+        "date",
+        "time",
+        "transaction_info",
+    )
+
+    def __init__(self, fmt, header, account):
+        positions = {name.strip(): index for index, name in enumerate(header)}
+        self.fmt = fmt
+        index = {}
+        missing = []
+        for field, column in fmt.columns.items():
+            if column:
+                if column not in positions:
+                    missing.append(column)
+                index[field] = positions.get(column)
+            elif field in self.implicit_columns:
+                # with debit/credit columns a plain "amount" header is ignored
+                if field != "amount" or not fmt.split_amounts():
+                    index[field] = positions.get(field)
+        if missing:
+            raise StatementFormatError(
+                "Missing column(s): " + ", ".join(sorted(missing)) + "."
+            )
+        for field in fmt.required_fields():
+            if index.get(field) is None:
+                raise StatementFormatError(f"No {field} column in the header.")
+        self.has_type = index.get("transaction_type") is not None
+        self.split = fmt.split_amounts()
+        self.user_id, self.account_id = account.user_id, account.pk
+
+        # Absent fields read an always-empty extra column, so every record
+        # is picked apart by a single itemgetter call
+        self.width = len(header) + 1
+        self.pick = itemgetter(
+            *(
+                len(header) if index.get(field) is None else index[field]
+                for field in self.fields
+            )
+        )
+        # Statements repeat the same few thousand dates and times
+        self.parse_date = lru_cache(maxsize=8192)(self._parse_date)
+        self.parse_time = lru_cache(maxsize=8192)(self._parse_time)
+
+    def _parse_date(self, value):
+        """(date, ISO string)"""
+        try:
+            day = datetime.strptime(value, self.fmt.date_format).date()
+        except ValueError:
+            raise ValueError(f"date {value!r} is not in {self.fmt.date_format} format")
+        return day, day.isoformat()
+
+    def _parse_time(self, value):
+        """(time, ISO string); midnight if empty"""
+        if not value:
+            return dt_time(), "00:00:00"
+        try:
+            at = datetime.strptime(value, self.fmt.time_format).time()
+        except ValueError:
+            raise ValueError(f"time {value!r} is not in {self.fmt.time_format} format")
+        return at, at.isoformat()
+
+    @staticmethod
+    def parse_amount(value):
+        """'1,234.5' -> (negative, '1234.5'); None if empty."""
+        cleaned = value
+        if "," in cleaned or " " in cleaned:
+            cleaned = cleaned.replace(",", "").replace(" ", "")
+        if not cleaned:
+            return None
+        match = AMOUNT_RE.fullmatch(cleaned)
+        if match is None:
+            # slow path, only to say what is wrong
+            try:
+                amount = Decimal(cleaned)
+            except InvalidOperation:
+                amount = None
+            if amount is None or not amount.is_finite():
+                raise ValueError(f"amount {value!r} is not a number")
+            if amount != amount.quantize(CENT):
+                raise ValueError(f"amount {value!r} has more than 2 decimal places")
+            raise ValueError(f"amount {value!r} is too large")
+        sign, digits = match.groups()
+        return sign == "-", digits
+
+    def amount_and_type(self, amount, debit, credit, raw_type):
+        if self.split:
+            debit = self.parse_amount(debit.strip())
+            credit = self.parse_amount(credit.strip())
+            if debit is not None and _is_zero(debit[1]):
+                debit = None
+            if credit is not None and _is_zero(credit[1]):
+                credit = None
+            if (debit is None) == (credit is None):
+                raise ValueError("exactly one of debit and credit must be set")
+            return (debit[1], "Debit") if debit else (credit[1], "Credit")
+
+        amount = self.parse_amount(amount.strip())
+        if amount is None:
+            raise ValueError("amount is empty")
+        negative, digits = amount
+        if not self.has_type:
+            return digits, "Debit" if negative else "Credit"
+        transaction_type = TRANSACTION_TYPES.get(raw_type.strip().lower())
+        if transaction_type is None:
+            raise ValueError(f"unknown transaction type {raw_type.strip()!r}")
+        return digits, transaction_type
+
+    def __call__(self, line, record):
+        record.extend([""] * (self.width - len(record)))
+        amount, debit, credit, raw_type, day, at, info = self.pick(record)
+        amount, transaction_type = self.amount_and_type(amount, debit, credit, raw_type)
+        if _is_zero(amount):
+            raise ValueError("amount must not be zero")
+        day, day_iso = self.parse_date(day.strip())
+        at, at_iso = self.parse_time(at.strip())
+        moment = datetime.combine(day, at, self.fmt.tz)
+        info = info.strip()[:INFO_MAX_LENGTH]
+        fingerprint = expense_fingerprint(
+            self.user_id, self.account_id, amount, moment, info, transaction_type
+        )
+        return (
+            line,
+            amount,
+            day_iso,
+            at_iso,
+            moment.isoformat(),
+            info,
+            transaction_type,
+            fingerprint,
+        )
+
+
+def _is_zero(digits):
+    return not digits.replace("0", "").replace(".", "")
+
+
+class CopyStream:
+    """
+    Read-only file object over an iterator of text chunks, for COPY.
+    psycopg2 turns an exception raised by read() into a generic COPY
+    failure, so the original one is kept on ``error`` to be re-raised.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self.error = None
+
+    def read(self, size=-1):
+        try:
+            while size < 0 or len(self._buffer) < size:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buffer += chunk
+        except Exception as exc:
+            self.error = exc
+            raise
+        if size < 0:
+            data, self._buffer = self._buffer, ""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.errors = []
+        self.balance_delta = Decimal("0")
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "skipped": self.skipped,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "balance_delta": str(self.balance_delta),
+        }
+
+
+def statement_reader(lines, fmt, account):
+    """(csv reader positioned after the header, RowParser for the header)."""
+    reader = csv.reader(lines, delimiter=fmt.delimiter)
+    try:
+        header = next(reader, None)
+    except csv.Error as exc:
+        raise StatementFormatError(f"The header cannot be read: {exc}.")
+    if header is None:
+        raise StatementFormatError("The file is empty.")
+    return reader, RowParser(fmt, header, account)
+
+
+def staging_chunks(reader, parse, result):
+    """
+    Parse the records of ``reader`` and yield COPY-ready CSV text in chunks
+    of COPY_CHUNK_ROWS rows. Invalid rows are recorded on ``result``.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    pending = 0
+    try:
+        for record in reader:
+            if not "".join(record).strip():
+                continue
+            result.rows += 1
+            try:
+                row = parse(reader.line_num, record)
+            except ValueError as exc:
+                result.reject(reader.line_num, str(exc))
+                continue
+            writer.writerow(row)
+            pending += 1
+            if pending >= COPY_CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+    except csv.Error as exc:
+        raise StatementFormatError(
+            f"Line {reader.line_num} cannot be read: {exc}."
+        )
+    if pending:
+        yield buffer.getvalue()
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def import_statement(account, lines, fmt):
+    """
+    Import a CSV statement (``lines``: any iterable of text lines, e.g. a
+    file opened with newline="") into ``account`` in one transaction.
+    Returns an ImportResult; raises StatementImportError (nothing written)
+    if the header is unusable or the balance would overflow.
+    """
+    result = ImportResult()
+    reader, parse = statement_reader(lines, fmt, account)
+    expense_table, ledger_table = _table(Expense), _table(BalanceLedgerEntry)
+    params = {
+        "user": account.user_id,
+        "account": account.pk,
+        "currency": fmt.currency,
+    }
+    signed = "CASE WHEN transaction_type = 'Debit' THEN -amount ELSE amount END"
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Same lock expense writes take first; the ledger relies on it
+        balance = (
+            BankAccount.objects.select_for_update()
+            .filter(pk=account.pk)
+            .values_list("balance", flat=True)
+            .get()
+        )
+
+        cursor.execute(
+            f"""
+            CREATE TEMPORARY TABLE {STAGING_TABLE} (
+                line integer NOT NULL,
+                amount numeric(12, 2) NOT NULL,
+                date date NOT NULL,
+                time time NOT NULL,
+                transaction_date_time timestamptz NOT NULL,
+                transaction_info text NOT NULL,
+                transaction_type varchar(10) NOT NULL,
+                fingerprint char(32) NOT NULL
+            ) ON COMMIT DROP
+            """
+        )
+        stream = CopyStream(staging_chunks(reader, parse, result))
+        try:
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) "
+                # an empty narration is '', not NULL
+                "FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (transaction_info))",
+                stream,
+            )
+        except connection.Database.DatabaseError:
+            # copy_expert() is not wrapped by Django: DB-API exceptions
+            if stream.error is not None:
+                raise stream.error
+            raise
+
+        # Expenses and their ledger entries in one statement. Duplicates of
+        # stored expenses, or of an earlier line, are skipped; what was
+        # inserted comes back grouped by ledger month (UTC, for checkpoint
+        # shifts) and by rollup month (of the expense date) and type.
+        cursor.execute(
+            f"""
+            WITH created AS (
+                INSERT INTO {expense_table} (
+                    user_id, bank_account_id, amount, date, time,
+                    transaction_date_time, transaction_info, notes, currency,
+                    transaction_type, fingerprint, created_at, updated_at
+                )
+                SELECT %(user)s, %(account)s, amount, date, time,
+                       transaction_date_time, transaction_info, '', %(currency)s,
+                       transaction_type, fingerprint, now(), now()
+                FROM {STAGING_TABLE}
+                ORDER BY line
+                ON CONFLICT (fingerprint) WHERE fingerprint IS NOT NULL
+                DO NOTHING
+                RETURNING id, amount, date, transaction_type, transaction_date_time
+            ),
+            ledger AS (
+                INSERT INTO {ledger_table}
+                    (bank_account_id, expense_id, delta, effective_at, created_at)
+                SELECT %(account)s, id, {signed}, transaction_date_time, now()
+                FROM created
+            )
+            SELECT date_trunc('month', transaction_date_time AT TIME ZONE 'UTC')::date,
+                   extract(year FROM date)::integer,
+                   extract(month FROM date)::integer,
+                   transaction_type, sum(amount), sum({signed}), count(*)
+            FROM created
+            GROUP BY 1, 2, 3, 4
+            """,
+            params,
+        )
+        shifts = defaultdict(Decimal)
+        rollup = RollupChanges()
+        for ledger_month, year, month, type_, total, delta, count in cursor.fetchall():
+            shifts[(account.pk, ledger_month)] += delta
+            rollup.add_totals(
+                account.user_id, year, month, account.pk, type_, total, count
+            )
+            result.created += count
+        result.skipped = result.rows - result.rejected - result.created
+
+        result.balance_delta = sum(shifts.values(), Decimal("0"))
+        new_balance = (balance or Decimal("0")) + result.balance_delta
+        if abs(new_balance) >= MAX_BALANCE:
+            raise StatementImportError(
+                f"Importing would take the balance to {new_balance}, which is "
+                "outside the range a balance can hold."
+            )
+        cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+
+        if result.balance_delta:
+            BankAccount.objects.filter(pk=account.pk).update(
+                balance=Coalesce(F("balance"), Value(Decimal("0")))
+                + result.balance_delta,
+                updated_at=timezone.now(),
+            )
+        ledger.shift_checkpoints(shifts)
+        rollup.save()
+        if result.created:
+            bump(account.user_id, "expenses", "bank_accounts")
+    return result
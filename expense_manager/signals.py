@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from expense_manager.models import BankAccount, Expense, Item, Tag
+from utils.cache import bump
+
+# Cache scope of each user-owned model. Queryset update() and bulk_create()
+# send no signals; the services that use them bump explicitly.
+CACHE_SCOPES = {
+    Expense: "expenses",
+    Tag: "tags",
+    Item: "items",
+    BankAccount: "bank_accounts",
+}
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=BankAccount)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=BankAccount)
+def bump_user_data_version(sender, instance, **kwargs):
+    bump(instance.user_id, CACHE_SCOPES[sender])
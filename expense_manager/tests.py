@@ -1,3 +1,1557 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Sum
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+
+from expense_manager.models import (
+    BalanceCheckpoint,
+    BankAccount,
+    Expense,
+    ExpenseItem,
+    IdempotencyKey,
+    Item,
+    MonthlySpendRollup,
+    Tag,
+)
+from expense_manager.services import BULK_SERVICE, IDEMPOTENCY_SERVICE
+from expense_manager.services.balance import transaction_delta
+from expense_manager.services.rollup import RollupChanges, _key, aggregate_rollups
+from pet.parsers import ORJSONParser
+from pet.renderers import ORJSONRenderer
+from utils import throttling
+
+# Per-test cache: the file cache would outlive the rolled-back test data
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+API = "/api/v1"
+
+
+def rollups(user):
+    """(stored, recomputed) rollup totals of ``user``, keyed like RollupChanges."""
+    stored = {
+        _key(row): (row.total, row.count)
+        for row in MonthlySpendRollup.objects.filter(user=user, count__gt=0)
+    }
+    expected = {
+        _key(SimpleNamespace(**row)): (row["total"], row["count"])
+        for row in aggregate_rollups(Expense.objects.filter(user=user))
+    }
+    return stored, expected
+
+
+@override_settings(CACHES=LOCMEM_CACHE, THROTTLE_ENABLED=False)
+class ExpenseAPITestCase(TestCase):
+    """A user with a bank account, two tags and two items, and a client."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "alice", "alice@example.com", "password"
+        )
+        cls.account = BankAccount.objects.create(
+            user=cls.user, name="Savings", balance=Decimal("0")
+        )
+        cls.tags = [
+            Tag.objects.create(user=cls.user, tag_name=name)
+            for name in ("food", "travel")
+        ]
+        cls.items = [
+            Item.objects.create(user=cls.user, name=name) for name in ("coffee", "tea")
+        ]
+        cls.start = datetime(2025, 3, 1, 9, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_expenses(self, count, start=None):
+        """``count`` expenses an hour apart, each with both tags and items."""
+        start = start or self.start
+        offset = Expense.objects.filter(user=self.user).count()
+        expenses = []
+        for n in range(offset, offset + count):
+            moment = start + timedelta(hours=n)
+            expense = Expense.objects.create(
+                user=self.user,
+                bank_account=self.account,
+                amount=Decimal("10.00"),
+                date=moment.date(),
+                time=moment.time(),
+                transaction_date_time=moment,
+                transaction_info=f"Expense {n}",
+                transaction_type="Debit",
+            )
+            expense.tags.set(self.tags)
+            ExpenseItem.objects.bulk_create(
+                ExpenseItem(expense=expense, item=item, amount=Decimal("5.00"))
+                for item in self.items
+            )
+            expenses.append(expense)
+        return expenses
+
+    def new_expense(self, n=0):
+        moment = self.start + timedelta(days=400, minutes=n)
+        return {
+            "amount": "12.50",
+            "date": moment.date().isoformat(),
+            "time": moment.time().isoformat(),
+            "transaction_date_time": moment.isoformat(),
+            "transaction_info": f"New {n}",
+            "transaction_type": "Debit",
+            "bank_account": self.account.pk,
+            "write_tags": ["food", "snacks"],
+            "write_items": [{"name": "coffee", "amount": "12.50"}],
+        }
+
+    def assertRollupsMatch(self):
+        stored, expected = rollups(self.user)
+        self.assertEqual(stored, expected)
+
+
+class ExpenseQueryCountTests(ExpenseAPITestCase):
+    """
+    Query counts of the expense endpoints are fixed: tags and items are
+    prefetched (or aggregated) for the whole result set, never per row.
+    Each test runs against a few rows and again against many.
+    """
+
+    def assertConstantQueries(self, num, method, path, data=None, grow=30):
+        for _ in range(2):
+            with self.assertNumQueries(num):
+                response = getattr(self.client, method)(path, data, format="json")
+            self.assertLess(response.status_code, 300, response.content)
+            self.add_expenses(grow)
+        return response
+
+    def test_list(self):
+        self.add_expenses(3)
+        self.assertConstantQueries(2, "get", f"{API}/expenses/")
+
+    def test_list_cursor(self):
+        self.add_expenses(3)
+        self.assertConstantQueries(1, "get", f"{API}/expenses/?pagination=cursor")
+
+    def test_retrieve(self):
+        (expense,) = self.add_expenses(1)
+        self.assertConstantQueries(3, "get", f"{API}/expenses/{expense.pk}/")
+
+    def test_filter_by_month(self):
+        self.add_expenses(3)
+        self.assertConstantQueries(
+            1, "get", f"{API}/expenses/filter_by_month/?month=3&year=2025", grow=10
+        )
+
+    def test_filter_by_date_range_and_tags(self):
+        self.add_expenses(3)
+        tags = ",".join(str(tag.pk) for tag in self.tags)
+        path = (
+            f"{API}/expenses/filter_by_date_range_and_tags/"
+            f"?start_date=2025-03-01&end_date=2025-03-31&tags={tags}"
+        )
+        self.assertConstantQueries(1, "get", path, grow=10)
+
+    def test_filter_by_tags(self):
+        self.add_expenses(3)
+        path = f"{API}/expenses/filter_by_tags/?tags={self.tags[0].pk}"
+        self.assertConstantQueries(1, "get", path)
+
+    def test_sparse_fields(self):
+        self.add_expenses(3)
+        self.assertConstantQueries(2, "get", f"{API}/expenses/?fields=id,amount")
+        self.assertConstantQueries(2, "get", f"{API}/expenses/?fields=id,tags")
+
+    def test_export_ignores_sparse_fields(self):
+        # export writes every field itself: ?fields= must not drop the
+        # columns and prefetches it reads
+        self.add_expenses(5)
+        for query in ("", "&fields=id"):
+            with self.assertNumQueries(3):
+                response = self.client.get(
+                    f"{API}/expenses/export/?output=ndjson{query}"
+                )
+                lines = b"".join(response.streaming_content).splitlines()
+            self.assertEqual(len(lines), 5)
+
+    def test_create(self):
+        self.add_expenses(3)
+        # insert, tags/items resolved and linked in bulk, balance, ledger,
+        # rollup, and the prefetched re-read
+        with self.assertNumQueries(20):
+            response = self.client.post(
+                f"{API}/expenses/", self.new_expense(), format="json"
+            )
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_update(self):
+        (expense,) = self.add_expenses(1)
+        with self.assertNumQueries(22):
+            response = self.client.patch(
+                f"{API}/expenses/{expense.pk}/",
+                {"amount": "11.00", "write_tags": ["travel", "snacks"]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+
+class RollupTests(ExpenseAPITestCase):
+    """MonthlySpendRollup follows every write path and serves summary."""
+
+    def setUp(self):
+        super().setUp()
+        self.current = BankAccount.objects.create(
+            user=self.user, name="Current", balance=Decimal("0")
+        )
+
+    def write(self, method, path, data=None, expected=200):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(
+                f"{API}/expenses/{path}", data, format="json"
+            )
+        self.assertEqual(response.status_code, expected, response.content)
+        self.assertRollupsMatch()
+        return response.json() if response.content else None
+
+    def expected_summary(self, year, month):
+        expenses = Expense.objects.filter(
+            user=self.user, date__year=year, date__month=month
+        )
+
+        def grouped(*fields, expenses=expenses):
+            rows = expenses.values(*fields).annotate(
+                total=Sum("amount"), count=Count("id")
+            )
+            return sorted(
+                (*(row[field] for field in fields), row["total"], row["count"])
+                for row in rows
+            )
+
+        return {
+            "totals": grouped("transaction_type"),
+            "by_bank_account": grouped("bank_account", "transaction_type"),
+            "by_tag": grouped(
+                "tags",
+                "transaction_type",
+                expenses=expenses.filter(tags__isnull=False),
+            ),
+        }
+
+    def summary(self, year, month):
+        response = self.client.get(
+            f"{API}/expenses/summary/", {"year": year, "month": month}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return {
+            key: sorted(
+                (*row.values(),)[:-2] + (Decimal(row["total"]), row["count"])
+                for row in data[key]
+            )
+            for key in ("totals", "by_bank_account", "by_tag")
+        }
+
+    def test_every_write_path(self):
+        first = self.write("post", "", self.new_expense(0), 201)
+        second = self.write("post", "", self.new_expense(1), 201)
+        credit = {
+            **self.new_expense(2),
+            "transaction_type": "Credit",
+            "amount": "40.00",
+            "bank_account": self.current.pk,
+        }
+        self.write("post", "", credit, 201)
+
+        # another account, month, type and set of tags
+        moved = self.start + timedelta(days=430)
+        self.write(
+            "patch",
+            f"{first['id']}/",
+            {
+                "bank_account": self.current.pk,
+                "date": moved.date().isoformat(),
+                "transaction_date_time": moved.isoformat(),
+                "transaction_type": "Credit",
+                "write_tags": ["travel"],
+            },
+        )
+        # only the tags
+        self.write("patch", f"{second['id']}/", {"write_tags": ["food"]})
+        self.write("delete", f"{second['id']}/", expected=204)
+
+        created = self.write(
+            "post",
+            "bulk_create/",
+            [self.new_expense(n) for n in range(10, 14)],
+            201,
+        )["results"]
+        self.write(
+            "patch",
+            "bulk_update/",
+            [
+                {"id": created[0]["id"], "amount": "99.99", "write_tags": []},
+                {
+                    "id": created[1]["id"],
+                    "bank_account": self.current.pk,
+                    "transaction_type": "Credit",
+                    "write_tags": ["travel", "snacks"],
+                },
+                {"id": first["id"], "amount": "1.00"},
+            ],
+        )
+
+        month = self.start + timedelta(days=400)
+        for moment in (month, moved):
+            self.assertEqual(
+                self.summary(moment.year, moment.month),
+                self.expected_summary(moment.year, moment.month),
+            )
+        self.assertEqual(self.summary(month.year, month.month - 2)["totals"], [])
+
+
+class ExportTests(ExpenseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.expenses = self.add_expenses(3)
+        self.current = BankAccount.objects.create(
+            user=self.user, name="Current", balance=Decimal("0")
+        )
+        moment = datetime(2025, 4, 2, 18, 45, 30, 250000, tzinfo=dt_timezone.utc)
+        self.refund = Expense.objects.create(
+            user=self.user,
+            bank_account=self.current,
+            amount=Decimal("1234.50"),
+            date=moment.date(),
+            time=moment.time(),
+            transaction_date_time=moment,
+            transaction_info='Refund, "café"',
+            notes="line one\nline two; ₹",
+            transaction_type="Credit",
+        )
+
+    def export(self, **params):
+        response = self.client.get(f"{API}/expenses/export/", params)
+        self.assertEqual(response.status_code, 200)
+        output = params.get("output", "csv")
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="expenses.{output}"',
+        )
+        return response, b"".join(response.streaming_content).decode()
+
+    def csv_rows(self, **params):
+        response, body = self.export(**params)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        header, *rows = csv.reader(io.StringIO(body))
+        self.assertEqual(
+            header,
+            [
+                "id",
+                "date",
+                "time",
+                "transaction_date_time",
+                "amount",
+                "currency",
+                "transaction_type",
+                "bank_account",
+                "transaction_info",
+                "notes",
+                "tags",
+                "items",
+            ],
+        )
+        return [dict(zip(header, row)) for row in rows]
+
+    def ndjson_rows(self, **params):
+        response, body = self.export(output="ndjson", **params)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        # one JSON document per line, each ending in a newline
+        self.assertTrue(body == "" or body.endswith("\n"))
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_csv(self):
+        rows = self.csv_rows()
+        # newest first
+        self.assertEqual(
+            [int(row["id"]) for row in rows],
+            [self.refund.pk, *(e.pk for e in reversed(self.expenses))],
+        )
+        self.assertEqual(
+            rows[-1],
+            {
+                "id": str(self.expenses[0].pk),
+                "date": "2025-03-01",
+                "time": "09:00:00",
+                "transaction_date_time": "2025-03-01T09:00:00Z",
+                "amount": "10.00",
+                "currency": "INR",
+                "transaction_type": "Debit",
+                "bank_account": str(self.account.pk),
+                "transaction_info": "Expense 0",
+                "notes": "",
+                "tags": "food;travel",
+                "items": "coffee:5.00;tea:5.00",
+            },
+        )
+        refund = rows[0]
+        self.assertEqual(refund["transaction_info"], 'Refund, "café"')
+        self.assertEqual(refund["notes"], "line one\nline two; ₹")
+        self.assertEqual(
+            refund["transaction_date_time"], "2025-04-02T18:45:30.250000Z"
+        )
+        self.assertEqual((refund["tags"], refund["items"]), ("", ""))
+
+    def test_ndjson(self):
+        rows = self.ndjson_rows()
+        self.assertEqual(
+            rows[-1],
+            {
+                "id": self.expenses[0].pk,
+                "date": "2025-03-01",
+                "time": "09:00:00",
+                "transaction_date_time": "2025-03-01T09:00:00Z",
+                "amount": "10.00",
+                "currency": "INR",
+                "transaction_type": "Debit",
+                "bank_account": self.account.pk,
+                "transaction_info": "Expense 0",
+                "notes": "",
+                "tags": ["food", "travel"],
+                "items": [
+                    {"name": "coffee", "amount": "5.00"},
+                    {"name": "tea", "amount": "5.00"},
+                ],
+            },
+        )
+        refund = rows[0]
+        self.assertEqual(refund["id"], self.refund.pk)
+        self.assertEqual(refund["amount"], "1234.50")
+        self.assertEqual(refund["notes"], "line one\nline two; ₹")
+        self.assertEqual((refund["tags"], refund["items"]), ([], []))
+
+    @override_settings(TIME_ZONE="Asia/Kolkata")
+    def test_current_time_zone(self):
+        # the same rendering as the API's DateTimeField
+        detail = self.client.get(f"{API}/expenses/{self.refund.pk}/").json()
+        for rows in (self.csv_rows(), self.ndjson_rows()):
+            self.assertEqual(
+                rows[-1]["transaction_date_time"], "2025-03-01T14:30:00+05:30"
+            )
+            self.assertEqual(
+                rows[0]["transaction_date_time"], detail["transaction_date_time"]
+            )
+
+    def test_filters(self):
+        march = {"start_date": "2025-03-01", "end_date": "2025-03-31"}
+        april = {"start_date": "2025-04-01", "end_date": "2025-04-30"}
+        newest_first = self.expenses[::-1]
+        current = str(self.current.pk)
+        cases = [
+            ({}, [self.refund, *newest_first]),
+            (march, newest_first),
+            (april, [self.refund]),
+            ({"bank_account": current}, [self.refund]),
+            ({"tags": str(self.tags[1].pk)}, newest_first),
+            ({"items": str(self.items[0].pk), **march}, newest_first),
+            ({"tags": str(self.tags[0].pk), "bank_account": current}, []),
+        ]
+        for params, expected in cases:
+            with self.subTest(**params):
+                ids = [expense.pk for expense in expected]
+                csv_ids = [int(row["id"]) for row in self.csv_rows(**params)]
+                self.assertEqual(csv_ids, ids)
+                ndjson_ids = [row["id"] for row in self.ndjson_rows(**params)]
+                self.assertEqual(ndjson_ids, ids)
+
+    def test_bad_parameters(self):
+        for params in (
+            {"output": "xml"},
+            {"start_date": "2025-03-01"},
+            {"tags": "x"},
+        ):
+            response = self.client.get(f"{API}/expenses/export/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class BulkUpdateTests(ExpenseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.current = BankAccount.objects.create(
+            user=self.user, name="Current", balance=Decimal("0")
+        )
+        payload = [
+            {
+                **self.new_expense(n),
+                "write_items": [
+                    {"name": "coffee", "amount": "5.00"},
+                    {"name": "tea", "amount": "7.50"},
+                ],
+            }
+            for n in range(4)
+        ]
+        response = self.client.post(
+            f"{API}/expenses/bulk_create/", payload, format="json"
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.expenses = [row["id"] for row in response.json()["results"]]
+
+    def item_ids(self, pk):
+        return dict(
+            ExpenseItem.objects.filter(expense_id=pk).values_list(
+                "item__name", "id"
+            )
+        )
+
+    def assertBalances(self, **expected):
+        for account in (self.account, self.current):
+            account.refresh_from_db()
+            self.assertEqual(account.balance, Decimal(expected[account.name]))
+            ledger = account.ledger_entries.aggregate(total=Sum("delta"))["total"]
+            self.assertEqual(ledger or Decimal("0"), account.balance)
+
+    def test_bulk_update(self):
+        self.assertBalances(Savings="-50.00", Current="0")
+        first, second, third, fourth = self.expenses
+        kept = {pk: self.item_ids(pk) for pk in self.expenses}
+
+        response = self.client.patch(
+            f"{API}/expenses/bulk_update/",
+            [
+                # another account and amount; tea's amount changes
+                {
+                    "id": first,
+                    "bank_account": self.current.pk,
+                    "amount": "20.00",
+                    "write_items": [
+                        {"name": "coffee", "amount": "5.00"},
+                        {"name": "tea", "amount": "15.00"},
+                    ],
+                },
+                {
+                    "id": second,
+                    "bank_account": self.current.pk,
+                    "transaction_type": "Credit",
+                },
+                # the same items in another order, and other tags
+                {
+                    "id": third,
+                    "write_tags": ["travel"],
+                    "write_items": [
+                        {"name": "tea", "amount": "7.50"},
+                        {"name": "coffee", "amount": "5.00"},
+                    ],
+                },
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([row["id"] for row in response.json()], [first, second, third])
+
+        self.assertBalances(Savings="-25.00", Current="-7.50")
+        self.assertRollupsMatch()
+
+        self.assertEqual(self.item_ids(first)["coffee"], kept[first]["coffee"])
+        self.assertNotEqual(self.item_ids(first)["tea"], kept[first]["tea"])
+        self.assertEqual(
+            ExpenseItem.objects.get(pk=self.item_ids(first)["tea"]).amount,
+            Decimal("15.00"),
+        )
+        for pk in (second, third, fourth):
+            self.assertEqual(self.item_ids(pk), kept[pk])
+
+        third_tags = Expense.objects.get(pk=third).tags.values_list(
+            "tag_name", flat=True
+        )
+        self.assertEqual(list(third_tags), ["travel"])
+        first_tags = Expense.objects.get(pk=first).tags.values_list(
+            "tag_name", flat=True
+        )
+        self.assertEqual(sorted(first_tags), ["food", "snacks"])
+
+
+class KeysetPaginationTests(ExpenseAPITestCase):
+    def follow(self, path, key):
+        """ids of every page from ``path`` on, following ``key`` links."""
+        ids = []
+        while path:
+            data = self.client.get(path).json()
+            ids.append([row["id"] for row in data["results"]])
+            path = data[key]
+        return ids
+
+    def test_pages_cover_every_expense_once(self):
+        expenses = self.add_expenses(25)
+        # ties on the timestamp are ordered by id
+        Expense.objects.filter(pk__in=[e.pk for e in expenses[5:12]]).update(
+            transaction_date_time=self.start
+        )
+        ordered = list(
+            Expense.objects.order_by("-transaction_date_time", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        pages = self.follow(f"{API}/expenses/?pagination=cursor&page_size=4", "next")
+        self.assertEqual([pk for page in pages for pk in page], ordered)
+
+        # and back from the last page
+        last = self.client.get(f"{API}/expenses/?pagination=cursor&page_size=4").json()
+        while last["next"]:
+            last = self.client.get(last["next"]).json()
+        back = self.follow(last["previous"], "previous")
+        self.assertEqual(back[::-1] + [[row["id"] for row in last["results"]]], pages)
+
+    def test_deep_page_is_an_index_range(self):
+        self.add_expenses(300)
+        path = f"{API}/expenses/?pagination=cursor&page_size=100"
+        for _ in range(2):
+            path = self.client.get(path).json()["next"]
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(path)
+        (sql,) = [q["sql"] for q in ctx.captured_queries]
+
+        # The test table is small enough for a seq scan; force the index
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("EXPLAIN (ANALYZE, COSTS OFF) " + sql)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn("expense_user_tdt_idx", plan)
+        # the scan starts at the cursor instead of filtering the 200 rows
+        # before it
+        removed = [int(n) for n in re.findall(r"Rows Removed by Filter: (\d+)", plan)]
+        self.assertLessEqual(max(removed, default=0), 1, plan)
+
+
+class SearchTests(ExpenseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.refund = self.expense("Amazon refund", days=0)
+        # newest, but only its notes match
+        self.gift = self.expense("Grocery store", "amazon gift card", days=3)
+        self.prime = self.expense("Amazon Prime subscription", days=1)
+        self.prime.tags.set([self.tags[1]])
+        self.reversed = self.expense("Refund from Amazon", days=2)
+        self.expense("Coffee", "refund pending", days=2)
+
+    def expense(self, info, notes="", days=0):
+        moment = self.start + timedelta(days=days)
+        return Expense.objects.create(
+            user=self.user,
+            bank_account=self.account,
+            amount=Decimal("10.00"),
+            date=moment.date(),
+            time=moment.time(),
+            transaction_date_time=moment,
+            transaction_info=info,
+            notes=notes,
+            transaction_type="Debit",
+        )
+
+    def search(self, **params):
+        response = self.client.get(f"{API}/expenses/search/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def ids(self, **params):
+        return [row["id"] for row in self.search(**params)["results"]]
+
+    def test_transaction_info_ranks_above_notes(self):
+        results = self.search(q="amazon")["results"]
+        self.assertEqual(
+            [row["id"] for row in results],
+            # equal ranks: newest first
+            [self.reversed.pk, self.prime.pk, self.refund.pk, self.gift.pk],
+        )
+        ranks = [row["rank"] for row in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertGreater(ranks[-2], ranks[-1])
+
+    def test_websearch_syntax(self):
+        self.assertEqual(self.ids(q='"amazon refund"'), [self.refund.pk])
+        self.assertEqual(
+            set(self.ids(q="amazon -prime")),
+            {self.reversed.pk, self.refund.pk, self.gift.pk},
+        )
+        # stemmed: "refunds" finds "refund"
+        self.assertEqual(
+            set(self.ids(q="refunds amazon")), {self.refund.pk, self.reversed.pk}
+        )
+
+    def test_filters(self):
+        self.assertEqual(
+            self.ids(q="amazon", tags=str(self.tags[1].pk)), [self.prime.pk]
+        )
+        day = self.gift.date.isoformat()
+        body = self.search(q="amazon", start_date=day, end_date=day)
+        self.assertEqual([row["id"] for row in body["results"]], [self.gift.pk])
+        self.assertEqual(body["q"], "amazon")
+        other = BankAccount.objects.create(user=self.user, name="Current")
+        self.assertEqual(self.ids(q="amazon", bank_account=str(other.pk)), [])
+
+    def test_pages(self):
+        expected = self.ids(q="amazon")
+        seen, offset = [], 0
+        while offset is not None:
+            body = self.search(q="amazon", page_size=3, offset=offset)
+            seen += [row["id"] for row in body["results"]]
+            offset = body["next_offset"]
+        self.assertEqual(seen, expected)
+
+    def test_bad_parameters(self):
+        for params in (
+            {},
+            {"q": " "},
+            {"q": "amazon", "offset": "1001"},
+            {"q": "amazon", "offset": "-1"},
+            {"q": "amazon", "page_size": "x"},
+            {"q": "amazon", "start_date": "2025-03-01"},
+        ):
+            response = self.client.get(f"{API}/expenses/search/", params)
+            self.assertEqual(response.status_code, 400, params)
+        response = self.client.get(
+            f"{API}/expenses/search/", {"q": "amazon", "offset": "1001"}
+        )
+        self.assertIn("1000", response.json()["detail"])
+
+
+class AutocompleteTests(ExpenseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # coffee and tea: 3 uses each; food and travel: 3 each
+        self.add_expenses(3)
+        for name in ("coffee beans", "cold coffee", "toffee"):
+            Item.objects.create(user=self.user, name=name)
+        Tag.objects.create(user=self.user, tag_name="fast food")
+        # another user's rows never show up
+        other = get_user_model().objects.create_user("mallory")
+        Item.objects.create(user=other, name="coffee grinder")
+        Tag.objects.create(user=other, tag_name="food")
+
+    def suggest(self, path, **params):
+        response = self.client.get(f"{API}/{path}/autocomplete/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["results"]
+
+    def test_prefix_matches_come_first(self):
+        results = self.suggest("items", q="COFFE")
+        self.assertEqual(
+            [row["name"] for row in results],
+            # prefix matches (the used one first), then fuzzy ones; coffee,
+            # which both branches match, once
+            ["coffee", "coffee beans", "cold coffee"],
+        )
+        self.assertEqual([row["uses"] for row in results], [3, 0, 0])
+        self.assertEqual({row["user"] for row in results}, {self.user.pk})
+        for row in results:
+            self.assertGreater(row["similarity"], 0)
+
+    def test_typos_match_fuzzily(self):
+        results = self.suggest("items", q="cofee")
+        self.assertEqual(
+            [row["name"] for row in results],
+            ["coffee", "coffee beans", "cold coffee"],
+        )
+        similarities = [row["similarity"] for row in results]
+        self.assertEqual(similarities, sorted(similarities, reverse=True))
+
+    def test_tags(self):
+        results = self.suggest("tags", q="foo")
+        self.assertEqual(
+            [(row["tag_name"], row["uses"]) for row in results],
+            [("food", 3), ("fast food", 0)],
+        )
+        self.assertEqual(results[0]["id"], self.tags[0].pk)
+        self.assertEqual(
+            [row["tag_name"] for row in self.suggest("tags", q="t", limit=1)],
+            ["travel"],
+        )
+
+    def test_bad_parameters(self):
+        for params in (
+            {},
+            {"q": " "},
+            {"q": "co", "limit": "0"},
+            {"q": "co", "limit": "x"},
+        ):
+            response = self.client.get(f"{API}/items/autocomplete/", params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class BalanceHistoryTests(ExpenseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # through the API, which records the ledger entries
+        for n, days in enumerate((0, 40, 100)):
+            payload = self.new_expense(n)
+            moment = self.start + timedelta(days=days)
+            payload.update(
+                date=moment.date().isoformat(),
+                time=moment.time().isoformat(),
+                transaction_date_time=moment.isoformat(),
+            )
+            response = self.client.post(f"{API}/expenses/", payload, format="json")
+            self.assertEqual(response.status_code, 201, response.content)
+        self.path = f"{API}/bank_accounts/{self.account.pk}/balance_history/"
+
+    def balances(self, *values):
+        response = self.client.get(self.path, {"at": values})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [point["balance"] for point in response.json()["balances"]]
+
+    def test_balances(self):
+        self.assertEqual(
+            self.balances("2025-02-28", "2025-03-01", "2025-05-01", "2025-06-30"),
+            ["0.000", "-12.500", "-25.000", "-37.500"],
+        )
+
+    def test_far_future_creates_no_checkpoints_past_the_last_entry(self):
+        self.assertEqual(self.balances("9000-01-01"), ["-37.500"])
+        months = BalanceCheckpoint.objects.filter(bank_account=self.account)
+        # the month of the last entry, not every month up to the year 9000
+        self.assertEqual(
+            list(months.values_list("month", flat=True)), [date(2025, 6, 1)]
+        )
+        self.assertEqual(self.balances("8000-06-30", "9000-01-01"), ["-37.500"] * 2)
+        self.assertEqual(months.count(), 1)
+
+    def test_unrepresentable_dates(self):
+        for params in (
+            {"at": "9999-12-31"},
+            {"at": "0001-01-01T00:00:00+05:00"},
+            {"start": "9999-12-01", "end": "9999-12-31"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.path, params)
+                self.assertEqual(response.status_code, 400, response.content)
+
+
+class ConditionalGetTests(ExpenseAPITestCase):
+    def assertChangedAfter(self, path, method, target):
+        """``path`` answers 304 to its ETag until ``method`` on ``target``."""
+        etag = self.client.get(path)["ETag"]
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # version bumps run on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(target)
+        self.assertLess(response.status_code, 300, response.content)
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_tag_delete_changes_expense_etags(self):
+        (expense,) = self.add_expenses(1)
+        tag = f"{API}/tags/{self.tags[0].pk}/"
+        self.assertChangedAfter(f"{API}/expenses/{expense.pk}/", "delete", tag)
+        self.assertEqual(
+            self.client.get(f"{API}/expenses/{expense.pk}/").json()["tags"],
+            [self.tags[1].pk],
+        )
+
+    def test_tag_delete_changes_summary_etag(self):
+        self.add_expenses(1)
+        self.assertChangedAfter(
+            f"{API}/expenses/summary/?year=2025",
+            "delete",
+            f"{API}/tags/{self.tags[0].pk}/",
+        )
+
+    def test_item_delete_changes_expense_etags(self):
+        (expense,) = self.add_expenses(1)
+        self.assertChangedAfter(
+            f"{API}/expenses/{expense.pk}/",
+            "delete",
+            f"{API}/items/{self.items[0].pk}/",
+        )
+
+
+class StatementImportTests(ExpenseAPITestCase):
+    def import_statement(self, text, **options):
+        upload = SimpleUploadedFile("statement.csv", text.encode(), "text/csv")
+        return self.client.post(
+            f"{API}/bank_accounts/{self.account.pk}/import_statement/",
+            {"file": upload, **options},
+            format="multipart",
+        )
+
+    def test_import(self):
+        stored = self.client.post(
+            f"{API}/expenses/", self.new_expense(0), format="json"
+        ).json()
+        moment = datetime.fromisoformat(stored["transaction_date_time"])
+        statement = (
+            "date,time,transaction_info,amount,transaction_type\n"
+            "2025-04-01,10:00:00,Salary,\"1,000.00\",credit\n"
+            "2025-04-02,12:30:00,Groceries,250.50,DR\n"
+            "2025-04-03,noon,Lunch,10.00,debit\n"
+            # a stored expense, and a line repeated: both skipped
+            f"{moment:%Y-%m-%d},{moment:%H:%M:%S},New 0,12.50,debit\n"
+            "2025-04-02,12:30:00,Groceries,250.50,debit\n"
+        )
+        response = self.import_statement(statement, timezone="UTC")
+        self.assertEqual(response.status_code, 200, response.content)
+        result = response.json()
+        self.assertEqual(
+            (result["rows"], result["created"], result["skipped"], result["rejected"]),
+            (5, 2, 2, 1),
+        )
+        self.assertEqual(len(result["errors"]), 1)
+        self.assertEqual(result["errors"][0]["line"], 4)
+        self.assertIn("noon", result["errors"][0]["error"])
+        self.assertEqual(Decimal(result["balance_delta"]), Decimal("749.50"))
+
+        imported = Expense.objects.filter(user=self.user).exclude(pk=stored["id"])
+        self.assertEqual(
+            sorted(imported.values_list("transaction_info", "transaction_type")),
+            [("Groceries", "Debit"), ("Salary", "Credit")],
+        )
+        for expense in imported:
+            self.assertEqual(expense.fingerprint, expense.compute_fingerprint())
+            self.assertEqual(expense.transaction_date_time.tzinfo, dt_timezone.utc)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("737.00"))
+        self.assertEqual(
+            sorted(
+                (expense.transaction_info, expense.transaction_date_time)
+                for expense in imported
+            ),
+            sorted(
+                (entry.expense.transaction_info, entry.effective_at)
+                for entry in self.account.ledger_entries.filter(expense__in=imported)
+            ),
+        )
+        self.assertEqual(
+            sorted(self.account.ledger_entries.values_list("delta", flat=True)),
+            [Decimal("-250.50"), Decimal("-12.50"), Decimal("1000.00")],
+        )
+        self.assertRollupsMatch()
+
+        # an overlapping statement imported again changes nothing
+        response = self.import_statement(statement, timezone="UTC")
+        result = response.json()
+        self.assertEqual(
+            (result["created"], result["skipped"], result["rejected"]), (0, 4, 1)
+        )
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("737.00"))
+        self.assertEqual(self.account.ledger_entries.count(), 3)
+        self.assertRollupsMatch()
+
+
+class FingerprintTests(ExpenseAPITestCase):
+    def legacy_duplicate(self):
+        """Two identical expenses, the later without a fingerprint (pre-backfill)."""
+        original, duplicate = self.add_expenses(2)
+        Expense.objects.filter(pk=duplicate.pk).update(
+            date=original.date,
+            time=original.time,
+            transaction_date_time=original.transaction_date_time,
+            transaction_info=original.transaction_info,
+            fingerprint=None,
+        )
+        return original, duplicate
+
+    def test_legacy_duplicate_stays_editable(self):
+        original, duplicate = self.legacy_duplicate()
+        response = self.client.patch(
+            f"{API}/expenses/{duplicate.pk}/", {"notes": "checked"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        response = self.client.patch(
+            f"{API}/expenses/bulk_update/",
+            [{"id": duplicate.pk, "notes": "twice", "write_tags": ["food"]}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.notes, "twice")
+        self.assertIsNone(duplicate.fingerprint)
+
+        # a change to what the fingerprint covers is checked again
+        response = self.client.patch(
+            f"{API}/expenses/{duplicate.pk}/", {"amount": "11.00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.fingerprint, duplicate.compute_fingerprint())
+        response = self.client.patch(
+            f"{API}/expenses/{duplicate.pk}/", {"amount": "10.00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 409, response.content)
+
+    def test_values_are_normalised_before_hashing(self):
+        fields = {
+            "user": self.user,
+            "bank_account": self.account,
+            "date": "2025-01-01",
+            "time": "00:00",
+            "transaction_info": "Rent",
+            "transaction_type": "Debit",
+        }
+        expense = Expense.objects.create(
+            amount="12.5", transaction_date_time="2025-01-01T00:00Z", **fields
+        )
+        expense.refresh_from_db()
+        self.assertEqual(expense.fingerprint, expense.compute_fingerprint())
+
+        # naive: in the default time zone (UTC), so the same instant
+        with self.assertWarnsRegex(RuntimeWarning, "naive datetime"):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                Expense.objects.create(
+                    amount=Decimal("12.50"),
+                    transaction_date_time=datetime(2025, 1, 1),
+                    **fields,
+                )
+
+    def test_bulk_create_skips_duplicates(self):
+        stored = self.client.post(
+            f"{API}/expenses/", self.new_expense(0), format="json"
+        ).json()
+        payload = [self.new_expense(n) for n in (0, 1, 2, 1)]
+        response = self.client.post(
+            f"{API}/expenses/bulk_create/", payload, format="json"
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        body = response.json()
+        self.assertEqual((body["created"], body["skipped"]), (2, 2))
+        ids = [row["id"] for row in body["results"]]
+        self.assertEqual(ids[0], stored["id"])
+        self.assertEqual(ids[1], ids[3])
+        self.assertEqual(len(set(ids)), 3)
+        created = Expense.objects.get(pk=ids[2])
+        self.assertEqual(created.fingerprint, created.compute_fingerprint())
+        self.assertIsNotNone(created.created_at)
+
+
+class IdempotencyTests(ExpenseAPITestCase):
+    def post(self, data, key="key-1"):
+        return self.client.post(
+            f"{API}/expenses/", data, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_the_response(self):
+        first = self.post(self.new_expense(0))
+        retry = self.post(self.new_expense(0))
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry[IDEMPOTENCY_SERVICE.REPLAY_HEADER], "true")
+        self.assertNotIn(IDEMPOTENCY_SERVICE.REPLAY_HEADER, first)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("-12.50"))
+
+    def test_key_reused_for_another_request(self):
+        self.post(self.new_expense(0))
+        response = self.post(self.new_expense(1))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 1)
+
+    def test_failures_do_not_consume_the_key(self):
+        with mock.patch.object(
+            BULK_SERVICE, "create_expenses", side_effect=RuntimeError("down")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.post(self.new_expense(0))
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        @IDEMPOTENCY_SERVICE.idempotent
+        def unavailable(view, request):
+            Expense.objects.create(
+                user=self.user,
+                bank_account=self.account,
+                amount=Decimal("1.00"),
+                date=self.start.date(),
+                time=self.start.time(),
+                transaction_date_time=self.start,
+            )
+            return Response({"detail": "Try again."}, status=503)
+
+        request = APIRequestFactory().post(
+            "/", {"a": 1}, format="json", HTTP_IDEMPOTENCY_KEY="key-1"
+        )
+        request = Request(request, parsers=[JSONParser()])
+        request.user = self.user
+        self.assertEqual(unavailable(None, request).status_code, 503)
+        # the write and the key were rolled back together
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertFalse(Expense.objects.exists())
+
+        response = self.post(self.new_expense(0))
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(IDEMPOTENCY_SERVICE.REPLAY_HEADER, response)
+
+    def test_expired_key_is_reusable(self):
+        self.post(self.new_expense(0))
+        ttl = timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1)
+        IdempotencyKey.objects.update(created_at=F("created_at") - ttl)
+        response = self.post(self.new_expense(1))
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(IDEMPOTENCY_SERVICE.REPLAY_HEADER, response)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(IDEMPOTENCY_SERVICE.prune(), 0)
+
+
+# Values DRF's encoder has opinions about, and the spellings orjson would get
+# wrong without a fallback (non-str keys, wide integers, exponent floats)
+JSON_EDGE_CASES = {
+    "decimals": [Decimal("0"), Decimal("-12.50"), Decimal("1E+20"), Decimal("1E-7")],
+    "dates": [date(2024, 2, 29), date(1, 1, 1)],
+    "times": [dt_time(0), dt_time(23, 59, 59, 999999), dt_time(12, 30, 0, 1000)],
+    "datetimes": [
+        datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+        datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=dt_timezone.utc),
+        datetime(2024, 1, 1, tzinfo=ZoneInfo("Europe/London")),
+        datetime(2024, 7, 1, 9, 30, tzinfo=ZoneInfo("Asia/Kolkata")),
+        datetime(2024, 7, 1, 9, 30),
+    ],
+    "timedelta": timedelta(days=1, microseconds=5),
+    "uuid": uuid.UUID(int=1),
+    "floats": [0.1, 1 / 3, 1e-5, 1e16, -2.5e-8, 0.000123, 123456.789],
+    "integers": [0, -1, 2**63 - 1, 2**64, -(2**70)],
+    "strings": [
+        "",
+        "plain",
+        'quote " and \\',
+        "\n\t\x00\x1f\x7f",
+        "é中😀",
+        "\u2028 \u2029",
+    ],
+    "lazy": gettext_lazy("This field is required."),
+    "errors": {"amount": [ErrorDetail("A valid number is required.", code="invalid")]},
+    "non_str_keys": {1: "one", 2.5: "float", False: "no", None: "none"},
+    "nested": {"a": [{"b": [None, True, False, {"c": []}]}]},
+    "tuple": (1, 2),
+    "set": {3},
+}
+
+
+class ORJSONTests(SimpleTestCase):
+    """ORJSONRenderer/ORJSONParser against DRF's JSONRenderer/JSONParser."""
+
+    def parse(self, parser_class, body):
+        return parser_class().parse(io.BytesIO(body))
+
+    def test_renders_and_parses_like_drf(self):
+        cases = [(name, {name: value}) for name, value in JSON_EDGE_CASES.items()]
+        for name, payload in cases + [("all", JSON_EDGE_CASES)]:
+            with self.subTest(name):
+                body = JSONRenderer().render(payload)
+                self.assertEqual(ORJSONRenderer().render(payload), body)
+                self.assertEqual(
+                    self.parse(ORJSONParser, body), self.parse(JSONParser, body)
+                )
+
+    def test_indented_output_matches(self):
+        context = {"indent": 4}
+        self.assertEqual(
+            ORJSONRenderer().render(JSON_EDGE_CASES, renderer_context=context),
+            JSONRenderer().render(JSON_EDGE_CASES, renderer_context=context),
+        )
+
+    def test_non_finite_floats_render_as_null(self):
+        # JSONRenderer refuses them outright; see pet.renderers
+        for value in (float("nan"), float("inf"), -float("inf")):
+            with self.subTest(value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({"x": value})
+                self.assertEqual(ORJSONRenderer().render({"x": value}), b'{"x":null}')
+
+    def test_rejects_what_drf_rejects(self):
+        for body in (b'{"x": NaN}', b'{"x": Infinity}', b"{", b"\xff"):
+            with self.subTest(body):
+                with self.assertRaises(ParseError) as expected:
+                    self.parse(JSONParser, body)
+                with self.assertRaises(ParseError) as parsed:
+                    self.parse(ORJSONParser, body)
+                self.assertEqual(str(parsed.exception), str(expected.exception))
+
+
+class ExpenseRowParityTests(ExpenseAPITestCase):
+    """
+    ExpenseRowSerializer rows (list and filter_by_*) are what retrieve
+    renders through ExpenseSerializer: keys, order and formatting.
+    """
+
+    paths = (
+        "/expenses/",
+        "/expenses/?pagination=cursor",
+        "/expenses/filter_by_month/?month=3&year=2025",
+        "/expenses/filter_by_date_range_and_tags/"
+        "?start_date=2025-03-01&end_date=2025-03-31",
+        "/expenses/filter_by_tags/?tags={tags}",
+    )
+    sparse = (
+        None,
+        "id,amount,tags,items",
+        # not in layout order, and without the id
+        "bank_account,transaction_date_time,notes",
+    )
+
+    def setUp(self):
+        super().setUp()
+        first, _ = self.add_expenses(2)
+        # sorts before the others by name, not by id
+        bus = Tag.objects.create(user=self.user, tag_name="bus")
+        first.tags.add(bus)
+        ExpenseItem.objects.filter(expense=first, item=self.items[1]).update(
+            amount=Decimal("0.10")
+        )
+        moment = datetime(2025, 3, 31, 23, 59, 59, 123456, tzinfo=dt_timezone.utc)
+        Expense.objects.create(
+            user=self.user,
+            bank_account=self.account,
+            amount=Decimal("7.50"),
+            date=moment.date(),
+            time=moment.time(),
+            transaction_date_time=moment,
+            transaction_info="Refund",
+            notes="no tags",
+            transaction_type="Credit",
+        )
+        self.tag_ids = f"{bus.pk},{self.tags[0].pk}"
+        self.first_tags = [bus.pk, *(tag.pk for tag in self.tags)]
+
+    def get(self, path, fields=None):
+        if fields:
+            path += ("&" if "?" in path else "?") + f"fields={fields}"
+        response = self.client.get(API + path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def assertRowsMatchRetrieve(self):
+        for path in self.paths:
+            path = path.format(tags=self.tag_ids)
+            ids = [row["id"] for row in self.get(path)["results"]]
+            self.assertTrue(ids, path)
+            for fields in self.sparse:
+                rows = self.get(path, fields)["results"]
+                self.assertEqual(len(rows), len(ids))
+                for pk, row in zip(ids, rows):
+                    with self.subTest(path=path, fields=fields, id=pk):
+                        detail = self.get(f"/expenses/{pk}/", fields)
+                        self.assertEqual(list(row.items()), list(detail.items()))
+        # ?fields= keeps retrieve's own order, and drops nothing else
+        full = self.get(f"/expenses/{ids[0]}/")
+        detail = self.get(f"/expenses/{ids[0]}/", self.sparse[2])
+        self.assertEqual(
+            list(detail.items()),
+            [(name, value) for name, value in full.items() if name in detail],
+        )
+        self.assertEqual(set(detail), set(self.sparse[2].split(",")))
+
+    def test_rows_match_retrieve(self):
+        self.assertRowsMatchRetrieve()
+        rows = self.get("/expenses/filter_by_month/?month=3&year=2025")["results"]
+        first = next(row for row in rows if row["transaction_info"] == "Expense 0")
+        self.assertEqual(first["tags"], self.first_tags)
+        self.assertEqual(
+            [item["amount"] for item in first["items"]], ["5.00", "0.10"]
+        )
+
+    def test_rows_match_retrieve_in_another_time_zone(self):
+        with override_settings(TIME_ZONE="Asia/Kolkata"):
+            self.assertRowsMatchRetrieve()
+            rows = self.get("/expenses/")["results"]
+            self.assertIn(
+                "2025-04-01T05:29:59.123456+05:30",
+                [row["transaction_date_time"] for row in rows],
+            )
+
+
+@override_settings(METRICS_SAMPLE_RATE=1, METRICS_TOKEN="scrape")
+class MetricsTests(ExpenseAPITestCase):
+    def test_metrics_need_the_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 403)
+        with override_settings(METRICS_TOKEN=""):
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer ")
+            self.assertEqual(response.status_code, 403)
+
+    def test_sampled_requests_are_exported(self):
+        self.add_expenses(2)
+        response = self.client.get(f"{API}/expenses/")
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="queries: \d+", encode;dur=[\d.]+, app;dur=',
+        )
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        view = 'view="ExpenseViewSet.list",method="GET"'
+        self.assertIn(f'http_requests_total{{{view},status="200"}}', body)
+        self.assertIn(f"http_request_encode_duration_seconds_count{{{view}}}", body)
+        self.assertNotIn("render_duration", body)
+
+
+THROTTLE_BUCKETS = {
+    "read": {"burst": 5, "rate": "1/min"},
+    "expensive_read": {"burst": 2, "rate": "1/min"},
+}
+
+
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_BUCKETS=THROTTLE_BUCKETS)
+class ThrottlingTests(ExpenseAPITestCase):
+    def statuses(self, path, count):
+        return [self.client.get(path).status_code for _ in range(count)]
+
+    def test_scopes_have_separate_budgets(self):
+        filtered = f"{API}/expenses/filter_by_tags/?tags={self.tags[0].pk}"
+        self.assertEqual(self.statuses(filtered, 3), [200, 200, 429])
+        response = self.client.get(filtered)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "60")
+        # cheap reads are still allowed
+        self.assertEqual(self.statuses(f"{API}/expenses/", 6), [200] * 5 + [429])
+
+    def test_concurrent_requests_take_one_token_each(self):
+        barrier = threading.Barrier(20)
+
+        def take():
+            barrier.wait()
+            return throttling.take("test:bucket", 5, 60)
+
+        get = LocMemCache.get
+
+        def slow_get(*args, **kwargs):
+            # widen the window between reading and writing a bucket
+            value = get(*args, **kwargs)
+            time.sleep(0.005)
+            return value
+
+        with (
+            mock.patch.object(LocMemCache, "get", slow_get),
+            ThreadPoolExecutor(20) as pool,
+        ):
+            waits = list(pool.map(lambda _: take(), range(20)))
+        self.assertEqual(sum(wait == 0 for wait in waits), 5)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": "/nonexistent",
+            }
+        }
+    )
+    def test_refuses_non_atomic_caches(self):
+        with self.assertRaises(ImproperlyConfigured):
+            throttling.take("test:bucket", 5, 60)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, THROTTLE_ENABLED=False)
+class ConcurrentWriteTests(TransactionTestCase):
+    """
+    Writers on their own connections and transactions, as under gunicorn:
+    no deadlocks and no lost updates to balances, ledger or rollups.
+    """
+
+    writers = 50
+    operations = 6
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("bob", password=None)
+        self.accounts = [
+            BankAccount.objects.create(user=self.user, name=name, balance=0)
+            for name in ("Current", "Savings")
+        ]
+
+    def payload(self, rng, n):
+        return {
+            "amount": str(Decimal(rng.randint(100, 99999)) / 100),
+            "date": "2024-06-01",
+            "time": "12:00:00",
+            "transaction_date_time": "2024-06-01T12:00:00Z",
+            "transaction_info": f"Writer {n} {rng.random()}",
+            "transaction_type": rng.choice(["Debit", "Credit"]),
+            # one account: every writer contends for the same rows
+            "bank_account": self.accounts[0].pk,
+            "write_tags": rng.sample(["food", "rent", "fuel"], 2),
+        }
+
+    def writer(self, n, barrier):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        rng = random.Random(n)
+        mine, statuses = [], []
+        try:
+            barrier.wait()
+            for _ in range(self.operations):
+                choice = rng.random()
+                if mine and choice < 0.3:
+                    response = client.patch(
+                        f"{API}/expenses/{rng.choice(mine)}/",
+                        self.payload(rng, n),
+                        format="json",
+                    )
+                elif mine and choice < 0.4:
+                    response = client.delete(f"{API}/expenses/{mine.pop()}/")
+                elif len(mine) > 1 and choice < 0.5:
+                    response = client.patch(
+                        f"{API}/expenses/bulk_update/",
+                        [{"id": pk, **self.payload(rng, n)} for pk in mine[:2]],
+                        format="json",
+                    )
+                else:
+                    response = client.post(
+                        f"{API}/expenses/", self.payload(rng, n), format="json"
+                    )
+                    if response.status_code == 201:
+                        mine.append(response.json()["id"])
+                statuses.append(response.status_code)
+        finally:
+            connection.close()
+        return statuses
+
+    def test_parallel_writers_lose_no_updates(self):
+        barrier = threading.Barrier(self.writers)
+        with ThreadPoolExecutor(self.writers) as pool:
+            futures = [
+                pool.submit(self.writer, n, barrier) for n in range(self.writers)
+            ]
+            # a deadlock or lock error surfaces here as the view's exception
+            statuses = [status for f in futures for status in f.result()]
+        self.assertEqual(set(statuses) - {200, 201, 204}, set())
+
+        expenses = Expense.objects.filter(user=self.user)
+        for account in self.accounts:
+            account.refresh_from_db()
+            expected = sum(
+                (
+                    transaction_delta(type_, amount)
+                    for type_, amount in expenses.filter(
+                        bank_account=account
+                    ).values_list("transaction_type", "amount")
+                ),
+                Decimal("0"),
+            )
+            self.assertEqual(account.balance, expected)
+            ledger = account.ledger_entries.aggregate(total=Sum("delta"))["total"]
+            self.assertEqual(ledger or Decimal("0"), expected)
+
+        stored, expected = rollups(self.user)
+        self.assertEqual(stored, expected)
+
+    def test_concurrent_retries_write_once(self):
+        payload = self.payload(random.Random(0), 0)
+        barrier = threading.Barrier(10)
+
+        def post(_):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                return client.post(
+                    f"{API}/expenses/",
+                    payload,
+                    format="json",
+                    HTTP_IDEMPOTENCY_KEY="retry",
+                )
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(10) as pool:
+            responses = list(pool.map(post, range(10)))
+        # the others wait on the first request's key row, then replay it
+        self.assertEqual({response.status_code for response in responses}, {201})
+        self.assertEqual(len({response.content for response in responses}), 1)
+        replayed = [
+            response
+            for response in responses
+            if IDEMPOTENCY_SERVICE.REPLAY_HEADER in response
+        ]
+        self.assertEqual(len(replayed), 9)
+
+        expense = Expense.objects.get(user=self.user)
+        account = self.accounts[0]
+        account.refresh_from_db()
+        delta = transaction_delta(expense.transaction_type, expense.amount)
+        self.assertEqual(account.balance, delta)
+        self.assertEqual(
+            list(account.ledger_entries.values_list("delta", flat=True)), [delta]
+        )
+
+    def test_rollup_locks_only_the_changed_keys(self):
+        expenses = [
+            Expense.objects.create(
+                user=self.user,
+                bank_account=account,
+                amount=Decimal("5.00"),
+                date=date(2024, 6, 1),
+                time=datetime.min.time(),
+                transaction_date_time=datetime(2024, 6, 1, tzinfo=dt_timezone.utc),
+                transaction_type="Debit",
+            )
+            for account in self.accounts
+        ]
+        with transaction.atomic():
+            changes = RollupChanges()
+            for expense in expenses:
+                changes.add(expense, [])
+            changes.save()
+
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_first_account():
+            try:
+                with transaction.atomic():
+                    changes = RollupChanges()
+                    changes.add(expenses[0], [])
+                    changes.save()
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(1) as pool:
+            holder = pool.submit(hold_first_account)
+            self.assertTrue(locked.wait(10))
+            try:
+                # same user and month, other account: must not wait
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '2s'")
+                    changes = RollupChanges()
+                    changes.add(expenses[1], [])
+                    changes.save()
+            finally:
+                release.set()
+            holder.result()
+        self.assertEqual(
+            sorted(
+                MonthlySpendRollup.objects.values_list("bank_account_id", "count")
+            ),
+            sorted((account.pk, 2) for account in self.accounts),
+        )
@@ -1,5 +1,13 @@
+from django.conf import settings
 from rest_framework.routers import DefaultRouter
-from expense_manager.views import EXPENSE_VIEW, TAG_VIEW, BANK_ACCOUNT_VIEW, ITEM_VIEW
+from expense_manager.views import (
+    EXPENSE_VIEW,
+    TAG_VIEW,
+    BANK_ACCOUNT_VIEW,
+    ITEM_VIEW,
+    ASYNC_READ_VIEW,
+)
+from utils.async_views import asyncify_urls
 
 router = DefaultRouter()
 router.register(r"tags", TAG_VIEW.TagViewSet, basename="tag")
@@ -10,3 +18,7 @@ router.register(
 router.register(r"items", ITEM_VIEW.ItemViewSet, basename="item")
 
 urlpatterns = router.urls
+
+if settings.ASYNC_READ_VIEWS:
+    # ASGI deployment: read-heavy actions run on the event loop
+    urlpatterns = asyncify_urls(urlpatterns, ASYNC_READ_VIEW.IMPLEMENTATIONS)
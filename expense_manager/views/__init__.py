@@ -2,3 +2,4 @@ from . import expense as EXPENSE_VIEW
 from . import tag as TAG_VIEW
 from . import bank_account as BANK_ACCOUNT_VIEW
 from . import item as ITEM_VIEW
+from . import async_read as ASYNC_READ_VIEW
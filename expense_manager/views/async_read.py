@@ -0,0 +1,158 @@
+"""
+Async versions of the read-heavy viewset actions, used when the app is
+served over ASGI (settings.ASYNC_READ_VIEWS). They reuse the viewsets'
+querysets, validation, serializers and paginators and only swap the
+blocking I/O for the async ORM/cache API; see utils.async_views.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404
+from rest_framework import status
+from rest_framework.response import Response
+
+from expense_manager.filters import filter_expenses
+from expense_manager.services import AUTOCOMPLETE_SERVICE
+from expense_manager.views import BANK_ACCOUNT_VIEW, EXPENSE_VIEW, ITEM_VIEW, TAG_VIEW
+from utils.pagination import KeysetPagination
+
+
+async def fetch(queryset):
+    # prefetch_related lookups run as part of the async iteration
+    return [obj async for obj in queryset]
+
+
+async def paginate(view, queryset):
+    """view.paginate_queryset(); keyset pages natively async."""
+    paginator = view.paginator
+    if paginator is None:
+        return None
+    if isinstance(paginator, KeysetPagination):
+        return await paginator.apaginate_queryset(queryset, view.request, view=view)
+    # page-number pagination drives Django's sync Paginator: run it in a thread
+    return await sync_to_async(view.paginate_queryset)(queryset)
+
+
+# ------- Expenses -------
+async def expense_list_payload(view, queryset):
+    """Async ExpenseViewSet._list_payload()."""
+    if view.cursor_pagination_requested():
+        page = await paginate(view, queryset)
+        serializer = view.get_serializer(page, many=True)
+        return view.paginator.get_paginated_data(serializer.data)
+
+    serializer = view.get_serializer(await fetch(queryset), many=True)
+    return {"count": len(serializer.data), "results": serializer.data}
+
+
+async def list_view(view, request, *args, **kwargs):
+    queryset = view.filter_queryset(view.get_queryset())
+    page = await paginate(view, queryset)
+    if page is not None:
+        serializer = view.get_serializer(page, many=True)
+        return view.get_paginated_response(serializer.data)
+    serializer = view.get_serializer(await fetch(queryset), many=True)
+    return Response(serializer.data)
+
+
+async def retrieve_view(view, request, *args, **kwargs):
+    queryset = view.filter_queryset(view.get_queryset())
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    try:
+        instance = await queryset.aget(
+            **{view.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+    except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+        raise Http404
+    view.check_object_permissions(request, instance)
+    return Response(view.get_serializer(instance).data)
+
+
+async def expense_filter_by_month(view, request, *args, **kwargs):
+    expenses, params = view.filter_by_month_query(request)
+    return Response(
+        {**params, **await expense_list_payload(view, expenses)},
+        status=status.HTTP_200_OK,
+    )
+
+
+async def expense_filter_by_date_range_and_tags(view, request, *args, **kwargs):
+    expenses, applied = filter_expenses(view.get_queryset(), request.query_params)
+    return Response(
+        {**await expense_list_payload(view, expenses), **applied},
+        status=status.HTTP_200_OK,
+    )
+
+
+async def expense_filter_by_tags(view, request, *args, **kwargs):
+    expenses, params = view.filter_by_tags_query(request)
+    return Response(
+        {**params, **await expense_list_payload(view, expenses)},
+        status=status.HTTP_200_OK,
+    )
+
+
+async def expense_search(view, request, *args, **kwargs):
+    expenses, params, page_size, offset = view.search_query(request)
+    page = await fetch(expenses[offset : offset + page_size + 1])
+    return Response(
+        {**params, **view._search_payload(page, page_size, offset)},
+        status=status.HTTP_200_OK,
+    )
+
+
+# ------- Reference lists (CachedListMixin) -------
+async def cached_list(view, request, build):
+    """Async CachedListMixin.list(); ``build`` returns the response data."""
+    key = view.list_cache_key(request)
+    data = await cache.aget(key)
+    if data is None:
+        data = await build(view, request)
+        await cache.aset(key, data, timeout=view.cache_timeout)
+    return Response(data)
+
+
+async def build_tag_list(view, request):
+    # same shape as TagViewSet.build_list_response()
+    rows = await fetch(view.filter_queryset(view.get_queryset()))
+    data = view.get_serializer(rows, many=True).data
+    return {"count": len(data), "next": None, "previous": None, "results": data}
+
+
+async def build_plain_list(view, request):
+    response = await list_view(view, request)
+    return response.data
+
+
+async def tag_list(view, request, *args, **kwargs):
+    return await cached_list(view, request, build_tag_list)
+
+
+async def plain_cached_list(view, request, *args, **kwargs):
+    return await cached_list(view, request, build_plain_list)
+
+
+# ------- Autocomplete (items and tags) -------
+async def autocomplete(view, request, *args, **kwargs):
+    rows, term = view.autocomplete_query(request)
+    rows = await fetch(rows)
+    data = view.get_serializer(rows, many=True).data
+    return Response(
+        AUTOCOMPLETE_SERVICE.payload(term, rows, data), status=status.HTTP_200_OK
+    )
+
+
+IMPLEMENTATIONS = {
+    EXPENSE_VIEW.ExpenseViewSet: {
+        "list": list_view,
+        "retrieve": retrieve_view,
+        "filter_by_month": expense_filter_by_month,
+        "filter_by_date_range_and_tags": expense_filter_by_date_range_and_tags,
+        "filter_by_tags": expense_filter_by_tags,
+        "search": expense_search,
+    },
+    TAG_VIEW.TagViewSet: {"list": tag_list, "autocomplete": autocomplete},
+    ITEM_VIEW.ItemViewSet: {"list": plain_cached_list, "autocomplete": autocomplete},
+    BANK_ACCOUNT_VIEW.BankAccountViewSet: {"list": plain_cached_list},
+}
@@ -1,17 +1,194 @@
-from rest_framework import viewsets, permissions
+import io
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import viewsets, permissions, serializers, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
 
 from expense_manager.models import BankAccount
-from expense_manager.serializers import BANK_ACCOUNT_SERIALIZER
+from expense_manager.serializers import (
+    BANK_ACCOUNT_SERIALIZER,
+    STATEMENT_IMPORT_SERIALIZER,
+)
+from expense_manager.services import LEDGER_SERVICE, STATEMENT_SERVICE
+from utils.cache import CachedListMixin, ConditionalGetMixin
 
 
-class BankAccountViewSet(viewsets.ModelViewSet):
+class BankAccountViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     serializer_class = BANK_ACCOUNT_SERIALIZER.BankAccountSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_scopes = ("bank_accounts",)
+    throttle_scopes = {
+        "balance_history": "expensive_read",
+        "import_statement": "bulk_write",
+    }
+    max_history_points = 50
+    max_history_days = 366
+    # same rendering as BankAccount.balance
+    balance_field = serializers.DecimalField(max_digits=14, decimal_places=3)
+
+    def get_cache_scopes(self):
+        if self.action == "balance_history":
+            # the ledger changes with expenses even when the balance doesn't
+            return ("bank_accounts", "expenses")
+        return self.cache_scopes
 
     def get_queryset(self):
         # Return only bank accounts belonging to the authenticated user
-        return BankAccount.objects.filter(user=self.request.user).order_by("name")
+        accounts = BankAccount.objects.filter(user_id=self.request.user.id).order_by(
+            "name"
+        )
+        return self.serializer_class.sparse_queryset(accounts, self.request)
 
     def perform_create(self, serializer):
         # Automatically set the user to the logged-in user
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
+
+    # ------- Balance History -------
+    @staticmethod
+    def parse_moment(value):
+        """
+        'at' value -> (aware datetime, inclusive). A bare date means the end
+        of that day, i.e. everything before the next day starts.
+        """
+        day = parse_date(value)
+        try:
+            if day is not None:
+                moment = datetime.combine(day + timedelta(days=1), time.min)
+                inclusive = False
+            else:
+                moment = parse_datetime(value)
+                inclusive = True
+                if moment is None:
+                    raise ValueError(value)
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            # the ledger works in UTC: reject what it cannot represent
+            moment.astimezone(dt_timezone.utc)
+        except OverflowError:
+            raise ValueError(value)
+        return moment, inclusive
+
+    @action(detail=True, methods=["get"], url_path="balance_history")
+    def balance_history(self, request, pk=None):
+        """
+        Past balances, read from the balance ledger and its monthly checkpoints.
+        Query parameters, either:
+          at: ISO datetime, or YYYY-MM-DD for the end of that day (repeatable)
+          start, end: YYYY-MM-DD, closing balance of every day in between
+        Example: /api/v1/bank_accounts/3/balance_history/?at=2025-03-31
+        """
+        account = self.get_object()
+        params = request.query_params
+
+        if "at" in params:
+            values = params.getlist("at")
+            if len(values) > self.max_history_points:
+                return Response(
+                    {"detail": f"At most {self.max_history_points} 'at' values."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            points = []
+            for value in values:
+                try:
+                    moment, inclusive = self.parse_moment(value)
+                except ValueError:
+                    return Response(
+                        {"detail": f"Invalid 'at' value: {value}."},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                balance = LEDGER_SERVICE.balance_at(account.id, moment, inclusive)
+                balance = self.balance_field.to_representation(balance)
+                points.append({"at": value, "balance": balance})
+            return Response({"bank_account": account.id, "balances": points})
+
+        try:
+            start = parse_date(params.get("start") or "")
+            end = parse_date(params.get("end") or "")
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response(
+                {"detail": "Provide 'at', or 'start' and 'end' as YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if end < start or (end - start).days >= self.max_history_days:
+            return Response(
+                {
+                    "detail": "end must not precede start and the range may span "
+                    f"at most {self.max_history_days} days."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            series = LEDGER_SERVICE.daily_balances(account.id, start, end)
+        except OverflowError:
+            return Response(
+                {"detail": "start and end must be representable dates."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {
+                "bank_account": account.id,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "balances": [
+                    {
+                        "date": day.isoformat(),
+                        "balance": self.balance_field.to_representation(balance),
+                    }
+                    for day, balance in series
+                ],
+            }
+        )
+
+    # ------- Statement Import -------
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="import_statement",
+        parser_classes=[MultiPartParser],
+    )
+    def import_statement(self, request, pk=None):
+        """
+        Import a CSV bank statement into this account (multipart upload).
+        Form fields:
+            - file - Required, the CSV statement with a header row
+            - amount_column, date_column, time_column, transaction_info_column,
+              transaction_type_column - Optional, header of each field
+              (defaults to the field name; time, info and type may be absent)
+            - debit_column, credit_column - Optional, instead of an amount column
+            - date_format (default %Y-%m-%d), time_format (default %H:%M:%S),
+              delimiter, timezone, currency, encoding - Optional
+        Valid rows are imported in one transaction; rejected rows are
+        reported by line number, rows identical to a stored expense are
+        counted as skipped.
+        """
+        account = self.get_object()
+        options = STATEMENT_IMPORT_SERIALIZER.StatementImportSerializer(
+            data=request.data
+        )
+        options.is_valid(raise_exception=True)
+        upload = options.validated_data.get("file")
+        if upload is None:
+            return Response(
+                {"detail": "file is required."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines = io.TextIOWrapper(
+            upload.file, encoding=options.validated_data["encoding"], newline=""
+        )
+        try:
+            result = STATEMENT_SERVICE.import_statement(
+                account, lines, options.statement_format()
+            )
+        except (STATEMENT_SERVICE.StatementImportError, UnicodeDecodeError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"bank_account": account.id, **result.as_dict()},
+            status=status.HTTP_200_OK,
+        )
@@ -1,12 +1,41 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
-from django.db import transaction
-from django.db.models import Q
-from datetime import datetime
-
-from expense_manager.models import Expense
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.http import StreamingHttpResponse
+from datetime import date
+
+from expense_manager.filters import filter_expenses, has_any_tag, parse_id_list
+from expense_manager.models import (
+    FINGERPRINT_CONSTRAINT,
+    SEARCH_CONFIG,
+    Expense,
+    MonthlySpendRollup,
+)
 from expense_manager.serializers import EXPENSE_SERIALIZER
+from expense_manager.services import (
+    BALANCE_SERVICE,
+    BULK_SERVICE,
+    EXPORT_SERVICE,
+    IDEMPOTENCY_SERVICE,
+    ROLLUP_SERVICE,
+)
+from utils.cache import ConditionalGetMixin
+from utils.common_serializer import sparse_fields
+from utils.pagination import KeysetPagination
+
+
+def duplicate_response(exc):
+    """409 for an edit that makes an expense identical to another one."""
+    if FINGERPRINT_CONSTRAINT not in str(exc):
+        raise exc
+    return Response(
+        {"detail": "An identical expense already exists."},
+        status=status.HTTP_409_CONFLICT,
+    )
 
 
 class IsOwner(permissions.BasePermission):
@@ -15,127 +44,184 @@ class IsOwner(permissions.BasePermission):
         return isinstance(obj, Expense) and obj.user_id == request.user.id
 
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = EXPENSE_SERIALIZER.ExpenseSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+    cursor_pagination_class = KeysetPagination
+    # responses embed item names and tag ids (summary: per-tag totals), so
+    # renaming an item or deleting a tag, which cascades to the expense's
+    # links and rollups, changes them too
+    cache_scopes = ("expenses", "items", "tags")
+
+    # Actions that rewrite the rows they read: lock them for the transaction
+    locking_actions = ("update", "partial_update", "destroy", "bulk_update")
+
+    # Read-only list actions: served from values() rows by
+    # ExpenseRowSerializer instead of model instances
+    row_actions = (
+        "list",
+        "filter_by_month",
+        "filter_by_date_range_and_tags",
+        "filter_by_tags",
+    )
+
+    # Actions whose output is the serializer's: only they narrow the columns
+    # and prefetches they load to ?fields= (see sparse_fields()). The others,
+    # export above all, read every field of full rows
+    sparse_actions = ("retrieve", "search", *row_actions)
+
+    # Throttling scopes (see utils.throttling) of actions that cost more
+    # than the default "read"/"write"
+    throttle_scopes = {
+        "filter_by_month": "expensive_read",
+        "filter_by_date_range_and_tags": "expensive_read",
+        "filter_by_tags": "expensive_read",
+        "search": "expensive_read",
+        "export": "expensive_read",
+        "bulk_create": "bulk_write",
+        "bulk_update": "bulk_write",
+    }
+
+    # search action: results per request and deepest reachable offset
+    search_page_size = 20
+    search_max_page_size = 100
+    search_max_offset = 1000
 
     def get_queryset(self):
-        return Expense.objects.filter(user=self.request.user)
+        # search_vector is only read in SQL; don't ship it with every row
+        queryset = Expense.objects.filter(user_id=self.request.user.id).defer(
+            "search_vector"
+        )
+        if self.action in self.locking_actions:
+            # Only the expense rows; balances are adjusted with F() updates
+            queryset = queryset.select_for_update(of=("self",))
+        fields = None
+        if self.action in self.sparse_actions:
+            fields = sparse_fields(self.request)
+        return self.get_serializer_class().setup_eager_loading(queryset, fields)
+
+    def get_serializer_class(self):
+        # the schema keeps describing ExpenseSerializer, the same output
+        if self.action in self.row_actions and not getattr(
+            self, "swagger_fake_view", False
+        ):
+            return EXPENSE_SERIALIZER.ExpenseRowSerializer
+        return self.serializer_class
+
+    # ------- Pagination -------
+    def cursor_pagination_requested(self):
+        """
+        Cursor (keyset) mode is opt-in: ?pagination=cursor, or any request
+        that carries a cursor from a previous page.
+        """
+        params = self.request.query_params
+        return (
+            params.get("pagination") == "cursor"
+            or self.cursor_pagination_class.cursor_query_param in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.cursor_pagination_requested():
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def _list_payload(self, queryset):
+        """
+        Results block for the filter_by_* actions: keyset-paginated in cursor
+        mode, otherwise every matching row as before.
+        """
+        if self.cursor_pagination_requested():
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(page, many=True)
+            return self.paginator.get_paginated_data(serializer.data)
 
+        serializer = self.get_serializer(queryset, many=True)
+        return {"count": len(serializer.data), "results": serializer.data}
+
+    # Writes honour an Idempotency-Key header (partial_update goes through
+    # update): a retry replays the stored response instead of re-running
+    @IDEMPOTENCY_SERVICE.idempotent
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Save the expense with the authenticated user
-        expense = serializer.save(user=request.user)
-
-        # Adjust bank account balance
-        bank_account = expense.bank_account
-        amount = expense.amount
-        transaction_type = expense.transaction_type
-
-        if transaction_type == "Debit":
-            bank_account.balance = (bank_account.balance or 0) - amount
-        elif transaction_type == "Credit":
-            bank_account.balance = (bank_account.balance or 0) + amount
-
-        bank_account.save()
-
-        headers = self.get_success_headers(serializer.data)
-        return Response(
-            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+        # Same path as bulk_create: the row is inserted unless an identical
+        # expense exists (fingerprint), and balance/rollup follow the insert.
+        # A repeated POST answers 200 with the stored expense.
+        expenses, created = BULK_SERVICE.create_expenses(
+            request.user.id, [serializer.validated_data]
         )
+        expense = self.get_queryset().get(pk=expenses[0].pk)
+        data = self.get_serializer(expense).data
+        if not created:
+            return Response(data, status=status.HTTP_200_OK)
+
+        headers = self.get_success_headers(data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @IDEMPOTENCY_SERVICE.idempotent
     @transaction.atomic
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop("partial", False)
+        # Row-locked (see get_queryset), so the values reversed below are
+        # the ones this transaction overwrites
         instance = self.get_object()
 
-        # Store original values
-        original_amount = instance.amount
-        original_transaction_type = instance.transaction_type
-        original_bank_account = instance.bank_account
+        # Reverse the original effect; the new one is added after saving.
+        # Covers both the same and a changed bank account.
+        balance = BALANCE_SERVICE.BalanceChanges()
+        balance.remove(instance)
+        rollup = ROLLUP_SERVICE.RollupChanges()
+        rollup.remove(instance, [tag.id for tag in instance.tags.all()])
 
         # Apply updates
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        expense = serializer.save()
-
-        # Get new values
-        new_amount = expense.amount
-        new_transaction_type = expense.transaction_type
-        new_bank_account = expense.bank_account
-
-        # Check if bank account changed
-        if original_bank_account.id == new_bank_account.id:
-            # Case A: Same bank account - reverse original and apply new
-            bank_account = original_bank_account
-
-            # Reverse original effect
-            if original_transaction_type == "Debit":
-                bank_account.balance = (bank_account.balance or 0) + original_amount
-            elif original_transaction_type == "Credit":
-                bank_account.balance = (bank_account.balance or 0) - original_amount
-
-            # Apply new effect
-            if new_transaction_type == "Debit":
-                bank_account.balance = (bank_account.balance or 0) - new_amount
-            elif new_transaction_type == "Credit":
-                bank_account.balance = (bank_account.balance or 0) + new_amount
-
-            bank_account.save()
-        else:
-            # Case B: Bank account changed - reverse on old, apply on new
-            # Reverse on original bank account
-            if original_transaction_type == "Debit":
-                original_bank_account.balance = (
-                    original_bank_account.balance or 0
-                ) + original_amount
-            elif original_transaction_type == "Credit":
-                original_bank_account.balance = (
-                    original_bank_account.balance or 0
-                ) - original_amount
-            original_bank_account.save()
-
-            # Apply on new bank account
-            if new_transaction_type == "Debit":
-                new_bank_account.balance = (new_bank_account.balance or 0) - new_amount
-            elif new_transaction_type == "Credit":
-                new_bank_account.balance = (new_bank_account.balance or 0) + new_amount
-            new_bank_account.save()
+        try:
+            expense = serializer.save()
+        except IntegrityError as exc:
+            return duplicate_response(exc)
+        balance.add(expense)
+        balance.save()
+
+        rollup.add(expense, expense.tags.values_list("id", flat=True))
+        rollup.save()
 
         return Response(serializer.data)
 
+    @IDEMPOTENCY_SERVICE.idempotent
     @transaction.atomic
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
 
-        # Store values before deletion
-        bank_account = instance.bank_account
-        amount = instance.amount
-        transaction_type = instance.transaction_type
-
         # Reverse the transaction effect on balance
-        if transaction_type == "Debit":
-            bank_account.balance = (bank_account.balance or 0) + amount
-        elif transaction_type == "Credit":
-            bank_account.balance = (bank_account.balance or 0) - amount
+        balance = BALANCE_SERVICE.BalanceChanges()
+        balance.remove(instance)
+        balance.save()
 
-        bank_account.save()
+        rollup = ROLLUP_SERVICE.RollupChanges()
+        rollup.remove(instance, [tag.id for tag in instance.tags.all()])
+        rollup.save()
 
         # Delete the expense
         instance.delete()
-
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_create(self, serializer):
         # This method is no longer used since we override create()
         # Keeping it for backward compatibility if needed
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
 
     # ------- Bulk Create -------
     @action(detail=False, methods=["post"], url_path="bulk_create")
+    @IDEMPOTENCY_SERVICE.idempotent
     def bulk_create(self, request):
         many = isinstance(request.data, list)
         if not many:
@@ -147,22 +233,30 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data, many=True)
         serializer.is_valid(raise_exception=True)
 
-        created_instances = []
-        # Can't use bulk_create due to M2M; create one-by-one safely
+        # Tags/items are resolved for the whole payload, rows and M2M links
+        # are bulk inserted, and balances get one UPDATE per account. Rows
+        # identical to a stored expense (or to an earlier row) are skipped.
         with transaction.atomic():
-            for item in serializer.validated_data:
-                tag_names = item.pop("tags", [])
-                exp = Expense.objects.create(user=request.user, **item)
-                if tag_names:
-                    tags = serializer._get_or_create_tags(tag_names, request.user)
-                    exp.tags.set(tags)
-                created_instances.append(exp)
+            expenses, created = BULK_SERVICE.create_expenses(
+                request.user.id, serializer.validated_data
+            )
 
-        out = self.get_serializer(created_instances, many=True)
-        return Response(out.data, status=status.HTTP_201_CREATED)
+        # Re-read with prefetching so the response costs a fixed number of queries
+        by_id = self.get_queryset().in_bulk([expense.id for expense in expenses])
+        out = self.get_serializer([by_id[e.id] for e in expenses], many=True)
+        return Response(
+            {
+                "created": len(created),
+                "skipped": len(expenses) - len(created),
+                "results": out.data,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
     # ------- Bulk Update -------
     @action(detail=False, methods=["put", "patch"], url_path="bulk_update")
+    @IDEMPOTENCY_SERVICE.idempotent
+    @transaction.atomic
     def bulk_update(self, request):
         if not isinstance(request.data, list):
             return Response(
@@ -178,31 +272,103 @@ class ExpenseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        qs = self.get_queryset().filter(id__in=ids)
+        # Lock in id order so overlapping bulk updates cannot deadlock
+        qs = self.get_queryset().filter(id__in=ids).order_by("id")
         existing_by_id = {obj.id: obj for obj in qs}
 
-        updated = []
-        partial = request.method.lower() == "patch"
-        with transaction.atomic():
-            for payload in request.data:
-                obj_id = payload.get("id")
-                instance = existing_by_id.get(obj_id)
-                if not instance:
-                    # ignore or report? Here we choose to report missing id
-                    return Response(
-                        {"detail": f"Expense id {obj_id} not found or not yours."},
-                        status=status.HTTP_404_NOT_FOUND,
-                    )
-                serializer = self.get_serializer(
-                    instance, data=payload, partial=partial
+        if len(set(ids)) != len(ids):
+            return Response(
+                {"detail": "Each id may appear only once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Report a missing id up front
+        for payload in request.data:
+            obj_id = payload.get("id")
+            if obj_id not in existing_by_id:
+                return Response(
+                    {"detail": f"Expense id {obj_id} not found or not yours."},
+                    status=status.HTTP_404_NOT_FOUND,
                 )
-                serializer.is_valid(raise_exception=True)
-                serializer.save()  # tags handled in serializer.update
-                updated.append(instance)
 
-        out = self.get_serializer(updated, many=True)
+        # Validate every entry in one pass before writing anything
+        instances = [existing_by_id[payload.get("id")] for payload in request.data]
+        serializer = self.get_serializer(
+            instances,
+            data=request.data,
+            many=True,
+            partial=request.method.lower() == "patch",
+        )
+        serializer.is_valid(raise_exception=True)
+        updates = list(zip(instances, serializer.validated_data))
+
+        try:
+            updated = BULK_SERVICE.update_expenses(request.user.id, updates)
+        except IntegrityError as exc:
+            return duplicate_response(exc)
+
+        # Re-read with prefetching so tags/items reflect the new state
+        by_id = self.get_queryset().in_bulk([expense.id for expense in updated])
+        out = self.get_serializer([by_id[e.id] for e in updated], many=True)
         return Response(out.data, status=status.HTTP_200_OK)
 
+    # ------- Monthly Summary -------
+    @action(detail=False, methods=["get"], url_path="summary")
+    def summary(self, request):
+        """
+        Spend totals read from the monthly rollup, not from the expenses.
+        Query parameters: year (YYYY), month (1-12, optional: whole year if omitted)
+        Example: /api/v1/expenses/summary/?year=2025&month=11
+        """
+        try:
+            year = int(request.query_params.get("year"))
+            month_param = request.query_params.get("month")
+            month = int(month_param) if month_param else None
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "year is required and year/month must be integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if month is not None and not (1 <= month <= 12):
+            return Response(
+                {"detail": "month must be between 1 and 12."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rollups = MonthlySpendRollup.objects.filter(user_id=request.user.id, year=year)
+        if month is not None:
+            rollups = rollups.filter(month=month)
+        rollups = rollups.filter(count__gt=0).order_by()
+
+        def grouped(queryset, *fields):
+            rows = queryset.values(*fields).annotate(
+                sum_total=Sum("total"), sum_count=Sum("count")
+            )
+            return [
+                {
+                    **{field: row[field] for field in fields},
+                    "total": str(row["sum_total"]),
+                    "count": row["sum_count"],
+                }
+                for row in rows.order_by(*fields)
+            ]
+
+        # tag=NULL rows hold the all-tags totals; tagged rows are per tag
+        all_tags = rollups.filter(tag__isnull=True)
+        data = {
+            "year": year,
+            "month": month,
+            "totals": grouped(all_tags, "transaction_type"),
+            "by_bank_account": grouped(all_tags, "bank_account", "transaction_type"),
+            "by_tag": grouped(
+                rollups.filter(tag__isnull=False), "tag", "transaction_type"
+            ),
+        }
+        if month is None:
+            data["by_month"] = grouped(all_tags, "month", "transaction_type")
+        return Response(data, status=status.HTTP_200_OK)
+
     # ------- Filter by Month -------
     @action(detail=False, methods=["get"], url_path="filter_by_month")
     def filter_by_month(self, request):
@@ -210,41 +376,40 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         Filter expenses by month and year.
         Query parameters: month (1-12), year (YYYY)
         Example: /api/v1/expenses/filter_by_month/?month=11&year=2025
+        Add pagination=cursor (optionally page_size, count=true) for keyset pages.
         """
+        expenses, params = self.filter_by_month_query(request)
+        return Response(
+            {**params, **self._list_payload(expenses)},
+            status=status.HTTP_200_OK,
+        )
+
+    def filter_by_month_query(self, request):
+        """(expenses, echoed params) for filter_by_month; runs no queries."""
         try:
             month = int(request.query_params.get("month"))
             year = int(request.query_params.get("year"))
         except (TypeError, ValueError):
-            return Response(
-                {
-                    "detail": "month and year parameters are required and must be integers."
-                },
-                status=status.HTTP_400_BAD_REQUEST,
+            raise ParseError(
+                "month and year parameters are required and must be integers."
             )
 
         # Validate month range
         if not (1 <= month <= 12):
-            return Response(
-                {"detail": "month must be between 1 and 12."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            raise ParseError("month must be between 1 and 12.")
 
-        # Filter expenses for the given month and year
+        # Filter expenses for the given month and year as a plain date range
+        # so the (user, date) index is used instead of EXTRACT(month ...)
+        try:
+            month_start = date(year, month, 1)
+            month_end = date(year + month // 12, month % 12 + 1, 1)
+        except ValueError:
+            raise ParseError("year is out of range.")
         expenses = self.get_queryset().filter(
-            date__year=year,
-            date__month=month,
-        )
-
-        serializer = self.get_serializer(expenses, many=True)
-        return Response(
-            {
-                "month": month,
-                "year": year,
-                "count": expenses.count(),
-                "results": serializer.data,
-            },
-            status=status.HTTP_200_OK,
+            date__gte=month_start,
+            date__lt=month_end,
         )
+        return expenses, {"month": month, "year": year}
 
     # ------- Filter by Date Range -------
     @action(detail=False, methods=["get"], url_path="filter_by_date_range_and_tags")
@@ -269,149 +434,42 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             - By bank account only: /api/v1/expenses/filter_by_date_range_and_tags/?bank_account=5
             - By items only: /api/v1/expenses/filter_by_date_range_and_tags/?items=1,2,3
             - All combined: /api/v1/expenses/filter_by_date_range_and_tags/?start_date=2025-01-01&end_date=2025-11-30&tags=1,2,3&bank_account=5&items=1,2
+        Add pagination=cursor (optionally page_size, count=true) for keyset pages.
         """
-        start_date_str = request.query_params.get("start_date")
-        end_date_str = request.query_params.get("end_date")
-        tags_param = request.query_params.get("tags")
-        bank_account_param = request.query_params.get("bank_account")
-        items_param = request.query_params.get("items")
+        expenses, applied = filter_expenses(self.get_queryset(), request.query_params)
 
-        # Check if any filter is provided
-        date_provided = bool(start_date_str or end_date_str)
-
-        # If any date is provided, both dates are required
-        if date_provided and not (start_date_str and end_date_str):
-            return Response(
-                {"detail": "If start_date or end_date is provided, both are required."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        # Include applied filters in response
+        response_data = {**self._list_payload(expenses), **applied}
+        return Response(response_data, status=status.HTTP_200_OK)
 
-        # At least one filter must be provided
-        if (
-            not date_provided
-            and not tags_param
-            and not bank_account_param
-            and not items_param
-        ):
+    # ------- Export -------
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Stream the user's expenses as CSV or NDJSON.
+        Query parameters:
+            - output (csv | ndjson) - Optional, defaults to csv
+            - start_date, end_date, tags, bank_account, items - Optional, same
+              meaning as filter_by_date_range_and_tags (no filter exports everything)
+        Example: /api/v1/expenses/export/?output=ndjson&start_date=2025-01-01&end_date=2025-12-31
+        """
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_SERVICE.CONTENT_TYPES:
             return Response(
-                {
-                    "detail": "At least one filter is required: date range (start_date and end_date), tags, bank_account, or items."
-                },
+                {"detail": "output must be one of: csv, ndjson."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        expenses = self.get_queryset()
-
-        # Parse and validate dates if provided
-        if start_date_str and end_date_str:
-            try:
-                start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-                end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-            except ValueError:
-                return Response(
-                    {"detail": "Dates must be in YYYY-MM-DD format."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Validate date range
-            if start_date > end_date:
-                return Response(
-                    {"detail": "start_date must be before or equal to end_date."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Apply date filter
-            expenses = expenses.filter(
-                date__gte=start_date,
-                date__lte=end_date,
-            )
-
-        # Parse and validate tags if provided
-        tag_ids = []
-        if tags_param:
-            try:
-                tag_ids = [
-                    int(tag_id.strip())
-                    for tag_id in tags_param.split(",")
-                    if tag_id.strip()
-                ]
-            except ValueError:
-                return Response(
-                    {"detail": "tags must be comma-separated integers."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Validate at least one tag ID
-            if not tag_ids:
-                return Response(
-                    {"detail": "At least one tag ID is required."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Apply tag filter
-            expenses = expenses.filter(tags__id__in=tag_ids)
-
-        # Parse and validate bank account if provided
-        bank_account_id = None
-        if bank_account_param:
-            try:
-                bank_account_id = int(bank_account_param)
-            except ValueError:
-                return Response(
-                    {"detail": "bank_account must be an integer."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Apply bank account filter
-            expenses = expenses.filter(bank_account_id=bank_account_id)
-
-        # Parse and validate items if provided
-        item_ids = []
-        if items_param:
-            try:
-                item_ids = [
-                    int(item_id.strip())
-                    for item_id in items_param.split(",")
-                    if item_id.strip()
-                ]
-            except ValueError:
-                return Response(
-                    {"detail": "items must be comma-separated integers."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Validate at least one item ID
-            if not item_ids:
-                return Response(
-                    {"detail": "At least one item ID is required."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            # Apply item filter
-            expenses = expenses.filter(expense_items__item_id__in=item_ids)
-
-        # Remove duplicates if multiple filters are applied
-        expenses = expenses.distinct()
-
-        serializer = self.get_serializer(expenses, many=True)
-
-        response_data = {
-            "count": expenses.count(),
-            "results": serializer.data,
-        }
-
-        # Include applied filters in response
-        if start_date_str and end_date_str:
-            response_data["start_date"] = start_date_str
-            response_data["end_date"] = end_date_str
-        if tags_param:
-            response_data["tags"] = tag_ids
-        if bank_account_param:
-            response_data["bank_account"] = bank_account_id
-        if items_param:
-            response_data["items"] = item_ids
+        expenses, _ = filter_expenses(
+            self.get_queryset(), request.query_params, require_filter=False
+        )
 
-        return Response(response_data, status=status.HTTP_200_OK)
+        response = StreamingHttpResponse(
+            EXPORT_SERVICE.stream(expenses, output),
+            content_type=EXPORT_SERVICE.CONTENT_TYPES[output],
+        )
+        response["Content-Disposition"] = f'attachment; filename="expenses.{output}"'
+        return response
 
     # ------- Filter by Tags -------
     @action(detail=False, methods=["get"], url_path="filter_by_tags")
@@ -420,45 +478,91 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         Filter expenses by tag IDs.
         Query parameters: tags (comma-separated tag IDs)
         Example: /api/v1/expenses/filter_by_tags/?tags=1,2,3
+        Add pagination=cursor (optionally page_size, count=true) for keyset pages.
         """
+        expenses, params = self.filter_by_tags_query(request)
+        return Response(
+            {**params, **self._list_payload(expenses)},
+            status=status.HTTP_200_OK,
+        )
+
+    def filter_by_tags_query(self, request):
+        """(expenses, echoed params) for filter_by_tags; runs no queries."""
         tags_param = request.query_params.get("tags")
 
         # Validate parameter exists
         if not tags_param:
-            return Response(
-                {"detail": "tags parameter is required (comma-separated tag IDs)."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            raise ParseError("tags parameter is required (comma-separated tag IDs).")
 
-        # Parse tag IDs
-        try:
-            tag_ids = [
-                int(tag_id.strip())
-                for tag_id in tags_param.split(",")
-                if tag_id.strip()
-            ]
-        except ValueError:
-            return Response(
-                {"detail": "tags must be comma-separated integers."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Validate at least one tag ID
-        if not tag_ids:
-            return Response(
-                {"detail": "At least one tag ID is required."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        tag_ids = parse_id_list(tags_param, "tags", "tag")
 
         # Filter expenses that have any of the specified tags
-        expenses = self.get_queryset().filter(tags__id__in=tag_ids).distinct()
+        expenses = self.get_queryset().filter(has_any_tag(tag_ids))
+        return expenses, {"tags": tag_ids}
 
-        serializer = self.get_serializer(expenses, many=True)
+    # ------- Full-text Search -------
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        """
+        Ranked full-text search over transaction_info and notes.
+        Query parameters:
+            - q - Required, web search syntax: words, "quoted phrases", or, -word
+            - start_date, end_date, tags, bank_account, items - Optional, same
+              meaning as filter_by_date_range_and_tags
+            - page_size (max 100, default 20), offset - Optional
+        Matches in transaction_info rank above matches in notes; ties are
+        newest first.
+        Example: /api/v1/expenses/search/?q=amazon refund&start_date=2025-01-01&end_date=2025-12-31
+        """
+        expenses, params, page_size, offset = self.search_query(request)
+        page = list(expenses[offset : offset + page_size + 1])
         return Response(
-            {
-                "tags": tag_ids,
-                "count": expenses.count(),
-                "results": serializer.data,
-            },
+            {**params, **self._search_payload(page, page_size, offset)},
             status=status.HTTP_200_OK,
         )
+
+    def search_query(self, request):
+        """
+        (ranked expenses, echoed params, page_size, offset) for search; runs
+        no queries. The @@ match is served by the GIN index on search_vector.
+        """
+        params = request.query_params
+        terms = params.get("q", "").strip()
+        if not terms:
+            raise ParseError("q parameter is required.")
+
+        try:
+            page_size = int(params.get("page_size", self.search_page_size))
+            offset = int(params.get("offset", 0))
+        except ValueError:
+            raise ParseError("page_size and offset must be integers.")
+        if page_size <= 0 or offset < 0:
+            raise ParseError("page_size must be positive and offset non-negative.")
+        if offset > self.search_max_offset:
+            raise ParseError(
+                f"offset may be at most {self.search_max_offset}; narrow the search."
+            )
+        page_size = min(page_size, self.search_max_page_size)
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type="websearch")
+        expenses, applied = filter_expenses(
+            self.get_queryset(), params, require_filter=False
+        )
+        expenses = (
+            expenses.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-transaction_date_time", "-id")
+        )
+        return expenses, {"q": terms, **applied}, page_size, offset
+
+    def _search_payload(self, page, page_size, offset):
+        """Results block for search from a page fetched with one extra row."""
+        has_next = len(page) > page_size
+        page = page[:page_size]
+        results = self.get_serializer(page, many=True).data
+        for row, expense in zip(results, page):
+            row["rank"] = round(expense.rank, 6)
+        return {
+            "results": results,
+            "next_offset": offset + page_size if has_next else None,
+        }
@@ -1,17 +1,56 @@
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from expense_manager.models import Item
 from expense_manager.serializers import ITEM_SERIALIZER
+from expense_manager.services import AUTOCOMPLETE_SERVICE
+from utils.cache import CachedListMixin, ConditionalGetMixin
 
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     serializer_class = ITEM_SERIALIZER.ItemSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = None
+    cache_scopes = ("items",)
 
     def get_queryset(self):
-        return Item.objects.filter(user=self.request.user)
+        items = Item.objects.filter(user_id=self.request.user.id)
+        return self.serializer_class.sparse_queryset(items, self.request)
+
+    def get_cache_scopes(self):
+        if self.action == "autocomplete":
+            # ranked by usage, which expense writes change
+            return ("items", "expenses")
+        return super().get_cache_scopes()
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
+
+    # ------- Autocomplete -------
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request):
+        """
+        Items whose name starts with or fuzzily matches q, most likely first.
+        Query parameters: q (required), limit (max 50, default 10)
+        Example: /api/v1/items/autocomplete/?q=cofee
+        """
+        items, term = self.autocomplete_query(request)
+        items = list(items)
+        data = self.get_serializer(items, many=True).data
+        return Response(
+            AUTOCOMPLETE_SERVICE.payload(term, items, data), status=status.HTTP_200_OK
+        )
+
+    def autocomplete_query(self, request):
+        """(ranked items, term) for autocomplete; runs no queries."""
+        term, limit = AUTOCOMPLETE_SERVICE.parse_params(request.query_params)
+        items = AUTOCOMPLETE_SERVICE.suggest(
+            self.get_queryset(),
+            "name",
+            term,
+            AUTOCOMPLETE_SERVICE.item_uses(),
+            limit,
+        )
+        return items, term
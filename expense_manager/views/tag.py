@@ -5,30 +5,68 @@ from django.db import transaction
 
 from expense_manager.models import Tag
 from expense_manager.serializers import TAG_SERIALIZER
+from expense_manager.services import AUTOCOMPLETE_SERVICE
+from utils.cache import CachedListMixin, ConditionalGetMixin
 
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     serializer_class = TAG_SERIALIZER.TagSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = None  # Disable pagination for this viewset
+    cache_scopes = ("tags",)
 
     def get_queryset(self):
         # Return only tags belonging to the authenticated user
-        return Tag.objects.filter(user=self.request.user).order_by("tag_name")
+        tags = Tag.objects.filter(user_id=self.request.user.id).order_by("tag_name")
+        return self.serializer_class.sparse_queryset(tags, self.request)
+
+    def get_cache_scopes(self):
+        if self.action == "autocomplete":
+            # ranked by usage, which expense writes change
+            return ("tags", "expenses")
+        return super().get_cache_scopes()
 
     def perform_create(self, serializer):
         # Automatically set the user to the logged-in user
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
 
-    def list(self, request, *args, **kwargs):
+    def build_list_response(self, request, *args, **kwargs):
         # Override list to return all tags without pagination
         queryset = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(queryset, many=True)
         return Response(
             data={
-                "count": queryset.count(),
+                "count": len(serializer.data),
                 "next": None,
                 "previous": None,
                 "results": serializer.data,
             }
         )
+
+    # ------- Autocomplete -------
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request):
+        """
+        Tags whose name starts with or fuzzily matches q (case-insensitive),
+        most likely first.
+        Query parameters: q (required), limit (max 50, default 10)
+        Example: /api/v1/tags/autocomplete/?q=groc
+        """
+        tags, term = self.autocomplete_query(request)
+        tags = list(tags)
+        data = self.get_serializer(tags, many=True).data
+        return Response(
+            AUTOCOMPLETE_SERVICE.payload(term, tags, data), status=status.HTTP_200_OK
+        )
+
+    def autocomplete_query(self, request):
+        """(ranked tags, term) for autocomplete; runs no queries."""
+        term, limit = AUTOCOMPLETE_SERVICE.parse_params(request.query_params)
+        tags = AUTOCOMPLETE_SERVICE.suggest(
+            self.get_queryset(),
+            "tag_name",
+            term,
+            AUTOCOMPLETE_SERVICE.tag_uses(),
+            limit,
+        )
+        return tags, term
@@ -5,10 +5,40 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",  # works with allauth sessions
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWT without a user query per request (see authentication.jwt)
+        "authentication.jwt.StatelessJWTAuthentication",
     ],
+    # orjson-backed, same output as DRF's JSONRenderer/JSONParser
+    "DEFAULT_RENDERER_CLASSES": [
+        "pet.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "pet.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # token buckets per user (or IP) and scope, see THROTTLE_BUCKETS
+    "DEFAULT_THROTTLE_CLASSES": ["utils.throttling.TokenBucketThrottle"],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
+    # anonymous clients are throttled by IP: the one nginx appends to
+    # X-Forwarded-For (REMOTE_ADDR when there is no header)
+    "NUM_PROXIES": 1,
+}
+
+# utils.throttling: requests a client may make at once (burst) and the rate
+# its budget refills at, per scope. Views pick a scope per action with
+# throttle_scopes; the rest are "read" or "write" by HTTP method.
+THROTTLE_BUCKETS = {
+    "read": {"burst": 60, "rate": "10/s"},
+    # filters, search and export: scans of the whole expense history
+    "expensive_read": {"burst": 10, "rate": "30/min"},
+    "write": {"burst": 30, "rate": "2/s"},
+    # bulk_create/bulk_update and statement imports
+    "bulk_write": {"burst": 5, "rate": "10/min"},
+    # per IP address
+    "login": {"burst": 5, "rate": "10/min"},
 }
 
 SPECTACULAR_SETTINGS = {
@@ -0,0 +1,43 @@
+"""
+orjson-backed JSON parser, the project default (see drf_settings).
+
+Parses to the same data as DRF's JSONParser. Bodies orjson would read
+differently go to JSONParser: non-UTF-8 charsets, STRICT_JSON off (NaN and
+Infinity allowed), and runs of 19+ digits, since orjson turns integers
+beyond 64 bits into floats. Bodies orjson rejects are re-parsed by
+JSONParser too, so a ParseError keeps its wording.
+"""
+
+import codecs
+import io
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer
+
+# A run of 19 digits, found as 19 zeros once every digit reads as 0: much
+# faster than a regex over a large body
+DIGITS_AS_ZERO = bytes.maketrans(b"123456789", b"000000000")
+WIDE_NUMBER = b"0" * 19
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        body = stream.read()
+        if (
+            self.strict
+            and codecs.lookup(encoding).name == "utf-8"
+            and WIDE_NUMBER not in body.translate(DIGITS_AS_ZERO)
+        ):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,69 @@
+"""
+orjson-backed JSON renderer, the project default (see drf_settings).
+
+The output is byte-for-byte what DRF's JSONRenderer writes: compact
+separators, unicode unescaped except U+2028/U+2029, and DRF's encoder for
+Decimal, date, time, datetime, UUID and the other non-JSON types (orjson
+hands them to it). Whatever orjson would spell differently is rendered by
+JSONRenderer itself: indented output (browsable API, ``; indent=`` in the
+Accept header), non-default UNICODE/COMPACT/STRICT_JSON settings, non-str
+keys, integers beyond 64 bits, and floats Python writes in exponent form.
+Non-finite floats, which JSONRenderer refuses with an error, render as null.
+"""
+
+import re
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+# datetimes and dataclasses go through encoder_class like with json.dumps
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+# Floats where orjson and repr() may disagree: repr() writes 1e+16 and
+# 1e-05 where orjson writes 1e16 and 0.00001. Searched for separately, as
+# literal-prefixed patterns are an order of magnitude faster than a combined
+# one; a hit inside a string only costs a fallback.
+EXPONENT = re.compile(rb"e[-\d]")
+SMALL_FLOAT = b"0.0000"
+
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            # JSONRenderer either manages or raises its own error
+            return super().render(data, accepted_media_type, renderer_context)
+        if not spelled_like_repr(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b"\\u2028").replace(
+                PARAGRAPH_SEPARATOR, b"\\u2029"
+            )
+        return ret
+
+
+def spelled_like_repr(ret):
+    """Whether every float in orjson's ``ret`` is written as json.dumps would."""
+    if SMALL_FLOAT in ret:
+        return False
+    return not any(
+        ret[m.start() - 1 : m.start()].isdigit() for m in EXPONENT.finditer(ret)
+    )
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from corsheaders.defaults import default_headers
+
 # Security & debug
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "insecure-change-me")
 DEBUG = os.getenv("DJANGO_DEBUG", "False").lower() == "true"
@@ -61,6 +63,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # third-party apps
     "corsheaders",
     "django.contrib.sites",
@@ -76,6 +79,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.metrics.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -196,6 +200,13 @@ UNFOLD = {
 }
 
 WSGI_APPLICATION = "pet.wsgi.application"
+ASGI_APPLICATION = "pet.asgi.application"
+
+# "wsgi" (gunicorn sync workers) or "asgi" (uvicorn workers); see entrypoint.sh.
+# Under ASGI the read-heavy expense_manager actions and the email login are
+# served by async views.
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi").lower()
+ASYNC_READ_VIEWS = SERVER_MODE == "asgi"
 
 
 # Database
@@ -209,11 +220,63 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("POSTGRES_HOST", "localhost"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
-        "CONN_MAX_AGE": 60,
+        # Persistent connections are per thread; under ASGI every request
+        # runs its queries on a fresh thread, so they would only pile up
+        "CONN_MAX_AGE": 0 if ASYNC_READ_VIEWS else 60,
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# REDIS_URL selects Redis (or any Redis-compatible server). Otherwise a
+# file-based cache, which every gunicorn worker on the host shares; the
+# per-process local-memory cache (DJANGO_CACHE_BACKEND=locmem) only suits
+# a single process, since other workers would not see version bumps.
+
+_redis_url = os.getenv("REDIS_URL")
+if _redis_url:
+    _cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": _redis_url,
+    }
+elif os.getenv("DJANGO_CACHE_BACKEND", "file").lower() == "locmem":
+    _cache = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+else:
+    _cache = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv(
+            "DJANGO_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "django")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+CACHES = {"default": {**_cache, "KEY_PREFIX": "pet"}}
+
+# Lifetime of cached per-user lists; writes invalidate them immediately
+USER_DATA_CACHE_TIMEOUT = int(os.getenv("USER_DATA_CACHE_TIMEOUT", 60 * 60 * 24))
+
+# How long a stored Idempotency-Key response is replayed; older keys are
+# reusable and removed by `manage.py prune_idempotency_keys`
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 60 * 60 * 24))
+
+
+# Request instrumentation (utils.metrics)
+# Share of requests measured (0 turns it off, 1 measures all) and whether
+# they get a Server-Timing header with the db/encode/app/total breakdown
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "0.1"))
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "True") == "True"
+# How often (seconds) each worker publishes its totals for /metrics
+METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", 15))
+# Bearer token /metrics requires; unset, /metrics answers 403 to everyone
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Request throttling (utils.throttling, budgets in drf_settings). Needs
+# Redis (or the single-process locmem cache): the file cache cannot update
+# a bucket atomically, so it is off by default there. The benchmark
+# commands turn it off.
+THROTTLE_ENABLED = os.getenv("THROTTLE_ENABLED", str(bool(_redis_url))) == "True"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -256,6 +319,8 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTHENTICATION_BACKENDS = [
+    # email + password API login in one query; see the class docstring
+    "authentication.backends.EmailBackend",
     "django.contrib.auth.backends.ModelBackend",  # default
     "allauth.account.auth_backends.AuthenticationBackend",
 ]
@@ -277,6 +342,8 @@ ACCOUNT_AUTHENTICATION_METHOD = "username_email"
 # ]
 
 CORS_ALLOW_ALL_ORIGINS = True
+# let browser clients send Idempotency-Key on expense writes
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
 
 STATIC_URL = os.getenv("STATIC_URL", "/static/")
 STATIC_ROOT = os.getenv("STATIC_ROOT", os.path.join(BASE_DIR, "staticfiles"))
@@ -293,6 +360,15 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,  # Blacklist old refresh tokens
 }
 
+# How long authentication.jwt caches a token's User (and its is_active);
+# 0 trusts access tokens until they expire without reading the user
+JWT_USER_CACHE_TIMEOUT = int(os.getenv("JWT_USER_CACHE_TIMEOUT", 300))
+
+# Async email login (authentication.services.login.alogin): password checks
+# run at once per process, and logins that may wait for one; more get a 429
+LOGIN_HASH_WORKERS = int(os.getenv("LOGIN_HASH_WORKERS", 2))
+LOGIN_HASH_QUEUE = int(os.getenv("LOGIN_HASH_QUEUE", 8))
+
 try:
     from .drf_settings import *
 except:
@@ -9,6 +9,8 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from utils.metrics import metrics_view
+
 # Customize admin site headers
 admin.site.site_header = "Pet Expense Manager Admin"
 admin.site.site_title = "Pet Admin"
@@ -35,4 +37,6 @@ urlpatterns = [
         SpectacularSwaggerView.as_view(url_name="schema"),
         name="swagger-ui",
     ),
+    # Prometheus metrics
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,76 @@
+from asgiref.sync import sync_to_async
+from django.urls import URLPattern
+from django.views.decorators.csrf import csrf_exempt
+
+
+def async_route(sync_view, implementations):
+    """
+    ASGI callback for one router route of a DRF viewset, or for an APIView
+    (whose actions are its method names: "get", "post", ...).
+
+    ``implementations`` maps action names ("list", "retrieve", ...) to
+    ``async def handler(view, request, *args, **kwargs)`` returning a
+    Response. Those actions run on the event loop: the viewset instance is
+    set up as DRF's dispatch() would, initial() (authentication,
+    permissions, throttles, conditional GET) runs in a thread, and the
+    handler does its own I/O with the async ORM. Every other method falls
+    through to the original sync view in a thread.
+    """
+    cls, initkwargs = sync_view.cls, sync_view.initkwargs
+    actions = getattr(sync_view, "actions", None)
+    if actions is None:
+        actions = {m: m for m in cls.http_method_names if hasattr(cls, m)}
+    fallback = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        method = request.method.lower()
+        action = actions.get(method)
+        if action is None and method == "head":
+            action = actions.get("get")
+        handler = implementations.get(action)
+        if handler is None:
+            return await fallback(request, *args, **kwargs)
+
+        self = cls(**initkwargs)
+        self.action_map = actions
+        for method_name, action_name in actions.items():
+            setattr(self, method_name, getattr(self, action_name))
+        self.args, self.kwargs = args, kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await handler(self, request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    view.cls, view.initkwargs = cls, initkwargs
+    if hasattr(sync_view, "actions"):
+        view.actions = actions
+    # DRF views do their own CSRF checks (SessionAuthentication)
+    return csrf_exempt(view)
+
+
+def asyncify_urls(urlpatterns, implementations):
+    """
+    Swap the callback of every router (or APIView) URL whose view class has
+    async implementations (``{ViewSet: {action: handler}}``) for an
+    async_route().
+    """
+    patterns = []
+    for pattern in urlpatterns:
+        viewset = None
+        if isinstance(pattern, URLPattern):
+            viewset = getattr(pattern.callback, "cls", None)
+        if viewset in implementations:
+            pattern = URLPattern(
+                pattern.pattern,
+                async_route(pattern.callback, implementations[viewset]),
+                pattern.default_args,
+                pattern.name,
+            )
+        patterns.append(pattern)
+    return patterns
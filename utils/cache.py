@@ -0,0 +1,176 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+KEY_PREFIX = "userdata"
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def _version_key(user_id, scope):
+    return f"{KEY_PREFIX}:v:{scope}:{user_id}"
+
+
+def _new_token():
+    # "<unix time>-<random>": unique per bump, and carries the bump time
+    # for Last-Modified
+    return f"{time.time():.6f}-{uuid.uuid4().hex[:12]}"
+
+
+def token_time(token):
+    """Unix time a version token was issued at."""
+    try:
+        return float(token.split("-", 1)[0])
+    except ValueError:
+        return time.time()
+
+
+def get_versions(user_id, *scopes):
+    """
+    Current version token of each of the user's data scopes ("tags",
+    "items", ...). A scope with no token yet (or an evicted one) gets a
+    fresh token, which simply makes everything cached under the old one
+    unreachable.
+    """
+    keys = {_version_key(user_id, scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, _new_token(), timeout=None)
+        found[key] = cache.get(key)
+    return {scope: found[key] for key, scope in keys.items()}
+
+
+def bump(user_id, *scopes):
+    """
+    Give the scopes a new version so cached copies of them stop being used.
+
+    Deferred to commit: bumping earlier would let a concurrent reader cache
+    the pre-commit rows under the new version.
+    """
+
+    def _bump():
+        cache.set_many(
+            {_version_key(user_id, scope): _new_token() for scope in scopes},
+            timeout=None,
+        )
+
+    transaction.on_commit(_bump)
+
+
+class UserDataVersionMixin:
+    """
+    Viewset access to the version tokens of the data its responses are
+    built from: ``cache_scopes``, or get_cache_scopes() per action.
+    """
+
+    cache_scopes = ()
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+    def get_scope_versions(self):
+        # one cache round trip per request, shared by the mixins below
+        if not hasattr(self, "_scope_versions"):
+            self._scope_versions = get_versions(
+                self.request.user.id, *self.get_cache_scopes()
+            )
+        return self._scope_versions
+
+
+class ConditionalGetMixin(UserDataVersionMixin):
+    """
+    ETag / Last-Modified on GET and HEAD, derived from the scope versions.
+
+    If-None-Match / If-Modified-Since are checked in initial(), after
+    authentication and permissions but before the handler runs, so a 304
+    costs one cache read: no queryset, no serializer. Any write to the
+    scopes changes the ETag. Responses are marked private, no-cache since
+    the validators are per user.
+    """
+
+    def get_validators(self, request):
+        versions = self.get_scope_versions()
+        if not versions:
+            return None, None
+        fingerprint = "|".join(
+            [
+                str(request.user.id),
+                request.accepted_renderer.format,
+                *(f"{scope}={token}" for scope, token in sorted(versions.items())),
+            ]
+        )
+        etag = quote_etag(hashlib.sha1(fingerprint.encode("utf-8")).hexdigest())
+        last_modified = int(max(token_time(token) for token in versions.values()))
+        return etag, last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if request.method not in SAFE_METHODS or not request.user.is_authenticated:
+            return
+        self.etag, self.last_modified = self.get_validators(request)
+        if self.etag is None:
+            return
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        if response is not None:
+            raise ConditionalResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConditionalResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "etag", None) and response.status_code in (200, 304):
+            response.headers.setdefault("ETag", self.etag)
+            response.headers.setdefault("Last-Modified", http_date(self.last_modified))
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ConditionalResponse(Exception):
+    """Carries a 304/412 out of initial() to handle_exception()."""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+class CachedListMixin(UserDataVersionMixin):
+    """
+    Serve ``list`` from the cache, keyed by user, the version of each scope
+    in ``cache_scopes`` and the full request URL (page, ?fields=, host of
+    the next/previous links). A repeat load costs two cache reads and no
+    queries; any write to the scopes (see bump()) moves the key. Views
+    that shape their own list response override build_list_response().
+    """
+
+    cache_timeout = getattr(settings, "USER_DATA_CACHE_TIMEOUT", 60 * 60 * 24)
+
+    def list_cache_key(self, request):
+        versions = self.get_scope_versions()
+        url = hashlib.md5(request.build_absolute_uri().encode("utf-8")).hexdigest()
+        tokens = ":".join(token for _, token in sorted(versions.items()))
+        return f"{KEY_PREFIX}:list:{self.basename}:{request.user.id}:{tokens}:{url}"
+
+    def build_list_response(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        key = self.list_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            response = self.build_list_response(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=self.cache_timeout)
+            return response
+        return Response(data)
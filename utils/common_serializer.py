@@ -1,4 +1,17 @@
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def sparse_fields(request):
+    """
+    Field names a read request's ?fields= asks for, or None when it renders
+    every field. None for writes too, whose querysets must load full rows.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = request.query_params.get("fields")
+    return set(fields.split(",")) if fields else None
 
 
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
@@ -7,6 +20,10 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
     controls which fields should be displayed.
     """
 
+    # model fields sparse_queryset() loads whatever ?fields= asks for, e.g.
+    # ones that permissions or pagination read
+    sparse_required = ()
+
     def __init__(self, *args, **kwargs):
         extra_fields = kwargs.pop("override_fields", [])
         assert (
@@ -38,3 +55,34 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
     def _remove_fields(self, fields):
         for field_name in fields:
             self.fields.pop(field_name)
+
+    @classmethod
+    def sparse_columns(cls, fields):
+        """
+        Model fields to load for rendering ``fields``: the primary key,
+        sparse_required, and the concrete field (or foreign key) behind each
+        of them. Method and many-to-many fields add nothing; subclasses
+        load those themselves.
+        """
+        opts = cls.Meta.model._meta
+        columns = {opts.pk.name, *cls.sparse_required}
+        for name in cls.Meta.fields:
+            if name not in fields:
+                continue
+            declared = cls._declared_fields.get(name)
+            source = (declared.source if declared else None) or name
+            try:
+                field = opts.get_field(source.split(".")[0])
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.add(field.name)
+        return columns
+
+    @classmethod
+    def sparse_queryset(cls, queryset, request):
+        """``queryset`` with only() the columns ?fields= renders, if given."""
+        fields = sparse_fields(request)
+        if fields is None:
+            return queryset
+        return queryset.only(*cls.sparse_columns(fields))
@@ -0,0 +1,321 @@
+"""
+Per-request instrumentation: query count, DB time, encode time and total
+time of each request, labelled with the view and action it resolved to.
+Encoding is the renderer turning response data into bytes; serializing
+model instances into that data happens in the view and counts as app time.
+
+A share of requests (settings.METRICS_SAMPLE_RATE) is measured; those get
+a Server-Timing header and are added to this process's Registry. Every
+METRICS_FLUSH_INTERVAL seconds a process writes its totals to the cache,
+and metrics_view() sums the snapshots of all workers into the Prometheus
+text format. An unsampled request costs one random() call.
+
+Counters are per process since its start: when a worker restarts, its
+totals start over, which Prometheus reads as a counter reset.
+"""
+
+import hmac
+import os
+import random
+import socket
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+
+KEY_PREFIX = "metrics"
+INDEX_KEY = f"{KEY_PREFIX}:workers"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+
+# name -> (buckets, help)
+HISTOGRAMS = {
+    "http_request_duration_seconds": (
+        LATENCY_BUCKETS,
+        "Time from the first middleware to the rendered response.",
+    ),
+    "http_request_db_duration_seconds": (
+        LATENCY_BUCKETS,
+        "Time spent executing SQL during the request.",
+    ),
+    "http_request_db_queries": (QUERY_BUCKETS, "SQL queries per request."),
+    "http_request_encode_duration_seconds": (
+        LATENCY_BUCKETS,
+        "Time spent encoding the response data (renderer only, not serializers).",
+    ),
+}
+
+STANDARD_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class RequestTimings:
+    """
+    Measurements of one request. Installed as a database execute wrapper,
+    it counts and times every query.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.encode = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def server_timing(self, total):
+        app = max(total - self.db - self.encode, 0)
+        return ", ".join(
+            [
+                f'db;dur={self.db * 1000:.1f};desc="queries: {self.queries}"',
+                f"encode;dur={self.encode * 1000:.1f}",
+                f"app;dur={app * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+
+class Registry:
+    """This process's totals: request counts and histograms by label."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        # (view, method, status) -> requests
+        self.requests = defaultdict(int)
+        # (histogram, view, method) -> [count per bucket..., +Inf, sum]
+        self.histograms = {}
+        self.next_flush = time.monotonic() + settings.METRICS_FLUSH_INTERVAL
+
+    def observe(self, view, method, status, timings, total):
+        values = {
+            "http_request_duration_seconds": total,
+            "http_request_db_duration_seconds": timings.db,
+            "http_request_db_queries": timings.queries,
+            "http_request_encode_duration_seconds": timings.encode,
+        }
+        with self.lock:
+            if self.pid != os.getpid():
+                # forked after requests were recorded (gunicorn --preload)
+                self.reset()
+            self.requests[view, method, status] += 1
+            for name, value in values.items():
+                buckets = HISTOGRAMS[name][0]
+                series = self.histograms.get((name, view, method))
+                if series is None:
+                    series = self.histograms[name, view, method] = [0] * (
+                        len(buckets) + 2
+                    )
+                series[bisect_left(buckets, value)] += 1
+                series[-1] += value
+            flush = time.monotonic() >= self.next_flush
+        if flush:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            self.next_flush = time.monotonic() + settings.METRICS_FLUSH_INTERVAL
+            return {
+                "requests": dict(self.requests),
+                "histograms": {
+                    key: list(series) for key, series in self.histograms.items()
+                },
+            }
+
+    def worker_key(self):
+        return f"{KEY_PREFIX}:worker:{socket.gethostname()}:{os.getpid()}"
+
+    def flush(self):
+        """Publish this process's totals for metrics_view()."""
+        key = self.worker_key()
+        # outlives a few missed flushes, then a dead worker drops out
+        timeout = settings.METRICS_FLUSH_INTERVAL * 10
+        cache.set(key, self.snapshot(), timeout=timeout)
+        workers = cache.get(INDEX_KEY) or []
+        if key not in workers:
+            # unlocked read-modify-write: a lost update is redone next flush
+            cache.set(INDEX_KEY, [*workers, key], timeout=None)
+
+
+REGISTRY = Registry()
+
+
+def view_label(request):
+    """"ViewSet.action" for DRF viewsets, else the URL name; bounded set."""
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+    cls = getattr(match.func, "cls", None)
+    if cls is None:
+        return match.view_name
+    actions = getattr(match.func, "actions", None)
+    if not actions:
+        return cls.__name__
+    method = request.method.lower()
+    action = actions.get(method) or (method == "head" and actions.get("get"))
+    return f"{cls.__name__}.{action or method}"
+
+
+def _attach(timings):
+    connection.execute_wrappers.append(timings)
+
+
+def _detach(timings):
+    connection.execute_wrappers.remove(timings)
+
+
+class InstrumentationMiddleware:
+    """
+    Measures sampled requests, see the module docstring. Goes first in
+    MIDDLEWARE so the total covers the other middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_SAMPLE_RATE
+        self.server_timing = settings.METRICS_SERVER_TIMING
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        timings = request._request_timings = RequestTimings()
+        with connection.execute_wrapper(timings):
+            response = self.get_response(request)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        timings = request._request_timings = RequestTimings()
+        # Queries run in the request's sync thread, on that thread's
+        # connection: install the wrapper there
+        await sync_to_async(_attach)(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_detach)(timings)
+        return self.finish(request, response, timings)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (encoded) right after this hook returns
+        timings = getattr(request, "_request_timings", None)
+        if timings is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timings.encode += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, timings):
+        total = time.perf_counter() - timings.started
+        method = request.method if request.method in STANDARD_METHODS else "other"
+        REGISTRY.observe(
+            view_label(request), method, str(response.status_code), timings, total
+        )
+        if self.server_timing:
+            response["Server-Timing"] = timings.server_timing(total)
+        return response
+
+
+# ---------- exposition ----------
+def collect():
+    """Totals of every worker that flushed recently, summed."""
+    REGISTRY.flush()
+    workers = cache.get(INDEX_KEY) or []
+    snapshots = cache.get_many(workers)
+    if len(snapshots) < len(workers):
+        cache.set(INDEX_KEY, list(snapshots), timeout=None)
+
+    requests = defaultdict(int)
+    histograms = {}
+    for snapshot in snapshots.values():
+        for labels, count in snapshot["requests"].items():
+            requests[labels] += count
+        for key, series in snapshot["histograms"].items():
+            total = histograms.setdefault(key, [0] * len(series))
+            for i, value in enumerate(series):
+                total[i] += value
+    return requests, histograms
+
+
+def _labels(**labels):
+    def escape(value):
+        value = str(value).replace("\\", r"\\").replace('"', r"\"")
+        return value.replace("\n", r"\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+def exposition(requests, histograms):
+    """Prometheus text format (version 0.0.4)."""
+    lines = [
+        "# HELP http_requests_total Sampled requests by view, method and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (view, method, status), count in sorted(requests.items()):
+        labels = _labels(view=view, method=method, status=status)
+        lines.append(f"http_requests_total{{{labels}}} {count}")
+
+    for name, (buckets, help_text) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (metric, view, method), series in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip([*buckets, "+Inf"], series):
+                cumulative += count
+                labels = _labels(view=view, method=method, le=bound)
+                lines.append(f"{name}_bucket{{{labels}}} {cumulative}")
+            labels = _labels(view=view, method=method)
+            lines.append(f"{name}_sum{{{labels}}} {series[-1]}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+    lines += [
+        "# HELP http_request_sample_rate Share of requests measured.",
+        "# TYPE http_request_sample_rate gauge",
+        f"http_request_sample_rate {settings.METRICS_SAMPLE_RATE}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    GET /metrics for Prometheus. The scraper must send settings.METRICS_TOKEN
+    as ``Authorization: Bearer <token>``; with no token configured the
+    endpoint is closed, since view names and traffic are not public.
+    """
+    token = settings.METRICS_TOKEN
+    given = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not token or not hmac.compare_digest(given.encode(), token.encode()):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        exposition(*collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
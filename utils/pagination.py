@@ -0,0 +1,196 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a (timestamp, id) pair, newest first.
+
+    Every page is a single index range scan
+    ``WHERE ts <= last_ts AND (ts, id) < (last_ts, last_id)
+    ORDER BY ts DESC, id DESC LIMIT n``, the ts bound starting the scan at
+    the cursor, so page 500 costs the same as page 1. Cursors are opaque
+    tokens and no COUNT(*) is issued unless the client asks for it with
+    ``?count=true``.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+    timestamp_field = "transaction_date_time"
+    id_field = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page, cursor, reverse = self.prepare(queryset, request)
+        self.count = None
+        if self.count_requested(request):
+            self.count = queryset.count()
+        # Fetch one extra row to learn whether there is another page
+        return self.finish(list(page[: self.page_size + 1]), cursor, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() on the async ORM."""
+        page, cursor, reverse = self.prepare(queryset, request)
+        self.count = None
+        if self.count_requested(request):
+            self.count = await queryset.acount()
+        rows = [row async for row in page[: self.page_size + 1]]
+        return self.finish(rows, cursor, reverse)
+
+    def count_requested(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() == "true"
+
+    def prepare(self, queryset, request):
+        """The page's queryset (cursor applied, ordered) and the cursor; no queries."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        ts, pk = self.timestamp_field, self.id_field
+        if cursor is None:
+            reverse = False
+        else:
+            reverse, position_ts, position_id = cursor
+            op = "gt" if reverse else "lt"
+            # (ts, id) < (position): the OR alone is not an index range, so
+            # it is ANDed with the bound on ts that the index scan can start at
+            queryset = queryset.filter(
+                Q(**{f"{ts}__{op}e": position_ts}),
+                Q(**{f"{ts}__{op}": position_ts})
+                | Q(**{ts: position_ts, f"{pk}__{op}": position_id}),
+            )
+
+        if reverse:
+            queryset = queryset.order_by(ts, pk)
+        else:
+            queryset = queryset.order_by(f"-{ts}", f"-{pk}")
+        return queryset, cursor, reverse
+
+    def finish(self, rows, cursor, reverse):
+        """Trim the look-ahead row and record the page's link positions."""
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+
+        self.first_position = self.get_position(rows[0]) if rows else None
+        self.last_position = self.get_position(rows[-1]) if rows else None
+        if not rows:
+            self.has_previous = self.has_next = False
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            # values() rows
+            return row[self.timestamp_field], row[self.id_field]
+        return (
+            getattr(row, self.timestamp_field),
+            getattr(row, self.id_field),
+        )
+
+    # ---------- cursors ----------
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            return (
+                bool(payload["r"]),
+                datetime.fromisoformat(payload["t"]),
+                int(payload["i"]),
+            )
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, reverse, position):
+        ts, pk = position
+        payload = json.dumps({"r": int(reverse), "t": ts.isoformat(), "i": pk})
+        encoded = base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(False, self.last_position)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(True, self.first_position)
+
+    # ---------- responses ----------
+    def get_paginated_data(self, data):
+        payload = OrderedDict(
+            [("next", self.get_next_link()), ("previous", self.get_previous_link())]
+        )
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["results"] = data
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer", "description": "Only with ?count=true"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque pagination cursor from a next/previous link.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to true to include the total count.",
+                "schema": {"type": "boolean"},
+            },
+        ]
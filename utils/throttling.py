@@ -0,0 +1,144 @@
+"""
+Token-bucket throttling backed by the cache.
+
+Each request is charged to the bucket of its scope ("read",
+"expensive_read", "bulk_write", ...) and client: the user for
+authenticated requests, else the IP address. settings.THROTTLE_BUCKETS
+gives every scope a burst, the requests a full bucket allows at once, and
+a sustained rate ("N/period") at which spent tokens come back.
+
+A bucket is a single number in the cache, kept the GCRA way: the time at
+which it will be full again. A request is allowed while that time is less
+than burst intervals ahead of now, and moves it one interval on. The
+check and update must be one atomic operation, or concurrent requests
+would all read the same bucket and pass. On Redis they are one Lua
+script, run on the server with the server's clock: one round trip per
+request and no race between workers. The local-memory cache is private
+to its process, so there a lock makes them atomic. Other backends (the
+file cache) offer no atomic update, so throttling refuses to run on them;
+settings.THROTTLE_ENABLED is off by default without REDIS_URL.
+"""
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = "throttle"
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 60 * 60 * 24}
+
+# KEYS[1]: the bucket; ARGV: milliseconds per token, burst. Returns 0 if
+# the request is allowed, else the milliseconds until it would be.
+# (TIME before a write needs Redis 5+, which replicates script effects.)
+GCRA_SCRIPT = """
+local time = redis.call('TIME')
+local now = time[1] * 1000 + time[2] / 1000
+local interval = tonumber(ARGV[1])
+local full_at = math.max(tonumber(redis.call('GET', KEYS[1])) or now, now)
+local next_at = full_at + interval
+local wait = next_at - tonumber(ARGV[2]) * interval - now
+if wait > 0 then
+    return math.ceil(wait)
+end
+redis.call('SET', KEYS[1], next_at, 'PX', math.ceil(next_at - now))
+return 0
+"""
+
+_script = None
+_local_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """Seconds per token of a "N/period" rate: "10/s", "30/min", "100/hour"."""
+    count, period = rate.split("/")
+    return PERIODS[period[0]] / int(count)
+
+
+def _take_redis(backend, key, interval, burst):
+    global _script
+    key = backend.make_and_validate_key(key)
+    client = backend._cache.get_client(key, write=True)
+    if _script is None:
+        # EVALSHA, loading the script on first use per server
+        _script = client.register_script(GCRA_SCRIPT)
+    wait = _script(keys=[key], args=[interval * 1000, burst], client=client)
+    return wait / 1000
+
+
+def _take_local(backend, key, interval, burst):
+    # the cache lives in this process: the lock covers every reader
+    with _local_lock:
+        now = time.time()
+        full_at = max(backend.get(key, now), now)
+        next_at = full_at + interval
+        wait = next_at - burst * interval - now
+        if wait > 0:
+            return wait
+        backend.set(key, next_at, timeout=math.ceil(next_at - now))
+        return 0
+
+
+def take(key, burst, interval):
+    """
+    Take a token from the bucket ``key``: 0 if there was one, else the
+    seconds until there will be.
+    """
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, RedisCache):
+        return _take_redis(backend, key, interval, burst)
+    if isinstance(backend, LocMemCache):
+        return _take_local(backend, key, interval, burst)
+    raise ImproperlyConfigured(
+        "Throttling needs atomic cache updates: set REDIS_URL, or "
+        "THROTTLE_ENABLED=False."
+    )
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttles each request by its scope's bucket, see the module docstring.
+    The scope is the view's throttle_scopes[action], else its
+    throttle_scope, else "read" for safe methods and "write" for the rest.
+    Scopes missing from THROTTLE_BUCKETS are not throttled.
+    """
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_scope(self, request, view):
+        scopes = getattr(view, "throttle_scopes", {})
+        action = getattr(view, "action", None)
+        if action in scopes:
+            return scopes[action]
+        scope = getattr(view, "throttle_scope", None)
+        if scope:
+            return scope
+        return "read" if request.method in SAFE_METHODS else "write"
+
+    def get_ident(self, request):
+        user = request.user
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{super().get_ident(request)}"
+
+    def allow_request(self, request, view):
+        if not settings.THROTTLE_ENABLED:
+            return True
+        scope = self.get_scope(request, view)
+        bucket = settings.THROTTLE_BUCKETS.get(scope)
+        if bucket is None:
+            return True
+        key = f"{KEY_PREFIX}:{scope}:{self.get_ident(request)}"
+        self.retry_after = take(key, bucket["burst"], parse_rate(bucket["rate"]))
+        return not self.retry_after
+
+    def wait(self):
+        return self.retry_after